@@ -22,6 +22,10 @@
 
 #include <vector>
 #include <array>
+#include <mutex>
+#include <atomic>
+#include <algorithm>
+#include <cstdint>
 #include <stdlib.h>
 #include "libndspy/Dspy.h"
 
@@ -50,6 +54,8 @@ struct BlenderImage
         isDirty = false;
         framebuffer = nullptr;
         denoiseFrameBuffer = nullptr;
+        generation = 0;
+        hasDirtyRegion = false;
     }
 
     int width;
@@ -73,6 +79,18 @@ struct BlenderImage
     GLuint texture_id;
     bool isDirty;
     int use_denoiser;
+
+    // bumped every time the framebuffer is written to
+    std::atomic<uint64_t> generation;
+
+    // the region written to since it was last read 
+    // with GetDirtyRegion
+    std::mutex dirtyMutex;
+    bool hasDirtyRegion;
+    int dirtyXMin;
+    int dirtyXMax;
+    int dirtyYMin;
+    int dirtyYMax;
 #ifndef OSX
     BlenderOptiXDenoiser blenderDenoiser;
 #endif    
@@ -129,6 +147,30 @@ private:
 
 static std::vector<BlenderImage*> s_blenderImages;
 
+// Add a region to the image's dirty region, and bump its generation
+void MarkDirty(BlenderImage* blenderImage, int xmin, int xmax, int ymin, int ymax)
+{
+    {
+        std::lock_guard<std::mutex> lock(blenderImage->dirtyMutex);
+        if (blenderImage->hasDirtyRegion)
+        {
+            blenderImage->dirtyXMin = std::min(blenderImage->dirtyXMin, xmin);
+            blenderImage->dirtyXMax = std::max(blenderImage->dirtyXMax, xmax);
+            blenderImage->dirtyYMin = std::min(blenderImage->dirtyYMin, ymin);
+            blenderImage->dirtyYMax = std::max(blenderImage->dirtyYMax, ymax);
+        }
+        else
+        {
+            blenderImage->dirtyXMin = xmin;
+            blenderImage->dirtyXMax = xmax;
+            blenderImage->dirtyYMin = ymin;
+            blenderImage->dirtyYMax = ymax;
+            blenderImage->hasDirtyRegion = true;
+        }
+    }
+    blenderImage->generation++;
+}
+
 bool DenoiseBuffer(BlenderImage* blenderImage)
 {
 #ifndef OSX
@@ -304,6 +346,47 @@ void GetActiveRegion(size_t pos, int& arXMin, int& arXMax, int& arYMin, int& arY
     }
 }
 
+// Return the generation of this display. This changes every
+// time the display's framebuffer is written to.
+PRMANEXPORT
+uint64_t GetImageGeneration(size_t pos)
+{
+    if (s_blenderImages.empty() || pos >= s_blenderImages.size())
+        return 0;
+
+    BlenderImage* blenderImage = s_blenderImages[pos];
+    
+    if (blenderImage == nullptr)
+        return 0;
+
+    return blenderImage->generation;
+}
+
+// Return the region written to since the last call, and clear it.
+// Returns 0 if nothing was written.
+PRMANEXPORT
+int GetDirtyRegion(size_t pos, int& xMin, int& xMax, int& yMin, int& yMax)
+{
+    if (s_blenderImages.empty() || pos >= s_blenderImages.size())
+        return 0;
+
+    BlenderImage* blenderImage = s_blenderImages[pos];
+    
+    if (blenderImage == nullptr)
+        return 0;
+
+    std::lock_guard<std::mutex> lock(blenderImage->dirtyMutex);
+    if (!blenderImage->hasDirtyRegion)
+        return 0;
+
+    xMin = blenderImage->dirtyXMin;
+    xMax = blenderImage->dirtyXMax;
+    yMin = blenderImage->dirtyYMin;
+    yMax = blenderImage->dirtyYMax;
+    blenderImage->hasDirtyRegion = false;
+    return 1;
+}
+
 // DrawBufferToBlender creates a GL texture that then can be given to 
 // Blender to draw into their viewport. It is expected that this function 
 // will be called from python via the ctypes module, in the view_draw()
@@ -631,6 +714,9 @@ DspyImageData(
     }
    
     blenderImage->isDirty = true;
+    MarkDirty(blenderImage, 
+              blenderImage->cropXMin + xmin, blenderImage->cropXMin + xmax_plus_1 - 1,
+              blenderImage->cropYMin + ymin, blenderImage->cropYMin + ymax_plus_1 - 1);
     return PkDspyErrorNone;
 }
 
@@ -802,6 +888,8 @@ void DisplayBlender::Notify(const uint32_t iteration, const uint32_t totaliterat
         m_image->isReady = true;
     }
     m_image->isDirty = true;
+    // XPU writes to the whole image
+    MarkDirty(m_image, 0, m_image->width - 1, 0, m_image->height - 1);
 
 }
 
@@ -190,6 +190,13 @@ class RendermanPreferences(AddonPreferences):
         min=1,max=32
     )  
 
+    rman_txmanager_cache_dir: StringProperty(
+        name='Shared Texture Cache',
+        description="Directory used to share converted textures between artists and render nodes. Converted textures are keyed by the contents of the input image and the txmake settings. Leave empty to disable the cache.",
+        subtype='DIR_PATH',
+        default='',
+    )
+
     rman_txmanager_tex_extensions: StringProperty(
         name='Texture Extensions',
         description="Any file with one of these extensions will not be converted by the texture manager and used as-is. Entries should be space-delimited.",
@@ -487,6 +494,7 @@ class RendermanPreferences(AddonPreferences):
         col.prop(self, "rman_txmanager_workers")
         col.prop(self, "rman_txmanager_keep_extension")
         col.prop(self, "rman_txmanager_tex_extensions")
+        col.prop(self, "rman_txmanager_cache_dir")
 
         # UI Prefs
         row = layout.row()
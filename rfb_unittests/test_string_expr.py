@@ -26,4 +26,10 @@ class StringExprTest(unittest.TestCase):
         string_utils.set_var('OUT', '/var/tmp')
         string_utils.set_var('unittest', 'StringExprTest')
         expanded_str = string_utils.expand_string(s, display='openexr', frame=1)
-        self.assertEqual(expanded_str, compare)
\ No newline at end of file
+        self.assertEqual(expanded_str, compare)
+
+        # changing a variable should not return the previously expanded string
+        compare = f'{string_utils.get_var("OUT")}/StringExprCacheTest/{bpy.context.scene.name}.0001.exr'
+        string_utils.set_var('unittest', 'StringExprCacheTest')
+        expanded_str = string_utils.expand_string(s, display='openexr', frame=1)
+        self.assertEqual(expanded_str, compare)
@@ -8,6 +8,9 @@ from ..rfb_logger import rfb_log
 from .prefs_utils import get_pref
 from .envconfig_utils import envconfig
 
+# directories we've already created, or found to exist, this session
+__CREATED_DIRS__ = set()
+
 def view_file(file_path):
     
     rman_editor = get_pref('rman_editor', '')
@@ -88,4 +91,21 @@ def filesystem_path(p):
 def get_real_path(path):
     if os.path.isabs(path):
         return os.path.realpath(filesystem_path(path))
-    return path
\ No newline at end of file
+    return path
+
+def create_dirs(dirname):
+    """Create dirname and any missing parents. Each directory is only
+    checked once per session.
+
+    Returns:
+    - False if the directory could not be created.
+    """
+    if not dirname or dirname in __CREATED_DIRS__:
+        return True
+    if not os.path.exists(dirname):
+        try:
+            os.makedirs(dirname, exist_ok=True)
+        except PermissionError:
+            return False
+    __CREATED_DIRS__.add(dirname)
+    return True
@@ -218,36 +218,38 @@ def _get_mesh_points_(mesh):
     P = np.zeros(nvertices*3, dtype=np.float32)
     mesh.vertices.foreach_get('co', P)
     P = np.reshape(P, (nvertices, 3))
-    return P.tolist()
+    return P
 
 def _get_mesh_(mesh, get_normals=False):
+    '''Get the geometry of a mesh as NumPy arrays.
+
+    Returns:
+        (tuple) - nverts (int32), verts (int32), P (float32, Nx3) and 
+                  N (float32, Nx3). N is None if get_normals is False.
+    '''
 
     P = _get_mesh_points_(mesh)
-    N = []    
+    N = None
 
     npolygons = len(mesh.polygons)
-    fastnvertices = np.zeros(npolygons, dtype=np.int)
-    mesh.polygons.foreach_get('loop_total', fastnvertices)
-    nverts = fastnvertices.tolist()
+    nverts = np.zeros(npolygons, dtype=np.int32)
+    mesh.polygons.foreach_get('loop_total', nverts)
 
     loops = len(mesh.loops)
-    fastvertices = np.zeros(loops, dtype=np.int)
-    mesh.loops.foreach_get('vertex_index', fastvertices)
-    verts = fastvertices.tolist()
+    verts = np.zeros(loops, dtype=np.int32)
+    mesh.loops.foreach_get('vertex_index', verts)
 
     if get_normals:
-        fastsmooth = np.zeros(npolygons, dtype=np.int)
+        fastsmooth = np.zeros(npolygons, dtype=np.bool_)
         mesh.polygons.foreach_get('use_smooth', fastsmooth)
-        if mesh.use_auto_smooth or True in fastsmooth:
+        if mesh.use_auto_smooth or fastsmooth.any():
             mesh.calc_normals_split()
-            fastnormals = np.zeros(loops*3, dtype=np.float32)
-            mesh.loops.foreach_get('normal', fastnormals)
-            fastnormals = np.reshape(fastnormals, (loops, 3))
-            N = fastnormals.tolist()            
+            N = np.zeros(loops*3, dtype=np.float32)
+            mesh.loops.foreach_get('normal', N)
+            N = np.reshape(N, (loops, 3))
         else:            
-            fastnormals = np.zeros(npolygons*3, dtype=np.float32)
-            mesh.polygons.foreach_get('normal', fastnormals)
-            fastnormals = np.reshape(fastnormals, (npolygons, 3))
-            N = fastnormals.tolist()
+            N = np.zeros(npolygons*3, dtype=np.float32)
+            mesh.polygons.foreach_get('normal', N)
+            N = np.reshape(N, (npolygons, 3))
 
     return (nverts, verts, P, N)
\ No newline at end of file
@@ -157,6 +157,112 @@ def set_rix_param(params, param_type, param_name, val, is_reference=False, is_ar
             elif param_type == "normal":
                 params.SetNormal(param_name, val)               
 
+def _get_rix_param_setter(param_type, param_name, is_array=False, array_len=-1):
+    """Return a function(params, val) that sets a single, non-reference parameter
+    in an RtParamList. This does the same type dispatch as set_rix_param, but only
+    once, rather than every time the parameter is set.
+    """
+
+    if is_array:
+        if param_type == 'float':
+            return lambda params, val: params.SetFloatArray(param_name, val, array_len)
+        elif param_type == 'int':
+            return lambda params, val: params.SetIntegerArray(param_name, val, array_len)
+        elif param_type == 'color':
+            return lambda params, val: params.SetColorArray(param_name, val, int(array_len/3))
+        elif param_type == 'string':
+            return lambda params, val: params.SetStringArray(param_name, val, array_len)
+    else:
+        if param_type == "float":
+            return lambda params, val: params.SetFloat(param_name, float(val))
+        elif param_type == "int":
+            return lambda params, val: params.SetInteger(param_name, int(val))
+        elif param_type == "color":
+            return lambda params, val: params.SetColor(param_name, val)
+        elif param_type == "string":
+            return lambda params, val: params.SetString(param_name, "" if val == __RMAN_EMPTY_STRING__ else val)
+        elif param_type == "point":
+            return lambda params, val: params.SetPoint(param_name, val)
+        elif param_type == "vector":
+            return lambda params, val: params.SetVector(param_name, val)
+        elif param_type == "normal":
+            return lambda params, val: params.SetNormal(param_name, val)
+
+    return lambda params, val: None
+
+def _compile_riattr_emitter(prop_name, meta):
+    ri_name = meta['riattr']
+    setter = _get_rix_param_setter(meta['renderman_type'], ri_name,
+                                   is_array=('arraySize' in meta), array_len=meta.get('arraySize', -1))
+
+    if 'inheritable' not in meta:
+        def emit(params, node):
+            setter(params, getattr(node, prop_name))
+        return emit
+
+    cond = meta['inherit_true_value']
+    if isinstance(cond, str):
+        # the condition is an expression on node
+        code = compile(cond, '<%s inherit_true_value>' % prop_name, 'eval')
+        def emit(params, node):
+            if eval(code, {}, {'node': node}):
+                params.Remove(ri_name)
+            else:
+                setter(params, getattr(node, prop_name))
+        return emit
+
+    cond = float(cond)
+    def emit(params, node):
+        val = getattr(node, prop_name)
+        if float(val) == cond:
+            params.Remove(ri_name)
+        else:
+            setter(params, val)
+    return emit
+
+def _compile_primvar_emitter(prop_name, meta):
+    setter = _get_rix_param_setter(meta['renderman_type'], meta['primvar'],
+                                   is_array=('arraySize' in meta), array_len=meta.get('arraySize', -1))
+    inherit_true_value = float(meta['inherit_true_value']) if 'inheritable' in meta else None
+
+    def emit(params, node, inherit_node):
+        val = getattr(node, prop_name)
+        if not val:
+            return
+        if inherit_true_value is not None and float(val) == inherit_true_value:
+            if hasattr(inherit_node, prop_name):
+                val = getattr(inherit_node, prop_name)
+        setter(params, val)
+    return emit
+
+__RIX_PARAM_EMITTERS__ = dict()
+
+def get_rix_param_emitters(node, meta_key):
+    """Return the emitters for the properties of node marked with meta_key
+    ('riattr' or 'primvar') in the config files. The emitters are compiled once per
+    property group class, from its prop_meta, and are in prop_meta order.
+
+    riattr emitters are called as emit(params, node), and either set the attribute,
+    or remove it if the property is inheriting its value. primvar emitters are called as
+    emit(params, node, inherit_node), and skip empty values. Inheriting properties
+    take their value from inherit_node, usually the scene's RendermanSceneSettings.
+
+    Arguments:
+        node (bpy.types.PropertyGroup) - property group with a prop_meta dict
+        meta_key (str) - either 'riattr' or 'primvar'
+
+    Returns:
+        (list) - list of emitter functions
+    """
+
+    key = (type(node), meta_key)
+    emitters = __RIX_PARAM_EMITTERS__.get(key, None)
+    if emitters is None:
+        compile_emitter = _compile_riattr_emitter if meta_key == 'riattr' else _compile_primvar_emitter
+        emitters = [compile_emitter(prop_name, meta) for prop_name, meta in node.prop_meta.items() if meta_key in meta]
+        __RIX_PARAM_EMITTERS__[key] = emitters
+    return emitters
+
 def build_output_param_str(mat_name, from_node, from_socket, convert_socket=False, param_type=''):
     from_node_name = shadergraph_utils.get_node_name(from_node, mat_name)
     from_sock_name = shadergraph_utils.get_socket_name(from_node, from_socket)
@@ -169,6 +169,38 @@ def get_light_group(light_ob, scene):
                 return lg.name
     return ''         
 
+def get_light_role(ob):
+    """Return the role this object plays when lighting the scene
+
+    Args:
+    ob (bpy.types.Object) - the object to check
+
+    Returns:
+    (str) - 'RMAN_LIGHT' or 'RMAN_LIGHTFILTER' for lights, 'MESHLIGHT' for objects
+            with a PxrMeshLight material, or None if the object is not a light
+    """
+
+    if ob.type == 'LIGHT':
+        if hasattr(ob.data, 'renderman'):
+            if ob.data.renderman.renderman_light_role == 'RMAN_LIGHTFILTER':
+                return 'RMAN_LIGHTFILTER'
+            return 'RMAN_LIGHT'
+        return None
+
+    mat = getattr(ob, 'active_material', None)
+    if not mat:
+        return None
+    output = shadergraph_utils.is_renderman_nodetree(mat)
+    if not output:
+        return None
+    if len(output.inputs) > 1:
+        socket = output.inputs[1]
+        if socket.is_linked:
+            node = socket.links[0].from_node
+            if node.bl_label == 'PxrMeshLight':
+                return 'MESHLIGHT'
+    return None
+
 def get_all_lights(scene, include_light_filters=True):
     """Return a list of all lights in the scene, including
     mesh lights
@@ -183,26 +215,204 @@ def get_all_lights(scene, include_light_filters=True):
 
     lights = list()
     for ob in scene.objects:
-        if ob.type == 'LIGHT':
-            if hasattr(ob.data, 'renderman'):
-                if include_light_filters:
-                    lights.append(ob)
-                elif ob.data.renderman.renderman_light_role == 'RMAN_LIGHT':            
-                    lights.append(ob)
-        else:
-            mat = getattr(ob, 'active_material', None)
-            if not mat:
+        role = get_light_role(ob)
+        if not role:
+            continue
+        if role == 'RMAN_LIGHTFILTER' and not include_light_filters:
+            continue
+        lights.append(ob)
+    return lights
+
+class RmanLightRegistry(object):
+    """Keeps track of the lights, mesh lights and light filters in a scene,
+    so they can be looked up without checking every object in the scene.
+
+    Call rebuild() once for a new export, then update() when an object is added 
+    or changed, and remove() when an object is deleted.
+    """
+
+    def __init__(self):
+        self.__roles = dict()
+        self.__num_lights = 0
+
+    def __contains__(self, ob):
+        return ob.original in self.__roles
+
+    def clear(self):
+        self.__roles.clear()
+        self.__num_lights = 0
+
+    def rebuild(self, scene):
+        """Register all of the lights in scene
+
+        Args:
+        scene (bpy.types.Scene) - scene to look for lights
+        """
+        self.clear()
+        for ob in scene.objects:
+            self.update(ob)
+
+    def update(self, ob):
+        """Add, remove or re-classify ob, depending on its current light role
+
+        Args:
+        ob (bpy.types.Object) - the object that was added or changed
+        """
+        role = get_light_role(ob)
+        key = ob.original
+        old_role = self.__roles.get(key, None)
+        if role == old_role:
+            return
+        if old_role:
+            self.remove(key)
+        if role:
+            self.__roles[key] = role
+            if role != 'RMAN_LIGHTFILTER':
+                self.__num_lights += 1
+
+    def remove(self, ob):
+        """Remove ob from the registry, if it was registered
+
+        Args:
+        ob (bpy.types.Object) - the original object that was deleted
+        """
+        role = self.__roles.pop(ob, None)
+        if role and role != 'RMAN_LIGHTFILTER':
+            self.__num_lights -= 1
+
+    def _is_stale(self, ob):
+        try:
+            # make sure this is still a valid reference
+            ob.name
+        except ReferenceError:
+            return True
+        return False
+
+    def has_lights(self):
+        """Return whether there are any lights or mesh lights, not counting light filters"""
+        if self.__num_lights < 1:
+            return False
+        # references can go stale after an undo, so make sure 
+        # at least one of the lights is still valid
+        stale = list()
+        found = False
+        for ob, role in self.__roles.items():
+            if role == 'RMAN_LIGHTFILTER':
                 continue
-            output = shadergraph_utils.is_renderman_nodetree(mat)
-            if not output:
+            if self._is_stale(ob):
+                stale.append(ob)
                 continue
-            if len(output.inputs) > 1:
-                socket = output.inputs[1]
-                if socket.is_linked:
-                    node = socket.links[0].from_node
-                    if node.bl_label == 'PxrMeshLight':
-                        lights.append(ob)       
-    return lights
+            found = True
+            break
+        for ob in stale:
+            self.remove(ob)
+        return found
+
+    def get_lights(self, include_light_filters=True):
+        """Return a list of all registered lights, including mesh lights
+
+        Args:
+        include_light_filters (bool) - whether or not light filters should be included in the list
+
+        Returns:
+        (list) - list of all lights
+        """
+        lights = list()
+        stale = list()
+        for ob, role in self.__roles.items():
+            if role == 'RMAN_LIGHTFILTER' and not include_light_filters:
+                continue
+            if self._is_stale(ob):
+                stale.append(ob)
+                continue
+            lights.append(ob)
+        for ob in stale:
+            self.remove(ob)
+        return lights
+
+class RmanGroupMembership(object):
+    """An index of which object groups (trace sets) each object belongs to, and
+    which lights and light filters are part of a light link. It is built from 
+    the scene the first time it is used, and rebuilt after invalidate() is called,
+    or when check_for_changes() sees that the groups or light links changed.
+    """
+
+    def __init__(self):
+        self.__scene = None
+        self.__key = None
+        self.__object_groups = dict()
+        self.__light_links = set()
+
+    def invalidate(self):
+        self.__scene = None
+
+    def _get_key(self, scene):
+        # a summary of the groups and light links, that changes when groups, 
+        # links or members are added, removed, renamed or swapped for other objects
+        def _members(members):
+            return tuple(m.ob_pointer.original if m.ob_pointer else None for m in members)
+
+        rm = scene.renderman
+        return (tuple((obj_group.name, _members(obj_group.members)) for obj_group in rm.object_groups),
+                tuple((ll.light_ob.original if ll.light_ob else None, _members(ll.members)) for ll in rm.light_links))
+
+    def check_for_changes(self, scene):
+        """Invalidate the index if the scene's object groups or light links
+        have changed since it was built.
+
+        Args:
+        scene (bpy.types.Scene) - the scene to check
+        """
+        if self.__scene is not None and self.__key != self._get_key(scene):
+            self.invalidate()
+
+    def _rebuild(self, scene):
+        self.__object_groups.clear()
+        self.__light_links.clear()
+        rm = scene.renderman
+        for obj_group in rm.object_groups:
+            for member in obj_group.members:
+                ob = member.ob_pointer
+                if not ob:
+                    continue
+                groups = self.__object_groups.setdefault(ob.original, list())
+                if not groups or groups[-1] != obj_group.name:
+                    groups.append(obj_group.name)
+        for ll in rm.light_links:
+            if ll.light_ob:
+                self.__light_links.add(ll.light_ob.original)
+        self.__key = self._get_key(scene)
+        self.__scene = scene.original
+
+    def _validate(self, scene):
+        if self.__scene is None or self.__scene != scene.original:
+            self._rebuild(scene)
+
+    def get_object_groups(self, scene, ob):
+        """Return the names of the object groups that ob is a member of
+
+        Args:
+        scene (bpy.types.Scene) - the scene the object groups belong to
+        ob (bpy.types.Object) - the object
+
+        Returns:
+        (list) - the group names, in the same order as the scene's object groups
+        """
+        self._validate(scene)
+        return self.__object_groups.get(ob.original, list())
+
+    def is_light_linked(self, scene, ob):
+        """Return whether ob is the light of any of the scene's light links
+
+        Args:
+        scene (bpy.types.Scene) - the scene the light links belong to
+        ob (bpy.types.Object) - the light or light filter
+
+        Returns:
+        (bool) - True if ob is in a light link
+        """
+        self._validate(scene)
+        return ob.original in self.__light_links
 
 def get_light_groups_in_scene(scene):
     """ Return a dictionary of light groups in the scene
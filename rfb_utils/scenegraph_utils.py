@@ -1,3 +1,5 @@
+import numpy as np
+
 def set_material(sg_node, sg_material_node):
     '''Sets the material on a scenegraph group node and sets the materialid
     user attribute at the same time.
@@ -11,4 +13,131 @@ def set_material(sg_node, sg_material_node):
     sg_node.SetMaterial(sg_material_node)
     attrs = sg_node.GetAttributes()
     attrs.SetString('user:__materialid', sg_material_node.GetIdentifier().CStr())
-    sg_node.SetAttributes(attrs) 
\ No newline at end of file
+    sg_node.SetAttributes(attrs) 
+
+# Detail setters that have rejected NumPy arrays. Once a setter has
+# rejected an array, we go straight to the python list fallback.
+__LIST_ONLY_SETTERS__ = set()
+
+def set_primvar_detail(primvar, setter_name, param_name, data, *args):
+    '''Calls one of the RtParamList detail setters (ex: SetPointDetail) with
+    a NumPy array. The array is made contiguous and passed straight through
+    to the setter, so that large primvars don't need to be converted to
+    nested python lists. If the python binding does not accept the array,
+    we fall back to passing data.tolist().
+
+    Arguments:
+        primvar (RtPrimVarList) - the primvar list to set
+        setter_name (str) - name of the setter method, ex: 'SetPointDetail'
+        param_name (str) - name of the primvar
+        data (numpy.ndarray) - the primvar data
+        args (list) - any remaining arguments to the setter, ex: detail, time sample
+    '''
+
+    setter = getattr(primvar, setter_name)
+    if setter_name not in __LIST_ONLY_SETTERS__:
+        try:
+            setter(param_name, np.ascontiguousarray(data), *args)
+            return
+        except (TypeError, ValueError):
+            __LIST_ONLY_SETTERS__.add(setter_name)
+
+    setter(param_name, data.tolist(), *args)
+
+class RmanSgNodeDict(dict):
+    '''A dictionary of RmanSgNode(s), keyed by their Blender ID, that also
+    maintains a reverse index of db_name to keys. This allows us to find
+    a node by its db_name, ex: when we need to rebind invalidated ID references
+    after an undo/redo, without searching the whole dictionary.
+
+    Several keys can map to the same db_name (ex: particle settings, or shared
+    geometry). In that case, find_by_db_name() falls back to searching the 
+    dictionary, so it returns the same node a full search would.
+
+    If the db_name of a node changes after it has been added, call reindex()
+    so it can be found by its new name.
+    '''
+
+    def __init__(self):
+        super().__init__()
+        # db_name -> keys, in the order they were added
+        self.__db_names = dict()
+
+    def __setitem__(self, key, rman_sg_node):
+        if key in self:
+            self.__unindex(key, self[key])
+        super().__setitem__(key, rman_sg_node)
+        self.__index(key, rman_sg_node)
+
+    def __delitem__(self, key):
+        rman_sg_node = self[key]
+        super().__delitem__(key)
+        self.__unindex(key, rman_sg_node)
+
+    def pop(self, key, *args):
+        if key in self:
+            rman_sg_node = super().pop(key)
+            self.__unindex(key, rman_sg_node)
+            return rman_sg_node
+        return super().pop(key, *args)
+
+    def clear(self):
+        super().clear()
+        self.__db_names.clear()
+
+    def __index(self, key, rman_sg_node):
+        if not rman_sg_node:
+            return
+        self.__db_names.setdefault(rman_sg_node.db_name, dict())[key] = None
+
+    def __unindex(self, key, rman_sg_node):
+        if not rman_sg_node:
+            return
+        keys = self.__db_names.get(rman_sg_node.db_name, None)
+        if keys is None:
+            return
+        keys.pop(key, None)
+        if not keys:
+            del self.__db_names[rman_sg_node.db_name]
+
+    def reindex(self, key):
+        '''Update the reverse index for the node stored at key. 
+
+        Arguments:
+            key (bpy.types.ID) - the key of the node whose db_name changed
+        '''
+        self.__index(key, self.get(key, None))
+
+    def find_by_db_name(self, db_name):
+        '''Find a node by its db_name
+
+        Arguments:
+            db_name (str) - the db_name to look for
+
+        Returns:
+            (tuple) - the key and the RmanSgNode, or (None, None) if no node
+                      has this db_name
+        '''
+        keys = self.__db_names.get(db_name, None)
+        if not keys:
+            return (None, None)
+
+        # drop stale entries, left behind by nodes whose db_name changed
+        for key in list(keys):
+            rman_sg_node = self.get(key, None)
+            if not rman_sg_node or rman_sg_node.db_name != db_name:
+                del keys[key]
+        if not keys:
+            del self.__db_names[db_name]
+            return (None, None)
+
+        if len(keys) == 1:
+            key = next(iter(keys))
+            return (key, self[key])
+
+        # several nodes share this db_name. Search the dictionary, so we
+        # pick the first one that was added, like a full search would
+        for key, rman_sg_node in self.items():
+            if rman_sg_node and rman_sg_node.db_name == db_name:
+                return (key, rman_sg_node)
+        return (None, None)
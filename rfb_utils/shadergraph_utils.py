@@ -297,32 +297,45 @@ def find_node_input(node, name):
 
 # walk the tree for nodes to export
 def gather_nodes(node):
+    '''Return the nodes feeding into node, and node itself, in the order
+    they need to be exported, ie: every node comes after the nodes connected
+    to its inputs. Float <-> color conversions are returned as
+    (shader, from_node, from_socket) tuples.
+
+    Arguments:
+        node (bpy.types.Node) - the node to start from
+
+    Returns:
+        (list) - the nodes to export
+    '''
     nodes = []
+    _gather_nodes(node, nodes, set())
+    return nodes
+
+def _gather_nodes(node, nodes, visited):
     for socket in node.inputs:
         if socket.is_linked:
             link = socket.links[0]
-            for sub_node in gather_nodes(socket.links[0].from_node):
-                if sub_node not in nodes:
-                    nodes.append(sub_node)
+            if link.from_node not in visited:
+                visited.add(link.from_node)
+                _gather_nodes(link.from_node, nodes, visited)
 
             # if this is a float -> color inset a tofloat3
+            convert_node = None
             if is_socket_float_type(link.from_socket) and is_socket_float3_type(socket):
                 convert_node = ('PxrToFloat3', link.from_node,
                                 link.from_socket)
-                if convert_node not in nodes:
-                    nodes.append(convert_node)
             elif is_socket_float3_type(link.from_socket) and is_socket_float_type(socket):
                 convert_node = ('PxrToFloat', link.from_node, link.from_socket)
-                if convert_node not in nodes:
-                    nodes.append(convert_node)
+            if convert_node and convert_node not in visited:
+                visited.add(convert_node)
+                nodes.append(convert_node)
 
     if hasattr(node, 'renderman_node_type') and node.renderman_node_type != 'output':
         nodes.append(node)
     elif not hasattr(node, 'renderman_node_type') and node.bl_idname not in ['ShaderNodeOutputMaterial', 'NodeGroupInput', 'NodeGroupOutput']:
         nodes.append(node)
 
-    return nodes    
-
 def get_rerouted_node(node):
     '''Find and return the rerouted node and socket, given
     a NodeReroute node
@@ -50,6 +50,79 @@ PARSING_EXPR = re.compile(r'<([\w\:]*[\w\.]+)(\?[\w\d\._-]+)*'  # token
                           r'(:[^>]+)*>|'                        # formatter
                           r'\$\{?([A-Z0-9_]{3,})\}?')           # env var
 
+# expressions that have already been parsed by compile_expr()
+__COMPILED_EXPRS__ = dict()
+
+# max. number of expanded strings a StringExpression remembers
+__MAX_EXPAND_CACHE_SIZE__ = 4096
+
+
+def compile_expr(expr):
+    """Parse expr into a list of (literal, kind, name, fmt) tuples, where kind
+    is 'token' or 'env', followed by the trailing literal. Expressions are 
+    only parsed once per session.
+    """
+    compiled = __COMPILED_EXPRS__.get(expr, None)
+    if compiled is not None:
+        return compiled
+
+    parts = []
+    pos = 0
+    for m in re.finditer(PARSING_EXPR, expr):
+        if m.group(1):
+            # Token case
+            parts.append((expr[pos:m.start()], 'token', m.group(1), m.group(3)))
+        else:
+            # Environment variable case
+            parts.append((expr[pos:m.start()], 'env', m.group(4), m.group(0)))
+        pos = m.end()
+    # If no match (despite the presence of a < or $), the trailing literal 
+    # is the original expression.
+    compiled = (parts, expr[pos:])
+    __COMPILED_EXPRS__[expr] = compiled
+    return compiled
+
+
+class TokenDict(dict):
+    """A dict of token values that counts its modifications, so that expanded
+    strings can be cached until a token actually changes value.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(TokenDict, self).__init__(*args, **kwargs)
+        self.version = 0
+
+    def __setitem__(self, key, value):
+        if key in self and dict.__getitem__(self, key) == value:
+            return
+        super(TokenDict, self).__setitem__(key, value)
+        self.version += 1
+
+    def __delitem__(self, key):
+        super(TokenDict, self).__delitem__(key)
+        self.version += 1
+
+    def update(self, *args, **kwargs):
+        for k, v in dict(*args, **kwargs).items():
+            self[k] = v
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *args):
+        self.version += 1
+        return super(TokenDict, self).pop(key, *args)
+
+    def popitem(self):
+        self.version += 1
+        return super(TokenDict, self).popitem()
+
+    def clear(self):
+        self.version += 1
+        super(TokenDict, self).clear()
+
 
 class StringExpression(object):
 
@@ -58,7 +131,10 @@ class StringExpression(object):
         self.bl_scene = bpy.context.scene
         if bl_scene:
             self.bl_scene = bl_scene
-        self.tokens = {}
+        self.tokens = TokenDict()
+        self._out_token_key = None
+        self._expand_cache = dict()
+        self._expand_cache_version = -1
         self.update_temp_token()
         self.update_out_token()
         #self.update_blend_tokens()  
@@ -95,6 +171,11 @@ class StringExpression(object):
     def update_out_token(self):
         if 'blend' not in self.tokens:
             self.update_blend_tokens()
+        # nothing to do if the scene, its output path, the blend file and the 
+        # tokens the output path may refer to haven't changed
+        out_token_key = self._get_out_token_key()
+        if out_token_key == self._out_token_key:
+            return
         dflt_path = self.expand('<TEMP>/renderman_for_blender/<blend>')
         if not self.bl_scene:
             self.tokens['OUT'] = dflt_path
@@ -103,12 +184,9 @@ class StringExpression(object):
             if not os.path.isabs(root_path):
                 rfb_log().debug("Root path: %s is not absolute. Using default." % root_path)            
                 root_path = dflt_path
-            elif not os.path.exists(root_path):
-                try:
-                    os.makedirs(root_path, exist_ok=True)
-                except PermissionError:
-                    rfb_log().debug("Cannot create root path: %s. Using default." % root_path)            
-                    root_path = dflt_path
+            elif not filepath_utils.create_dirs(root_path):
+                rfb_log().debug("Cannot create root path: %s. Using default." % root_path)            
+                root_path = dflt_path
             self.tokens['OUT'] = root_path    
             
         unsaved = True if not bpy.data.filepath else False
@@ -117,6 +195,28 @@ class StringExpression(object):
         else:
             self.tokens['blend_dir'] = os.path.split(bpy.data.filepath)[0]     
 
+        self._out_token_key = self._get_out_token_key()
+
+    def _get_out_token_key(self):
+        # only the tokens and environment variables the output paths refer to 
+        # matter, so that frame changes and unrelated tokens don't force OUT 
+        # to be expanded again.
+        exprs = ['<TEMP>/renderman_for_blender/<blend>']
+        if self.bl_scene:
+            exprs.append(self.bl_scene.renderman.root_path_output)
+        values = []
+        for expr in exprs:
+            parts, tail = compile_expr(expr)
+            for literal, kind, tok, fmt in parts:
+                if kind == 'token':
+                    values.append((tok, self.tokens.get(tok, None)))
+                else:
+                    values.append((tok, os.environ.get(tok, None)))
+        if not self.bl_scene:
+            return (None, None, bpy.data.filepath, tuple(values))
+        return (self.bl_scene.name_full, self.bl_scene.renderman.root_path_output, 
+                bpy.data.filepath, tuple(values))
+
     def update_blend_tokens(self):
         scene = self.bl_scene
         rm = scene.renderman        
@@ -158,6 +258,20 @@ class StringExpression(object):
         self.tokens['F4'] = '{:0>4d}'.format(iframe)
         self.tokens['F5'] = '{:0>5d}'.format(iframe)
 
+    def _get_token_value(self, tok, objTokens):
+        if tok in objTokens:
+            return objTokens[tok]
+        if tok in self.tokens:
+            return self.tokens[tok]
+        # forced lower-case version if first attempts failed.
+        tok_lower = tok.lower()
+        if tok_lower in objTokens:
+            return objTokens[tok_lower]
+        if tok_lower in self.tokens:
+            return self.tokens[tok_lower]
+        # the token REALLY doesn't exist...
+        return '<%s>' % tok
+
     # @time_this
     def expand(self, expr, objTokens={}, asFilePath=False):
         """handle the '<token>' format"""
@@ -166,58 +280,48 @@ class StringExpression(object):
         if '<' not in expr and '$' not in expr:
             return expr
 
-        toks = dict(self.tokens)
-        toks.update(objTokens)
-        # print toks
-        pos = 0
-        result = ''
-        for m in re.finditer(PARSING_EXPR, expr):
-            # print 'GROUPS: %s' % str(m.groups())
-            if m.group(1):
-                # Token case
-                tok = m.group(1)
-                tok_val = None
-                # print '  |__ TOKEN: %02d-%02d: %s' % (m.start(), m.end(), tok)
-                try:
-                    tok_val = toks[tok]
-                    # result += expr[pos:m.start()] + toks[tok]
-                except KeyError:
-                    try:
-                        # forced lower-case version if first attempts failed.
-                        tok_val = toks[tok.lower()]
-                    except KeyError:
-                        # the token REALLY doesn't exist...
-                        tok_val = '<%s>' % tok
+        # expansions only depend on the tokens, unless there are object 
+        # tokens or environment variables involved
+        cacheable = not objTokens
+        if cacheable:
+            if self._expand_cache_version != self.tokens.version or \
+                    len(self._expand_cache) > __MAX_EXPAND_CACHE_SIZE__:
+                self._expand_cache.clear()
+                self._expand_cache_version = self.tokens.version
+            result = self._expand_cache.get((expr, asFilePath), None)
+            if result is not None:
+                return result
+
+        parts, tail = compile_expr(expr)
+        result = []
+        for literal, kind, tok, fmt in parts:
+            result.append(literal)
+            if kind == 'token':
+                tok_val = self._get_token_value(tok, objTokens)
 
                 # optional formating
-                if m.group(3):
-                    if isinstance(tok_val, basestring) and tok_val:
+                if fmt:
+                    if isinstance(tok_val, str) and tok_val:
                         try:
                             tok_val = eval(tok_val)
                         except (NameError, SyntaxError, TypeError) as err:
                             rfb_log().debug('Eval failed: %s  -> %r', err, tok_val)
-                            result += expr[pos:m.start()] +  tok_val
+                            result.append(tok_val)
                         else:
-                            result += expr[pos:m.start()] +  m.group(3)[1:] % tok_val
+                            result.append(fmt[1:] % tok_val)
                     else:
-                        result += expr[pos:m.start()] +  m.group(3)[1:] % tok_val
+                        result.append(fmt[1:] % tok_val)
                 else:
-                    result += '%s%s' % (expr[pos:m.start()], tok_val)
+                    result.append('%s' % tok_val)
             else:
-                # Environment variable case
-                tok = m.group(4)
-                # print '  |__ ENV VAR: %02d-%02d: %s' % (m.start(), m.end(), tok)
+                cacheable = False
                 try:
-                    result += expr[pos: m.start()] + os.environ[tok]
+                    result.append(os.environ[tok])
                 except KeyError:
-                    result += expr[pos: m.start()] + m.group(0)
+                    result.append(fmt)
+        result.append(tail)
+        result = ''.join(result)
 
-            pos = m.end()
-        # append the end of the string. If no match (despite the presence of
-        # a < or $), sets result to the original expression.
-        result += expr[pos:]
-
-        
         if asFilePath:
             # If this is meant to be a file path, substitute : with _
             # Can not have ':' after the drive descriptor on windows. Allow
@@ -229,11 +333,11 @@ class StringExpression(object):
             result = filepath_utils.get_real_path(result)
 
             dirname = os.path.dirname(result)
-            if not os.path.exists(dirname):
-                try:
-                    os.makedirs(dirname, exist_ok=True)
-                except PermissionError:
-                    rfb_log().error("Cannot create path: %s" % dirname)
+            if not filepath_utils.create_dirs(dirname):
+                rfb_log().error("Cannot create path: %s" % dirname)
+
+        if cacheable:
+            self._expand_cache[(expr, asFilePath)] = result
     
         return result
 
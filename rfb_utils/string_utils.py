@@ -130,11 +130,8 @@ def expand_string(string, display=None, glob_sequence=False, frame=None, token_d
         if string and asFilePath and os.path.isabs(string):
             string = filepath_utils.get_real_path(string)
             dirname = os.path.dirname(string)
-            if not os.path.exists(dirname):
-                try:
-                    os.makedirs(dirname, exist_ok=True)
-                except PermissionError:
-                    rfb_log().error("Cannot create path: %s" % dirname)                    
+            if not filepath_utils.create_dirs(dirname):
+                rfb_log().error("Cannot create path: %s" % dirname)                    
         return string
 
     if __SCENE_STRING_CONVERTER__ is None:
@@ -16,9 +16,22 @@ import glob
 import subprocess
 import bpy
 import uuid
+import time
+import shutil
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
 
 __RFB_TXMANAGER__ = None
 
+# txfile states that mean txmake has not finished with the texture yet
+__TXMAKE_PENDING_STATES__ = (txmanager.STATE_IN_QUEUE, txmanager.STATE_PROCESSING, txmanager.STATE_REPROCESS)
+
+# txmake settings that change the converted texture, and so are part of 
+# the name of the texture in the shared cache
+__TXMAKE_CACHE_SETTINGS__ = ['texture_type', 's_mode', 't_mode', 'texture_format',
+                             'data_type', 'resize', 'ocioconvert', 'bumprough']
+
 class RfBTxManager(object):
 
     def __init__(self):        
@@ -30,6 +43,8 @@ class RfBTxManager(object):
                                         texture_extensions=self.get_ext_list(),
                                         color_manager=color_manager())
         self.rman_scene = None
+        self.referenced_ids = set()
+        self.content_hashes = dict()
 
     @property
     def rman_scene(self):
@@ -62,6 +77,7 @@ class RfBTxManager(object):
         return outpath
 
     def done_callback(self, nodeID, txfile):
+        self.store_in_cache(txfile)
         def tex_done():
             try:
                 # try and refresh the texture manager UI
@@ -106,14 +122,158 @@ class RfBTxManager(object):
         if not txfile:
             return ''
 
+        self.referenced_ids.add(nodeID)
         return self.get_output_tex(txfile)
             
     def get_txfile_from_path(self, filepath):
         return self.txmanager.get_txfile_from_path(filepath)                
 
+    def get_cache_dir(self):
+        cache_dir = get_pref('rman_txmanager_cache_dir', '')
+        if not cache_dir:
+            return ''
+        return string_utils.expand_string(cache_dir, asFilePath=True)
+
+    def get_content_hash(self, file_path):
+        '''
+        Hash the contents of file_path. Hashes are remembered per path, 
+        modification time and size so unchanged images are only read once.
+        '''
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        key = (file_path, st.st_mtime, st.st_size)
+        content_hash = self.content_hashes.get(key, None)
+        if content_hash is None:
+            h = hashlib.sha1()
+            with open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    h.update(chunk)
+            content_hash = h.hexdigest()
+            self.content_hashes[key] = content_hash
+        return content_hash
+
+    def get_cache_path(self, txfile, cache_dir, input_image):
+        '''
+        Get the path in the shared cache for the converted version of txfile.
+        The name is derived from the contents of the input image and the 
+        txmake parameters. Returns an empty string if the texture cannot 
+        be cached.
+        '''
+        if '<' in input_image:
+            # udim and other tokenized inputs produce multiple outputs
+            return ''
+        content_hash = self.get_content_hash(input_image)
+        if not content_hash:
+            return ''
+        params = txfile.params
+        settings = dict()
+        for nm in __TXMAKE_CACHE_SETTINGS__:
+            settings[nm] = getattr(params, nm, None)
+        try:
+            settings = json.dumps(settings, sort_keys=True)
+        except TypeError as e:
+            rfb_log().warning("Not caching %s, its txmake settings cannot be hashed: %s" % (txfile.input_image, str(e)))
+            return ''
+        h = hashlib.sha1(content_hash.encode())
+        h.update(settings.encode())
+        ext = os.path.splitext(txfile.get_output_texture())[1]
+        return os.path.join(cache_dir, h.hexdigest() + ext)
+
+    def fetch_from_cache(self, txfile, cache_dir, input_image, output_tex):
+        '''
+        Copy the converted texture from the shared cache, if one exists.
+        Returns True if txfile no longer needs to be converted.
+        '''
+        try:
+            cache_path = self.get_cache_path(txfile, cache_dir, input_image)
+            if not cache_path or not os.path.exists(cache_path):
+                return False
+            os.makedirs(os.path.dirname(output_tex), exist_ok=True)
+            shutil.copy2(cache_path, output_tex)
+        except OSError as e:
+            rfb_log().debug("Could not fetch %s from texture cache: %s" % (txfile.input_image, str(e)))
+            return False
+        txfile.state = txmanager.STATE_EXISTS
+        return True
+
+    def store_in_cache(self, txfile):
+        '''
+        Copy a newly converted texture into the shared cache.
+        '''
+        if txfile.state != txmanager.STATE_EXISTS:
+            return
+        cache_dir = self.get_cache_dir()
+        if not cache_dir:
+            return
+        try:
+            input_image = string_utils.expand_string(txfile.input_image, asFilePath=True)
+            cache_path = self.get_cache_path(txfile, cache_dir, input_image)
+            if not cache_path or os.path.exists(cache_path):
+                return
+            output_tex = self.host_token_resolver_func(txfile.get_output_texture())
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            # copy to a temporary name first so other machines sharing the
+            # cache never see a partially written file
+            tmp_path = '%s.%s.tmp' % (cache_path, uuid.uuid4().hex)
+            shutil.copy2(output_tex, tmp_path)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            rfb_log().debug("Could not store %s in texture cache: %s" % (txfile.input_image, str(e)))
+
+    def fetch_all_from_cache(self):
+        cache_dir = self.get_cache_dir()
+        if not cache_dir:
+            return
+        txfiles = list()
+        input_images = list()
+        output_texs = list()
+        for item in bpy.context.scene.rman_txmgr_list:
+            txfile = self.txmanager.get_txfile_from_id(item.nodeID)
+            if not txfile or txfile.state != txmanager.STATE_MISSING:
+                continue
+            txfiles.append(txfile)
+            input_images.append(string_utils.expand_string(txfile.input_image, asFilePath=True))
+            output_texs.append(self.host_token_resolver_func(txfile.get_output_texture()))
+        if not txfiles:
+            return
+        # hashing and copying is I/O bound, so threads are enough here;
+        # the conversions themselves are separate txmake processes
+        cache_dirs = [cache_dir] * len(txfiles)
+        with ThreadPoolExecutor(max_workers=get_pref('rman_txmanager_workers', 2)) as executor:
+            num_fetched = sum(executor.map(self.fetch_from_cache, txfiles, cache_dirs, input_images, output_texs))
+        if num_fetched:
+            rfb_log().debug("Fetched %d textures from the texture cache." % num_fetched)
+
     def txmake_all(self, blocking=True):
+        self.fetch_all_from_cache()
         self.txmanager.txmake_all(start_queue=True, blocking=blocking)   
 
+    def txmake_referenced(self, bl_scene, lights=None, bl_engine=None):
+        '''
+        Start converting all textures, but only wait for the ones that 
+        have been looked up via get_output_tex_from_id since referenced_ids
+        was last cleared, as well as any textures used by lights in bl_scene.
+        If lights is not given, bl_scene is searched for them. If bl_engine
+        is given, the user can cancel the wait.
+        '''
+        self.txmake_all(blocking=False)
+        node_ids = set(self.referenced_ids)
+        if lights is None:
+            lights = scene_utils.get_all_lights(bl_scene)
+        light_names = set(ob.name for ob in lights)
+        for item in bl_scene.rman_txmgr_list:
+            if item.nodeID.rsplit('|', 1)[-1] in light_names:
+                node_ids.add(item.nodeID)
+        txfiles = [self.txmanager.get_txfile_from_id(nodeID) for nodeID in node_ids]
+        txfiles = [txfile for txfile in txfiles if txfile]
+        while any(txfile.state in __TXMAKE_PENDING_STATES__ for txfile in txfiles):
+            if bl_engine and bl_engine.test_break():
+                rfb_log().warning("Stopped waiting for textures to be converted.")
+                break
+            time.sleep(0.1)
+
     def add_texture(self, node, ob, param_name, file_path, node_type='PxrTexture', category='pattern'):
         nodeID = generate_node_id(node, param_name, ob=ob)
 
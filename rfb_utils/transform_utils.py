@@ -1,4 +1,5 @@
 import rman
+import numpy as np
 
 def convert_matrix(m):
     v = [m[0][0], m[1][0], m[2][0], m[3][0],
@@ -8,6 +9,14 @@ def convert_matrix(m):
 
     return v    
 
+def convert_matrices(matrices):
+    '''Convert a list of Blender matrices in one go. Returns a
+    (N, 16) array, where each row is the same as convert_matrix()
+    would return for that matrix.
+    '''
+    mtxs = np.array(matrices, dtype=np.float32).reshape(-1, 4, 4)
+    return mtxs.transpose(0, 2, 1).reshape(-1, 16)
+
 def convert_matrix4x4(m):
     mtx = convert_matrix( m )
     rman_mtx = rman.Types.RtMatrix4x4( mtx[0],mtx[1],mtx[2],mtx[3],
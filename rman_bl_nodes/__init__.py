@@ -15,12 +15,14 @@ from ..rman_properties import rman_properties_world
 from ..rman_properties import rman_properties_camera
 from ..rman_constants import RFB_ARRAYS_MAX_LEN
 from ..rman_constants import CYCLES_NODE_MAP
+from ..rman_constants import RFB_ADDON_VERSION_STRING
 from nodeitems_utils import NodeCategory, NodeItem
 from collections import OrderedDict
 from bpy.props import *
 import bpy
 import os
 import sys
+import pickle
 import traceback
 import nodeitems_utils
 from operator import attrgetter
@@ -100,6 +102,8 @@ __BL_NODES_MAP__ = dict()
 __CYCLES_NODE_DESC_MAP__ = dict()
 __RMAN_NODES_ALREADY_REGISTERED__ = False
 
+__RMAN_NODE_DESC_CACHE_FILE__ = 'rfb_node_desc_cache.pickle'
+
 def get_cycles_node_desc(node):
     from ..rfb_utils.filepath import FilePath
 
@@ -587,11 +591,57 @@ class RendermanNodeItem(NodeItem):
                 layout.menu('NODE_MT_RM_DisplayFilter_Category_Menu')
 
 
+def get_node_desc_cache_path():
+    return os.path.join(bpy.utils.user_resource('CONFIG'), __RMAN_NODE_DESC_CACHE_FILE__)
+
+def load_node_desc_cache(config_hash):
+    """Load the previously parsed node descriptions. 
+
+    Args:
+        config_hash (str): hash of the config files used to override the node descriptions
+
+    Returns:
+        (dict) - file path to (mtime, size, RfbNodeDesc). Empty if there is no
+                 cache, or if the cache was written by a different version of the 
+                 addon or with different overrides.
+    """
+    cache_path = get_node_desc_cache_path()
+    if not os.path.exists(cache_path):
+        return dict()
+    try:
+        with open(cache_path, 'rb') as f:
+            cache = pickle.load(f)
+    except Exception as e:
+        rfb_log().debug("Could not read node description cache %s: %s" % (cache_path, str(e)))
+        return dict()
+    if cache.get('version', None) != RFB_ADDON_VERSION_STRING:
+        return dict()
+    if cache.get('config_hash', None) != config_hash:
+        return dict()
+    return cache.get('node_descs', dict())
+
+def save_node_desc_cache(config_hash, node_descs):
+    cache_path = get_node_desc_cache_path()
+    cache = {'version': RFB_ADDON_VERSION_STRING, 'config_hash': config_hash, 'node_descs': node_descs}
+    tmp_path = '%s.%d.tmp' % (cache_path, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        rfb_log().debug("Could not write node description cache %s: %s" % (cache_path, str(e)))
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
 def register_rman_nodes():
     global __RMAN_NODE_CATEGORIES__
 
     rfb_log().debug("Registering RenderMan Plugin Nodes:")
     path_list = envconfig().get_shader_registration_paths()
+    config_hash = rman_config.get_config_hash()
+    cached_node_descs = load_node_desc_cache(config_hash)
+    node_descs = dict()
     visited = set()
     for path in path_list:
         for root, dirnames, filenames in os.walk(path):
@@ -614,10 +664,17 @@ def register_rman_nodes():
                         is_oso = True
                         is_args = False
 
-                    node_desc = RfbNodeDesc(FilePath(root).join(FilePath(filename)))
+                    filepath = os.path.join(root, filename)
+                    st = os.stat(filepath)
+                    cached = cached_node_descs.get(filepath, None)
+                    if cached and cached[0] == st.st_mtime and cached[1] == st.st_size:
+                        node_desc = cached[2]
+                    else:
+                        node_desc = RfbNodeDesc(FilePath(root).join(FilePath(filename)))
 
-                    # apply any overrides
-                    rman_config.apply_args_overrides(filename, node_desc)
+                        # apply any overrides
+                        rman_config.apply_args_overrides(filename, node_desc)
+                    node_descs[filepath] = (st.st_mtime, st.st_size, node_desc)
 
                     __RMAN_NODES__[node_desc.node_type].append(node_desc)
                     rfb_log().debug("\t%s" % node_desc.name)
@@ -719,6 +776,9 @@ def register_rman_nodes():
                         __RMAN_NODE_CATEGORIES__['projection']['projection'][0][1].append(node_item)  
                         __RMAN_NODE_CATEGORIES__['projection']['projection'][1].append(node_desc)                             
 
+    if node_descs != cached_node_descs:
+        save_node_desc_cache(config_hash, node_descs)
+
     rfb_log().debug("Finished Registering RenderMan Plugin Nodes.")
 
 
@@ -9,8 +9,10 @@ from bpy.props import StringProperty, BoolProperty
 import json
 import os
 import types
+import hashlib
 
 __RMAN_CONFIG__ = dict()
+__RMAN_CONFIG_FILES__ = list()
 __RMAN_CHANNELS_DEF_FILE__ = 'rman_dspychan_definitions.json'
 __RFB_CONFIG_FILE__ = 'rfb.json'
 __RFB_CONFIG_DICT__ = dict()
@@ -287,6 +289,23 @@ def apply_args_overrides(name, node_desc):
                 if val is not None:
                     setattr(ndp_org, attr, val)
 
+def get_config_hash():
+    """Get a hash identifying the config files that were read in register(). 
+    The hash changes if any of those files is added, removed or modified.
+
+    Returns:
+        str: hex digest of the paths, modification times and sizes of the config files
+    """
+
+    h = hashlib.sha1()
+    for jsonfile in __RMAN_CONFIG_FILES__:
+        try:
+            st = os.stat(jsonfile)
+            h.update(('%s|%f|%d\n' % (jsonfile, st.st_mtime, st.st_size)).encode())
+        except OSError:
+            h.update(('%s\n' % jsonfile).encode())
+    return h.hexdigest()
+
 def apply_overrides(rman_config_org, rman_config_override):
     """Given two RmanConfig objects, apply the overrides from the second
     one to the first one. Only certian attributes will be overridden. See
@@ -309,6 +328,9 @@ def apply_overrides(rman_config_org, rman_config_override):
 
 def register():
 
+    # the add-on can be registered more than once per session
+    __RMAN_CONFIG_FILES__.clear()
+
     paths = [get_factory_config_path(), get_factory_overrides_config_path()]
 
     for config_path in paths:
@@ -317,6 +339,7 @@ def register():
                 continue
             jsonfile = os.path.join(config_path, f)
             rfb_log().debug("Reading factory json file: %s" % jsonfile)
+            __RMAN_CONFIG_FILES__.append(jsonfile)
             if f == __RMAN_CHANNELS_DEF_FILE__:
                 # this is our channels config file
                 configure_channels(jsonfile)
@@ -335,6 +358,7 @@ def register():
                 continue
             jsonfile = os.path.join(path, f)
             rfb_log().debug("Reading override json file: %s" % jsonfile)
+            __RMAN_CONFIG_FILES__.append(jsonfile)
             if f == __RMAN_CHANNELS_DEF_FILE__:
                 configure_channels(jsonfile)
             elif f == __RFB_CONFIG_FILE__:
@@ -1,5 +1,6 @@
 from ..rfb_utils import filepath_utils
 from ..rman_render import RmanRender
+from .. import rman_rib_workers
 import bpy
 import os
 import time
@@ -156,9 +157,18 @@ class PRMAN_OT_ExternalRender(bpy.types.Operator):
         scene = context.scene
         rm = scene.renderman
         if not rm.is_rman_interactive_running:
+            rr = RmanRender.get_rman_render()
+            if rm.external_animation and rm.rib_export_workers > 1 and scene.frame_end > scene.frame_start:
+                # the RIB export processes need a copy of the .blend file, 
+                # which has to be saved from here rather than from the render
+                rr.rib_stash_file = rman_rib_workers.write_stash_file(scene)
             scene.renderman.enable_external_rendering = True        
-            bpy.ops.render.render(layer=context.view_layer.name)
-            scene.renderman.enable_external_rendering = False
+            try:
+                bpy.ops.render.render(layer=context.view_layer.name)
+            finally:
+                scene.renderman.enable_external_rendering = False
+                rman_rib_workers.remove_stash_file(rr.rib_stash_file)
+                rr.rib_stash_file = ''
         else:
             self.report({"ERROR"}, "Viewport rendering is on.")           
 
@@ -26,6 +26,7 @@
 from . import properties
 from . import ui
 from . import operators
+from . import library_index
 
 def register():
     properties.register()
@@ -35,4 +36,5 @@ def register():
 def unregister():
     properties.unregister()
     ui.unregister()
-    operators.unregister()
\ No newline at end of file
+    operators.unregister()
+    library_index.unregister()
\ No newline at end of file
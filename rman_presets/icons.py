@@ -56,7 +56,15 @@ def get_icon(path):
         return flat_icon_thumb
     return thumb  
 
-def get_preset_icon(preset_path):
+def get_preset_icon(preset_path, thumb_path=None):
+    """Return the preview for a preset, falling back to the default
+    material icon if the preset has no thumbnail.
+
+    Args:
+    preset_path (str) - path to the preset
+    thumb_path (str) - path to the preset's thumbnail, if already known. 
+                       An empty string means the preset has no thumbnail.
+    """
     global asset_previews
     flat_icon_path = os.path.join(envconfig().rmantree, __RMAN_MAT_FLAT_PATH__)
     flat_icon_thumb = asset_previews.get(flat_icon_path, None)
@@ -66,8 +74,11 @@ def get_preset_icon(preset_path):
     
     path = preset_path
     if path not in asset_previews:
-        thumb_path = os.path.join(path, 'asset_100.png')
-        if os.path.exists(thumb_path):
+        if thumb_path is None:
+            thumb_path = os.path.join(path, 'asset_100.png')
+            if not os.path.exists(thumb_path):
+                thumb_path = ''
+        if thumb_path:
             thumb = asset_previews.load(path, thumb_path, 'IMAGE', force_reload=True)
         else:
             thumb = flat_icon_thumb
@@ -0,0 +1,311 @@
+# ##### BEGIN MIT LICENSE BLOCK #####
+#
+# Copyright (c) 2015 - 2021 Pixar
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+#
+# ##### END MIT LICENSE BLOCK #####
+
+from ..rfb_logger import rfb_log
+from ..rman_constants import RFB_ADDON_VERSION_STRING
+from . import rmanAssetsBlender as rab
+from rman_utils.rman_assets import core as ra
+
+import os
+import bpy
+import copy
+import time
+import pickle
+import threading
+
+__RMAN_PRESET_INDEX_FILE__ = 'rfb_preset_library_index.pickle'
+
+# how often, in seconds, a category that is being drawn
+# is checked for changes on disk
+__RMAN_PRESET_INDEX_CHECK_INTERVAL__ = 10.0
+
+def get_index_path():
+    return os.path.join(bpy.utils.user_resource('CONFIG'), __RMAN_PRESET_INDEX_FILE__)
+
+def _get_mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+def _read_asset(asset_path, json_path, json_mtime):
+    ass = ra.RmanAsset()
+    ass.load(json_path)
+    metadata = [(str(k), str(v)) for k,v in ass.getMetadataDict().items()]
+    thumb_path = os.path.join(asset_path, 'asset_100.png')
+    if not os.path.exists(thumb_path):
+        thumb_path = ''
+    return {'path': asset_path,
+            'json_path': json_path,
+            'json_mtime': json_mtime,
+            'label': ass.label(),
+            'author': ass.getMetadata('author'),
+            'version': str(ass.getMetadata('version')),
+            'created': ass.getMetadata('created'),
+            'metadata': metadata,
+            'thumb_path': thumb_path}
+
+class RmanPresetLibraryIndex(object):
+    """An index of the assets in the preset libraries, so menus and the preset
+    browser don't have to read every asset.json file when they are drawn.
+
+    For each category, the index holds the category directory's modification time
+    and, for each asset, its label, metadata and thumbnail path. Categories are re-read
+    in a background thread when their directory changed, or after invalidate() is called.
+    Only the assets whose asset.json changed are loaded again. The index is saved to the
+    user's config directory, so it survives restarts.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__libraries = dict()
+        self.__last_checked = dict()
+        self.__pending = set()
+        self.__thread = None
+        self.__loaded = False
+        self.__needs_redraw = False
+        self.__stop = threading.Event()
+
+    def _load(self):
+        self.__loaded = True
+        index_path = get_index_path()
+        if not os.path.exists(index_path):
+            return
+        try:
+            with open(index_path, 'rb') as f:
+                index = pickle.load(f)
+        except Exception as e:
+            rfb_log().debug("Could not read preset library index %s: %s" % (index_path, str(e)))
+            return
+        if index.get('version', None) != RFB_ADDON_VERSION_STRING:
+            return
+        self.__libraries = index.get('libraries', dict())
+
+    def _save(self):
+        index_path = get_index_path()
+        with self.__lock:
+            # the main thread can replace categories while we're pickling,
+            # so pickle a copy
+            index = {'version': RFB_ADDON_VERSION_STRING, 'libraries': copy.deepcopy(self.__libraries)}
+        tmp_path = '%s.%d.tmp' % (index_path, os.getpid())
+        try:
+            os.makedirs(os.path.dirname(index_path), exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, index_path)
+        except Exception as e:
+            rfb_log().debug("Could not write preset library index %s: %s" % (index_path, str(e)))
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _get_categories(self, library_path):
+        if not self.__loaded:
+            self._load()
+        return self.__libraries.setdefault(library_path, dict())
+
+    def get_assets(self, category_path):
+        """Return the index entries for the assets in a category. This only reads
+        from memory. Categories that have not been indexed yet, or that have not been
+        checked recently, are queued for a background refresh, and the UI is redrawn
+        when the refresh is done.
+
+        Args:
+        category_path (str) - full path to the category
+
+        Returns:
+        (list) - list of dicts, with the asset's path, json_path, label, author, version, created,
+                 metadata (list of key, value pairs) and thumb_path ('' if the asset has no thumbnail)
+        """
+
+        library_path = rab.get_host_prefs().getSelectedLibrary()
+        with self.__lock:
+            category = self._get_categories(library_path).get(category_path, None)
+        last_checked = self.__last_checked.get(category_path, 0.0)
+        if time.time() - last_checked > __RMAN_PRESET_INDEX_CHECK_INTERVAL__:
+            self.__last_checked[category_path] = time.time()
+            self.refresh(library_path, [category_path])
+        if category is None:
+            return list()
+        return category['assets']
+
+    def update_category(self, category_path):
+        """Bring a category up to date, without waiting for the background thread.
+        Used when the assets are needed right away, like when the preset browser
+        is opened on a category that has not been indexed yet.
+
+        Args:
+        category_path (str) - full path to the category
+
+        Returns:
+        (list) - the category's assets, see get_assets()
+        """
+
+        library_path = rab.get_host_prefs().getSelectedLibrary()
+        if self._update_category(library_path, category_path):
+            self._save()
+        self.__last_checked[category_path] = time.time()
+        with self.__lock:
+            category = self._get_categories(library_path).get(category_path, None)
+        if category is None:
+            return list()
+        return category['assets']
+
+    def invalidate(self, category_path):
+        """Force a category to be re-read on its next refresh, even if its
+        directory did not change. Only the assets whose asset.json changed are
+        loaded again.
+
+        Args:
+        category_path (str) - full path to the category
+        """
+
+        library_path = rab.get_host_prefs().getSelectedLibrary()
+        with self.__lock:
+            category = self._get_categories(library_path).get(category_path, None)
+            if category is not None:
+                category['mtime'] = None
+        self.__last_checked.pop(category_path, None)
+
+    def refresh(self, library_path, category_paths):
+        """Check categories for changes in a background thread
+
+        Args:
+        library_path (str) - path to the library the categories belong to
+        category_paths (list) - full paths to the categories to check
+        """
+
+        if self.__stop.is_set():
+            return
+        with self.__lock:
+            self.__pending.update([(library_path, c) for c in category_paths])
+            if self.__thread and self.__thread.is_alive():
+                return
+            self.__thread = threading.Thread(target=self._refresh_thread)
+            self.__thread.daemon = True
+            self.__thread.start()
+        if not bpy.app.timers.is_registered(_redraw_when_done):
+            bpy.app.timers.register(_redraw_when_done, first_interval=0.5)
+
+    def _refresh_thread(self):
+        changed = False
+        while True:
+            with self.__lock:
+                if not self.__pending or self.__stop.is_set():
+                    # clear the thread while holding the lock, so refresh()
+                    # starts a new one for anything queued after this
+                    self.__thread = None
+                    break
+                library_path, category_path = self.__pending.pop()
+            try:
+                changed = self._update_category(library_path, category_path) or changed
+            except Exception as e:
+                rfb_log().debug("Could not index preset category %s: %s" % (category_path, str(e)))
+        if changed and not self.__stop.is_set():
+            self._save()
+            self.__needs_redraw = True
+
+    def shutdown(self):
+        """Stop the background thread and the redraw timer. Called when the add-on
+        is unregistered.
+        """
+        self.__stop.set()
+        with self.__lock:
+            self.__pending.clear()
+            thread = self.__thread
+        if thread:
+            thread.join(timeout=2.0)
+        if bpy.app.timers.is_registered(_redraw_when_done):
+            bpy.app.timers.unregister(_redraw_when_done)
+
+    def redraw_when_done(self):
+        with self.__lock:
+            running = self.__thread is not None
+        if self.__needs_redraw:
+            self.__needs_redraw = False
+            for window in bpy.context.window_manager.windows:
+                for area in window.screen.areas:
+                    area.tag_redraw()
+        if running:
+            return 0.5
+        return None
+
+    def _update_category(self, library_path, category_path):
+        """Re-read a category if it changed on disk
+
+        Returns:
+        (bool) - True if the category was changed in the index
+        """
+
+        mtime = _get_mtime(category_path)
+        with self.__lock:
+            categories = self._get_categories(library_path)
+            category = categories.get(category_path, None)
+        if mtime is None:
+            if category is None:
+                return False
+            with self.__lock:
+                categories.pop(category_path, None)
+            return True
+        if category is not None and category['mtime'] == mtime:
+            return False
+
+        old_assets = dict()
+        if category is not None:
+            old_assets = dict([(a['path'], a) for a in category['assets']])
+
+        assets = []
+        for asset in rab.get_host_prefs().getAssetList(category_path):
+            if self.__stop.is_set():
+                return False
+            asset_path = os.path.join(library_path, asset)
+            json_path = os.path.join(asset_path, 'asset.json')
+            json_mtime = _get_mtime(json_path)
+            if json_mtime is None:
+                continue
+            entry = old_assets.get(asset_path, None)
+            if entry is None or entry['json_mtime'] != json_mtime:
+                entry = _read_asset(asset_path, json_path, json_mtime)
+            assets.append(entry)
+
+        with self.__lock:
+            categories[category_path] = {'mtime': mtime, 'assets': assets}
+        return True
+
+__RMAN_PRESET_LIBRARY_INDEX__ = None
+
+def _redraw_when_done():
+    return get_library_index().redraw_when_done()
+
+def get_library_index():
+    global __RMAN_PRESET_LIBRARY_INDEX__
+    if not __RMAN_PRESET_LIBRARY_INDEX__:
+        __RMAN_PRESET_LIBRARY_INDEX__ = RmanPresetLibraryIndex()
+    return __RMAN_PRESET_LIBRARY_INDEX__
+
+def unregister():
+    global __RMAN_PRESET_LIBRARY_INDEX__
+    if __RMAN_PRESET_LIBRARY_INDEX__:
+        __RMAN_PRESET_LIBRARY_INDEX__.shutdown()
+        __RMAN_PRESET_LIBRARY_INDEX__ = None
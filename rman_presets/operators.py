@@ -32,6 +32,7 @@ import os
 import bpy
 from bpy.props import StringProperty, EnumProperty, BoolProperty, CollectionProperty, IntProperty
 from . import rmanAssetsBlender as rab
+from . import library_index
 from .properties import RendermanPresetMetaData
 from rman_utils.rman_assets import lib as ral
 from rman_utils.filepath import FilePath
@@ -202,6 +203,8 @@ class PRMAN_OT_save_asset_to_lib(bpy.types.Operator):
                 infodict[md.key] = md.value
             category = hostPrefs.getSelectedCategory()   
             hostPrefs.exportMaterial(category, infodict, None)
+            # presets saved over an existing one don't change the category's mtime
+            library_index.get_library_index().invalidate(category)
 
 
         if self.op:
@@ -279,6 +282,8 @@ class PRMAN_OT_save_lightrig_to_lib(bpy.types.Operator):
                 infodict[md.key] = md.value                        
             category = hostPrefs.getSelectedCategory()   
             hostPrefs.exportMaterial(category, infodict, None)        
+            # presets saved over an existing one don't change the category's mtime
+            library_index.get_library_index().invalidate(category)
         if self.op:
             self.op.preset_categories_index = 0 
         return {'FINISHED'}
@@ -364,6 +369,8 @@ class PRMAN_OT_save_envmap_to_lib(bpy.types.Operator):
                 infodict[md.key] = md.value                        
             category = hostPrefs.getSelectedCategory()   
             hostPrefs.exportEnvMap(category, infodict)
+            # presets saved over an existing one don't change the category's mtime
+            library_index.get_library_index().invalidate(category)
 
         if self.op:
             self.op.preset_categories_index = 0 
@@ -38,12 +38,22 @@ from bpy.props import *
 # for previews of assets
 from . import icons
 from . import rmanAssetsBlender as rab
-from rman_utils.rman_assets import core as ra
+from . import library_index
 
 from bpy.props import StringProperty, IntProperty
 import os
 
 
+def get_preset_description(asset):
+    """Return the tooltip for a preset, from its library index entry"""
+    preset_description = '%s\n' % asset['label']
+    preset_description += '\nAuthor: %s' % asset['author']
+    preset_description += '\nVersion: %s' % asset['version']
+    preset_description += '\nVersion: %s' % asset['created']
+    for k,v in asset['metadata']:
+        preset_description += '\n%s: %s' % (k, v)
+    return preset_description
+
 # panel for the toolbar of node editor
 class PRMAN_PT_Renderman_Presets_UI_Panel(bpy.types.Panel):
     bl_idname = "PRMAN_PT_renderman_presets_ui_panel"
@@ -151,20 +161,11 @@ class VIEW3D_MT_renderman_presets_object_context_menu(bpy.types.Menu):
         category_name = current_category_path.split('/')[-1]
         layout.label(text=category_name)
         if asset_type == 'Materials':
-            for asset in hostPrefs.getAssetList(current_category_path):
-                ass = ra.RmanAsset()
-                path = os.path.join(lib_path, asset)
-                json_path = os.path.join(path, 'asset.json')
-                ass.load(json_path)
-                label = ass.label()       
-                thumb = icons.get_preset_icon(path)
-                metadict = ass.getMetadataDict()
-                preset_description = '%s\n' % label
-                preset_description += '\nAuthor: %s' %  ass.getMetadata('author')
-                preset_description += '\nVersion: %s' % str(ass.getMetadata('version'))
-                preset_description += '\nVersion: %s' % ass.getMetadata('created')              
-                for k,v in metadict.items():
-                    preset_description += '\n%s: %s' % (str(k), str(v))
+            for asset in library_index.get_library_index().get_assets(current_category_path):
+                json_path = asset['json_path']
+                label = asset['label']
+                thumb = icons.get_preset_icon(asset['path'], thumb_path=asset['thumb_path'])
+                preset_description = get_preset_description(asset)
 
                 if selected_objects:
                     assign = layout.operator("renderman.load_asset_to_scene", text=label, icon_value=thumb.icon_id)
@@ -176,20 +177,11 @@ class VIEW3D_MT_renderman_presets_object_context_menu(bpy.types.Menu):
                     op.preset_path = json_path
                     op.preset_description = preset_description
         else: 
-            for asset in hostPrefs.getAssetList(current_category_path):
-                ass = ra.RmanAsset()
-                path = os.path.join(lib_path, asset)
-                json_path = os.path.join(path, 'asset.json')
-                ass.load(json_path)
-                label = ass.label()       
-                thumb = icons.get_preset_icon(path)  
-                metadict = ass.getMetadataDict()
-                preset_description = '%s\n' % label
-                preset_description += '\nAuthor: %s' %  ass.getMetadata('author')
-                preset_description += '\nVersion: %s' % str(ass.getMetadata('version'))
-                preset_description += '\nVersion: %s' % ass.getMetadata('created')              
-                for k,v in metadict.items():
-                    preset_description += '\n%s: %s' % (str(k), str(v))                     
+            for asset in library_index.get_library_index().get_assets(current_category_path):
+                json_path = asset['json_path']
+                label = asset['label']
+                thumb = icons.get_preset_icon(asset['path'], thumb_path=asset['thumb_path'])
+                preset_description = get_preset_description(asset)
                 op = layout.operator("renderman.load_asset_to_scene", text=label, icon_value=thumb.icon_id)
                 op.preset_path = json_path  
                 op.preset_description = preset_description
@@ -207,9 +199,7 @@ class PRMAN_MT_renderman_preset_ops_menu(bpy.types.Menu):
         layout = self.layout
         hostPrefs = rab.get_host_prefs()
         current_preset = hostPrefs.getSelectedPreset()
-        ass = ra.RmanAsset()
         json_path = os.path.join(current_preset, 'asset.json')
-        ass.load(json_path)  
         rel_path = os.path.relpath(hostPrefs.getSelectedCategory(), hostPrefs.getSelectedLibrary())  
 
         op = getattr(context, 'op_ptr')
@@ -261,24 +251,22 @@ class PRMAN_OT_Renderman_Presets_Editor(bpy.types.Operator):
 
         hostPrefs.setSelectedCategory(category.path)
         hostPrefs.saveAllPrefs()
-        for asset in hostPrefs.getAssetList(category.path):
-            ass = ra.RmanAsset()
-            ass.load(os.path.join(hostPrefs.getSelectedLibrary(), asset, 'asset.json'))
-
+        # the category may have just been edited, so 
+        # make sure it's up to date before listing it
+        for asset in library_index.get_library_index().update_category(category.path):
             preset = self.presets.add()
-            preset.label = ass.label()
-            preset.name = ass.label()  
-            preset.path =  os.path.join(hostPrefs.getSelectedLibrary(), asset)     
-            preset.author = ass.getMetadata('author')
-            preset.version = str(ass.getMetadata('version'))
-            preset.created = ass.getMetadata('created')
-            metadict = ass.getMetadataDict()
-            for k,v in metadict.items():
+            preset.label = asset['label']
+            preset.name = asset['label']
+            preset.path = asset['path']
+            preset.author = asset['author']
+            preset.version = asset['version']
+            preset.created = asset['created']
+            for k,v in asset['metadata']:
                 meta = preset.preset_metadata.add()
-                meta.key = str(k)
-                meta.value = str(v)
+                meta.key = k
+                meta.value = v
 
-            thumb = icons.get_preset_icon(preset.path)
+            thumb = icons.get_preset_icon(preset.path, thumb_path=asset['thumb_path'])
             preset.icon_id = thumb.icon_id                       
 
     def update_selected_preset(self, context):
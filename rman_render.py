@@ -1,5 +1,6 @@
 import time
 import os
+import json
 import rman
 import bpy
 import sys
@@ -7,12 +8,14 @@ from .rman_constants import RFB_VIEWPORT_MAX_BUCKETS, RMAN_RENDERMAN_BLUE
 from .rman_scene import RmanScene
 from .rman_scene_sync import RmanSceneSync
 from. import rman_spool
+from. import rman_rib_workers
 from. import chatserver
 from .rfb_logger import rfb_log
 import socketserver
 import threading
 import subprocess
 import ctypes
+import numpy as np
 
 # for viewport buckets
 import gpu
@@ -259,6 +262,8 @@ class RmanRender(object):
         self.viewport_buckets = list()
         self._draw_viewport_buckets = False
         self.stats_mgr = RfBStatsManager(self)
+        self.rib_static_archive = ''
+        self.rib_stash_file = ''
 
         self._start_prman_begin()
 
@@ -488,47 +493,35 @@ class RmanRender(object):
                 width = int(render.resolution_x * image_scale)
                 height = int(render.resolution_y * image_scale)
 
+                # display index to render pass name
                 bl_image_lyrs= dict()
                 # register any AOV's as passes
                 for i, dspy_nm in enumerate(dspy_dict['displays'].keys()):
                     if i == 0:
+                        bl_image_lyrs[i] = "Combined"
                         continue     
                     self.bl_engine.add_pass(dspy_nm, 4, 'RGBA')
-
-                result = self.bl_engine.begin_result(0, 0,
-                                            width,
-                                            height,
-                                            view=render_view)
-
-                for i, dspy_nm in enumerate(dspy_dict['displays'].keys()):
-                    if i == 0:
-                        lyr = result.layers[0].passes.find_by_name("Combined", render_view)           
-                    else:
-                        lyr = result.layers[0].passes.find_by_name(dspy_nm, render_view)
-                    bl_image_lyrs[i] = lyr            
+                    bl_image_lyrs[i] = dspy_nm
                 
+                pass_buffers = dict()
+                generations = dict()
                 while not self.bl_engine.test_break() and self.rman_is_live_rendering:
                     time.sleep(0.01)
-                    for i, img in bl_image_lyrs.items():
-                        buffer = self._get_buffer(width, height, image_num=i, as_flat=False)
-                        if buffer:
-                            img.rect = buffer
-            
-                    self.bl_engine.update_result(result)        
+                    self._update_render_passes(width, height, render_view, bl_image_lyrs, pass_buffers, generations)
           
-                if result:   
-                    self.bl_engine.end_result(result) 
+                # make sure we have the final pixels
+                if self._update_render_passes(width, height, render_view, bl_image_lyrs, pass_buffers, generations, force=True):
 
                     # Try to save out the displays out to disk. This matches
                     # Cycles behavior
                     for i, dspy_nm in enumerate(dspy_dict['displays'].keys()):
                         filepath = dspy_dict['displays'][dspy_nm]['filePath']
                         buffer = self._get_buffer(width, height, image_num=i, as_flat=True)
-                        if buffer:
+                        if buffer is not None:
                             bl_image = bpy.data.images.new(dspy_nm, width, height)
                             bl_image.use_generated_float = True
                             bl_image.filepath_raw = filepath                            
-                            bl_image.pixels = buffer
+                            bl_image.pixels.foreach_set(buffer)
                             bl_image.file_format = 'OPEN_EXR'
                             bl_image.update()
                             bl_image.save()
@@ -562,24 +555,43 @@ class RmanRender(object):
 
         if rm.external_animation:
             original_frame = bl_scene.frame_current
-            rfb_log().debug("Writing to RIB...")             
-            for frame in range(bl_scene.frame_start, bl_scene.frame_end + 1):
-                bl_view_layer = depsgraph.view_layer
-                config = rman.Types.RtParamList()
-                render_config = rman.Types.RtParamList()
-
-                self.sg_scene = self.sgmngr.CreateScene(config, render_config, self.stats_mgr.rman_stats_session) 
-                self.bl_engine.frame_set(frame, subframe=0.0)
-                self.rman_is_exporting = True
-                self.rman_scene.export_for_final_render(depsgraph, self.sg_scene, bl_view_layer, is_external=True)
+            frames = list(range(bl_scene.frame_start, bl_scene.frame_end + 1))
+            static_archive = ''
+            try:
+                if rm.rib_static_archive and len(frames) > 1:
+                    static_archive = self._export_static_archive(depsgraph, frames, rib_options)
+                if rm.rib_export_workers > 1 and len(frames) > 1:
+                    rfb_log().debug("Writing to RIB using %d processes..." % rm.rib_export_workers)
+                    # the copy of the .blend file is written by the operator that 
+                    # started the render, since we can't save files from here
+                    workers = rman_rib_workers.RmanRibWorkers(self, bl_scene.original, rm.rib_export_workers, self.rib_stash_file)
+                    failed_frames = workers.export_frames(frames, ['render', bl_scene.name, depsgraph.view_layer.name, static_archive or '-'])
+                    if failed_frames is None:
+                        rfb_log().warning("Could not start RIB export processes. Exporting in this session.")
+                    else:
+                        if failed_frames and not workers.aborted:
+                            rfb_log().error("Could not write RIB for frames: %s" % ', '.join([str(f) for f in failed_frames]))
+                        frames = []
+                rfb_log().debug("Writing to RIB...")             
+                for frame in frames:
+                    bl_view_layer = depsgraph.view_layer
+                    config = rman.Types.RtParamList()
+                    render_config = rman.Types.RtParamList()
+
+                    self.sg_scene = self.sgmngr.CreateScene(config, render_config, self.stats_mgr.rman_stats_session) 
+                    self.bl_engine.frame_set(frame, subframe=0.0)
+                    self.rman_is_exporting = True
+                    self.rman_scene.export_for_final_render(depsgraph, self.sg_scene, bl_view_layer, is_external=True)
+                    self.rman_is_exporting = False
+                    rib_output = string_utils.expand_string(rm.path_rib_output, 
+                                                            frame=frame, 
+                                                            asFilePath=True)                                                                            
+                    self.sg_scene.Render("rib %s %s" % (rib_output, rib_options))
+                    self.sgmngr.DeleteScene(self.sg_scene)     
+            finally:
                 self.rman_is_exporting = False
-                rib_output = string_utils.expand_string(rm.path_rib_output, 
-                                                        frame=frame, 
-                                                        asFilePath=True)                                                                            
-                self.sg_scene.Render("rib %s %s" % (rib_output, rib_options))
-                self.sgmngr.DeleteScene(self.sg_scene)     
-
-            self.bl_engine.frame_set(original_frame, subframe=0.0)
+                self.rman_scene.set_static_archive(depsgraph, '', [])
+                self.bl_engine.frame_set(original_frame, subframe=0.0)
             
 
         else:
@@ -592,9 +604,17 @@ class RmanRender(object):
                     
             bl_view_layer = depsgraph.view_layer         
             rfb_log().info("Parsing scene...")      
-            self.rman_is_exporting = True       
-            self.rman_scene.export_for_final_render(depsgraph, self.sg_scene, bl_view_layer, is_external=True)
-            self.rman_is_exporting = False
+            try:
+                if self.rib_static_archive:
+                    # we're a RIB export process, and the static objects
+                    # were already written by the parent
+                    static_obs = self._read_static_archive_obs(self.rib_static_archive)
+                    self.rman_scene.set_static_archive(depsgraph, self.rib_static_archive, static_obs)
+                self.rman_is_exporting = True       
+                self.rman_scene.export_for_final_render(depsgraph, self.sg_scene, bl_view_layer, is_external=True)
+            finally:
+                self.rman_is_exporting = False
+                self.rman_scene.set_static_archive(depsgraph, '', [])
             rib_output = string_utils.expand_string(rm.path_rib_output, 
                                                     frame=bl_scene.frame_current, 
                                                     asFilePath=True)            
@@ -613,6 +633,66 @@ class RmanRender(object):
         self.sg_scene = None
         return True          
 
+    def _export_static_archive(self, depsgraph, frames, rib_options):
+        '''Write the objects that don't change over the animation to a single
+        RIB archive, and tell the scene exporter to reference it in each frame.
+
+        Returns:
+            (str) - the path to the archive, or an empty string if there are no
+                    static objects
+        '''
+        bl_scene = depsgraph.scene_eval
+        rm = bl_scene.renderman
+        frame = frames[0]
+        self.bl_engine.frame_set(frame, subframe=0.0)
+        static_obs = self.rman_scene.get_static_objects(depsgraph)
+        if not static_obs:
+            return ''
+
+        # make sure the depsgraph agrees the objects don't change, 
+        # by comparing them in the middle and at the end of the range
+        signatures = self.rman_scene.get_object_signatures(depsgraph, static_obs)
+        for f in sorted(set([frames[len(frames) // 2], frames[-1]])):
+            self.bl_engine.frame_set(f, subframe=0.0)
+            frame_signatures = self.rman_scene.get_object_signatures(depsgraph, static_obs)
+            static_obs = [ob for ob in static_obs if frame_signatures[ob] == signatures[ob]]
+        self.bl_engine.frame_set(frame, subframe=0.0)
+        if not static_obs:
+            return ''
+
+        rib_output = string_utils.expand_string(rm.path_rib_output, 
+                                                frame=frame, 
+                                                asFilePath=True)
+        static_archive = os.path.join(os.path.dirname(rib_output), '%s.%s.static.rib' % (bl_scene.name, depsgraph.view_layer.name))
+        rfb_log().debug("Writing %d static objects to RIB archive: %s" % (len(static_obs), static_archive))
+
+        config = rman.Types.RtParamList()
+        render_config = rman.Types.RtParamList()
+        self.sg_scene = self.sgmngr.CreateScene(config, render_config, self.stats_mgr.rman_stats_session)
+        self.rman_is_exporting = True
+        self.rman_scene.export_for_static_archive(depsgraph, self.sg_scene, depsgraph.view_layer, static_obs)
+        self.rman_is_exporting = False
+        self.sg_scene.Render("rib %s %s -archive" % (static_archive, rib_options))
+        self.sgmngr.DeleteScene(self.sg_scene)
+        self.sg_scene = None
+
+        # RIB export processes read the list of static objects back, rather 
+        # than working it out again from a single frame
+        with open(self._get_static_archive_obs_path(static_archive), 'w') as f:
+            json.dump([ob.name_full for ob in static_obs], f)
+
+        self.rman_scene.set_static_archive(depsgraph, static_archive, static_obs)
+        return static_archive
+
+    def _get_static_archive_obs_path(self, static_archive):
+        return '%s.json' % os.path.splitext(static_archive)[0]
+
+    def _read_static_archive_obs(self, static_archive):
+        with open(self._get_static_archive_obs_path(static_archive), 'r') as f:
+            names = json.load(f)
+        obs = dict([(ob.name_full, ob) for ob in bpy.data.objects])
+        return [obs[nm] for nm in names if nm in obs]
+
     def start_bake_render(self, depsgraph, for_background=False):
     
         self.bl_scene = depsgraph.scene_eval
@@ -844,14 +924,14 @@ class RmanRender(object):
             time.sleep(0.001)
             if layer:
                 buffer = self._get_buffer(width, height, image_num=0, as_flat=False)
-                if buffer:
-                    layer.rect = buffer
+                if buffer is not None:
+                    self._set_pass_pixels(layer, buffer)
                     self.bl_engine.update_result(result)
         # try to get the buffer one last time before exiting
         if layer:
             buffer = self._get_buffer(width, height, image_num=0, as_flat=False)
-            if buffer:
-                layer.rect = buffer
+            if buffer is not None:
+                self._set_pass_pixels(layer, buffer)
                 self.bl_engine.update_result(result)        
         self.stop_render()              
         self.bl_engine.end_result(result)           
@@ -864,8 +944,24 @@ class RmanRender(object):
         bl_scene = context.scene
         if export_all_frames:
             original_frame = bl_scene.frame_current
+            frames = list(range(bl_scene.frame_start, bl_scene.frame_end + 1))
+            num_workers = bl_scene.renderman.rib_export_workers
+            if num_workers > 1 and len(frames) > 1:
+                rfb_log().debug("Writing to RIB using %d processes..." % num_workers)
+                stash_file = rman_rib_workers.write_stash_file(bl_scene)
+                workers = rman_rib_workers.RmanRibWorkers(self, bl_scene, num_workers, stash_file)
+                try:
+                    failed_frames = workers.export_frames(frames, ['selected', rib_path, '1' if export_materials else '0'])
+                finally:
+                    rman_rib_workers.remove_stash_file(stash_file)
+                if failed_frames is None:
+                    rfb_log().warning("Could not start RIB export processes. Exporting in this session.")
+                else:
+                    if failed_frames:
+                        rfb_log().error("Could not write RIB for frames: %s" % ', '.join([str(f) for f in failed_frames]))
+                    frames = []
             rfb_log().debug("Writing to RIB...")             
-            for frame in range(bl_scene.frame_start, bl_scene.frame_end + 1):        
+            for frame in frames:
                 bl_scene.frame_set(frame, subframe=0.0)
                 config = rman.Types.RtParamList()
                 render_config = rman.Types.RtParamList()
@@ -966,27 +1062,22 @@ class RmanRender(object):
             # (the driver will handle pixel scaling to the given viewport size)
             dspy_plugin.DrawBufferToBlender(ctypes.c_int(width), ctypes.c_int(height))
 
-            image_num = 0
-            arXMin = ctypes.c_int(0)
-            arXMax = ctypes.c_int(0)
-            arYMin = ctypes.c_int(0)
-            arYMax = ctypes.c_int(0)            
-            dspy_plugin.GetActiveRegion(ctypes.c_size_t(image_num), ctypes.byref(arXMin), ctypes.byref(arXMax), ctypes.byref(arYMin), ctypes.byref(arYMax))
+            arXMin, arXMax, arYMin, arYMax = self._get_active_region(image_num=0)
             # draw bucket indicators
-            if self.do_draw_buckets() and ( (arXMin.value + arXMax.value + arYMin.value + arYMax.value) > 0):
-                yMin = height-1 - arYMin.value
-                yMax = height-1 - arYMax.value
-                xMin = arXMin.value
-                xMax = arXMax.value
+            if self.do_draw_buckets() and ( (arXMin + arXMax + arYMin + arYMax) > 0):
+                yMin = height-1 - arYMin
+                yMax = height-1 - arYMax
+                xMin = arXMin
+                xMax = arXMax
                 if self.rman_scene.viewport_render_res_mult != 1.0:
                     # render resolution multiplier is set, we need to re-scale the bucket markers
                     scaled_width = width * self.rman_scene.viewport_render_res_mult
-                    xMin = int(width * ((arXMin.value) / (scaled_width)))
-                    xMax = int(width * ((arXMax.value) / (scaled_width)))
+                    xMin = int(width * ((arXMin) / (scaled_width)))
+                    xMax = int(width * ((arXMax) / (scaled_width)))
 
                     scaled_height = height * self.rman_scene.viewport_render_res_mult
-                    yMin = height-1 - int(height * ((arYMin.value) / (scaled_height)))
-                    yMax = height-1 - int(height * ((arYMax.value) / (scaled_height)))
+                    yMin = height-1 - int(height * ((arYMin) / (scaled_height)))
+                    yMax = height-1 - int(height * ((arYMax) / (scaled_height)))
                    
                 vertices = []
                 c1 = (xMin, yMin)
@@ -1024,10 +1115,44 @@ class RmanRender(object):
                 shader.bind()
                 batch.draw(shader)
 
-    def _get_buffer(self, width, height, image_num=0, as_flat=True):
+    def _get_active_region(self, image_num=0):
+        '''
+        Get the region of the image the display driver is currently writing to.
+
+        Args:
+            image_num (int) - the index of the display
+
+        Returns:
+            (tuple) - xmin, xmax, ymin, ymax of the active region. All zeros if
+                      there is no active region.
+        '''
+        dspy_plugin = self.get_blender_dspy_plugin()
+        arXMin = ctypes.c_int(0)
+        arXMax = ctypes.c_int(0)
+        arYMin = ctypes.c_int(0)
+        arYMax = ctypes.c_int(0)
+        dspy_plugin.GetActiveRegion(ctypes.c_size_t(image_num), ctypes.byref(arXMin), ctypes.byref(arXMax), ctypes.byref(arYMin), ctypes.byref(arYMax))
+        return (arXMin.value, arXMax.value, arYMin.value, arYMax.value)
+
+    def _get_buffer(self, width, height, image_num=0, as_flat=True, pixels=None, region=None):
+        '''
+        Read back the pixels of a display from the Blender display driver.
+
+        Args:
+            width (int) - width of the image
+            height (int) - height of the image
+            image_num (int) - the index of the display
+            as_flat (bool) - return a flat array, rather than an array of RGBA pixels
+            pixels (numpy.ndarray) - optional array, returned from a previous call, to update in place
+            region (tuple) - optional xmin, xmax, ymin, ymax of the region to copy. Only
+                             used when pixels is given.
+
+        Returns:
+            (numpy.ndarray) - the flipped, 4 channel pixels, or None on failure
+        '''
         dspy_plugin = self.get_blender_dspy_plugin()
         num_channels = dspy_plugin.GetNumberOfChannels(ctypes.c_size_t(image_num))
-        if num_channels > 4 or num_channels < 0:
+        if num_channels > 4 or num_channels < 1:
             rfb_log().debug("Could not get buffer. Incorrect number of channels: %d" % num_channels)
             return None
 
@@ -1036,72 +1161,164 @@ class RmanRender(object):
         f.restype = ctypes.POINTER(ArrayType)
 
         try:
-            buffer = f(ctypes.c_size_t(image_num)).contents
-            pixels = list()
+            # wrap the display driver's framebuffer as a numpy view.
+            # No data is copied here.
+            buffer = np.ctypeslib.as_array(f(ctypes.c_size_t(image_num)).contents)
+            buffer = buffer.reshape(height, width, num_channels)
+
+            x0, x1, y0, y1 = 0, width-1, 0, height-1
+            if pixels is None:
+                pixels = np.ones((height, width, 4), dtype=np.float32)
+            elif region is not None:
+                x0 = max(region[0], 0)
+                x1 = min(region[1], width-1)
+                y0 = max(region[2], 0)
+                y1 = min(region[3], height-1)
 
             # we need to flip the image
             # also, Blender is expecting a 4 channel image
+            dst = pixels.reshape(height, width, 4)
+            src = buffer[y0:y1+1, x0:x1+1][::-1]
+            if num_channels == 1:
+                dst[height-1-y1:height-y0, x0:x1+1, 0:3] = src
+            else:
+                dst[height-1-y1:height-y0, x0:x1+1, 0:num_channels] = src
 
             if as_flat:
-                # return the buffer as a flat list
-                for y in range(height-1, -1, -1):
-                    i = (width * y * num_channels)
-                    
-                    # if this is already a 4 channel image, just slice it
-                    if num_channels == 4:
-                        j = i + (num_channels * (width))          
-                        pixels.extend(buffer[i:j])
-                        continue
-
-                    for x in range(0, width):
-                        j = i + (num_channels * x)
-                        if num_channels == 3:
-                            pixels.append(buffer[j])
-                            pixels.append(buffer[j+1])
-                            pixels.append(buffer[j+2])
-                            pixels.append(1.0)
-                        elif num_channels == 2:
-                            pixels.append(buffer[j])
-                            pixels.append(buffer[j+1])
-                            pixels.append(1.0)                        
-                            pixels.append(1.0)                        
-                        elif num_channels == 1:
-                            pixels.append(buffer[j])
-                            pixels.append(buffer[j])
-                            pixels.append(buffer[j])   
-                            pixels.append(1.0)                               
-            else:
-                # return the buffer as a list of lists
-                for y in range(height-1, -1, -1):
-                    i = (width * y * num_channels)
-
-                    for x in range(0, width):
-                        j = i + (num_channels * x)
-                        pixel = []
-                        pixel.append(buffer[j])    
-                        if num_channels == 4:
-                            pixel.append(buffer[j+1])
-                            pixel.append(buffer[j+2])
-                            pixel.append(buffer[j+3])                            
-                        elif num_channels == 3:
-                            pixel.append(buffer[j+1])
-                            pixel.append(buffer[j+2])
-                            pixel.append(1.0)
-                        elif num_channels == 2:
-                            pixel.append(buffer[j+1])
-                            pixel.append(1.0)                        
-                            pixel.append(1.0)                        
-                        elif num_channels == 1:
-                            pixel.append(buffer[j])
-                            pixel.append(buffer[j])      
-                            pixel.append(1.0)  
-
-                        pixels.append(pixel)            
-
-            return pixels
+                # return the buffer as a flat array
+                return pixels.reshape(-1)
+
+            # return the buffer as an array of pixels
+            return pixels.reshape(-1, 4)
         except Exception as e:
             rfb_log().error("Could not get buffer: %s" % str(e))
-            return None                             
+            return None
+
+    def _get_image_generation(self, image_num=0):
+        '''
+        Get the generation of a display. The display driver bumps it every 
+        time it writes to the display's framebuffer.
+
+        Args:
+            image_num (int) - the index of the display
+
+        Returns:
+            (int) - the generation, or None if the display driver doesn't 
+                    track generations
+        '''
+        dspy_plugin = self.get_blender_dspy_plugin()
+        if not hasattr(dspy_plugin, 'GetImageGeneration'):
+            # older display driver
+            return None
+        f = dspy_plugin.GetImageGeneration
+        f.restype = ctypes.c_uint64
+        return f(ctypes.c_size_t(image_num))
+
+    def _get_dirty_region(self, image_num=0):
+        '''
+        Get the region of a display written to since the last call, and clear it.
+
+        Args:
+            image_num (int) - the index of the display
+
+        Returns:
+            (tuple) - xmin, xmax, ymin, ymax of the region, or None if nothing
+                      was written
+        '''
+        dspy_plugin = self.get_blender_dspy_plugin()
+        xMin = ctypes.c_int(0)
+        xMax = ctypes.c_int(0)
+        yMin = ctypes.c_int(0)
+        yMax = ctypes.c_int(0)
+        if not dspy_plugin.GetDirtyRegion(ctypes.c_size_t(image_num), ctypes.byref(xMin), ctypes.byref(xMax), ctypes.byref(yMin), ctypes.byref(yMax)):
+            return None
+        return (xMin.value, xMax.value, yMin.value, yMax.value)
+
+    def _update_render_passes(self, width, height, render_view, bl_image_lyrs, pass_buffers, generations, force=False):
+        '''
+        Copy the pixels written since the last call into the render passes.
+
+        Displays whose generation didn't change are skipped. For the others, only 
+        the region the driver wrote to since the last call is read back. The union
+        of these regions is then sent to Blender as a partial render result, so only
+        the changed pixels are copied into the render passes.
+
+        Args:
+            width (int) - width of the image
+            height (int) - height of the image
+            render_view (str) - the view being rendered
+            bl_image_lyrs (dict) - display index to render pass name
+            pass_buffers (dict) - display index to the pixels last copied. Updated in place.
+            generations (dict) - display index to the generation last copied. Updated in place.
+            force (bool) - refresh all passes, regardless of their generation
+
+        Returns:
+            (bool) - True if any of the render passes were updated
+        '''
+        bounds = None
+        for i in bl_image_lyrs.keys():
+            generation = self._get_image_generation(image_num=i)
+            pixels = pass_buffers.get(i, None)
+            if force or pixels is None or generation is None:
+                if generation is not None:
+                    self._get_dirty_region(image_num=i)
+                region = (0, width-1, 0, height-1)
+                pixels = self._get_buffer(width, height, image_num=i, as_flat=False, pixels=pixels)
+            elif generation == generations.get(i, None):
+                continue
+            else:
+                region = self._get_dirty_region(image_num=i)
+                if region is None:
+                    generations[i] = generation
+                    continue
+                pixels = self._get_buffer(width, height, image_num=i, as_flat=False, pixels=pixels, region=region)
+            if pixels is None:
+                continue
+
+            pass_buffers[i] = pixels
+            generations[i] = generation
+            if bounds is None:
+                bounds = region
+            else:
+                bounds = (min(region[0], bounds[0]), max(region[1], bounds[1]),
+                          min(region[2], bounds[2]), max(region[3], bounds[3]))
+
+        if bounds is None:
+            return False
+
+        x0 = max(bounds[0], 0)
+        x1 = min(bounds[1], width-1)
+        # the driver's rows go from top to bottom, Blender's from bottom to top
+        y0 = height-1 - min(bounds[3], height-1)
+        y1 = height-1 - max(bounds[2], 0)
+        result = self.bl_engine.begin_result(x0, y0, x1-x0+1, y1-y0+1, view=render_view)
+        if not result:
+            return False
+        for i, pass_name in bl_image_lyrs.items():
+            pixels = pass_buffers.get(i, None)
+            if pixels is None:
+                continue
+            render_pass = result.layers[0].passes.find_by_name(pass_name, render_view)
+            if not render_pass:
+                continue
+            self._set_pass_pixels(render_pass, pixels.reshape(height, width, 4)[y0:y1+1, x0:x1+1])
+        self.bl_engine.end_result(result)
+        return True
+
+    def _set_pass_pixels(self, render_pass, pixels):
+        '''
+        Copy pixels returned from _get_buffer into a RenderPass.
+
+        Args:
+            render_pass (bpy.types.RenderPass) - the render pass to update
+            pixels (numpy.ndarray) - pixels, as returned by _get_buffer, or a region of them
+        '''
+        try:
+            render_pass.rect.foreach_set(pixels.reshape(-1))
+        except (AttributeError, TypeError):
+            # older versions of Blender don't support foreach_set
+            # on the rect property
+            render_pass.rect = pixels.reshape(-1, 4).tolist()
 
     def save_viewport_snapshot(self, frame=1):
         if not self.rman_is_viewport_rendering:
@@ -1111,14 +1328,14 @@ class RmanRender(object):
         height = self.viewport_res_y
 
         pixels = self._get_buffer(width, height)
-        if not pixels:
+        if pixels is None:
             rfb_log().error("Could not save snapshot.")
             return
 
         nm = 'rman_viewport_snapshot_<F4>_%d' % len(bpy.data.images)
         nm = string_utils.expand_string(nm, frame=frame)
         img = bpy.data.images.new(nm, width, height, float_buffer=True, alpha=True)                
-        img.pixels = pixels
+        img.pixels.foreach_set(pixels)
         img.update()
        
     def update_scene(self, context, depsgraph):
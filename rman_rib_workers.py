@@ -0,0 +1,245 @@
+import subprocess
+import threading
+import queue
+import time
+import sys
+import os
+import bpy
+from .rfb_utils import string_utils
+from .rfb_logger import rfb_log
+
+# markers the worker processes print, so the parent can track progress
+__RIB_FRAME_DONE__ = 'RFB_RIB_FRAME_DONE'
+__RIB_FRAME_FAILED__ = 'RFB_RIB_FRAME_FAILED'
+
+# how many times frames that failed to export are retried
+__RIB_MAX_RETRIES__ = 2
+
+def write_stash_file(bl_scene):
+    """Save a copy of the current .blend file for the workers to open.
+    The copy is written next to the original, so relative paths and
+    the <blend_dir> token resolve the same way.
+
+    This saves the file and edits the scene, so it needs to be called 
+    from the main thread, before the render or export starts.
+
+    Args:
+    - bl_scene (bpy.types.Scene) - the scene that will be exported
+
+    Returns:
+    - (str) - path to the copy, or an empty string if it could not be saved
+    """
+    bl_scene_file = bpy.data.filepath
+    if not bl_scene_file:
+        return ''
+    rm = bl_scene.renderman
+    bl_filepath = os.path.dirname(bl_scene_file)
+    bl_filename = os.path.splitext(os.path.basename(bl_scene_file))[0]
+    _id = 'pid%s_%d' % (str(os.getpid()), int(time.time()))
+    stash_file = os.path.join(bl_filepath, '_%s%s_rib_.blend' % (bl_filename, _id))
+
+    # make sure <blend> expands to the real filename in the workers
+    org_blend_token = rm.blend_token
+    if not org_blend_token:
+        rm.blend_token = bl_filename
+    try:
+        bpy.ops.wm.save_as_mainfile(filepath=stash_file, copy=True)
+    except RuntimeError as e:
+        rfb_log().error("Could not save a copy of the scene for the RIB export processes: %s" % str(e))
+        stash_file = ''
+    finally:
+        rm.blend_token = org_blend_token
+    return stash_file
+
+def remove_stash_file(stash_file):
+    if not stash_file:
+        return
+    try:
+        os.remove(stash_file)
+    except OSError:
+        pass
+
+class RmanRibWorkers(object):
+    """Write RIB files for a range of frames by sharding the frames across
+    several background Blender processes. Each process opens a copy of the
+    current .blend file, written by write_stash_file(), and runs the regular 
+    export for its frames, so the RIB files end up with the same names as an 
+    export done in this session.
+
+    Attributes:
+        rman_render (RmanRender) - the RmanRender instance, used to check for user aborts
+        bl_scene (bpy.types.Scene) - the scene being exported
+        num_workers (int) - number of processes to launch
+        stash_file (str) - path to the copy of the .blend file the processes open
+        aborted (bool) - whether the user stopped the export
+    """
+
+    def __init__(self, rman_render, bl_scene, num_workers, stash_file):
+        self.rman_render = rman_render
+        self.bl_scene = bl_scene
+        self.num_workers = num_workers
+        self.stash_file = stash_file
+        self.aborted = False
+        self._num_frames = 0
+        self._num_done = 0
+
+    def export_frames(self, frames, worker_args):
+        """Export frames using the worker processes.
+
+        Args:
+        - frames (list) - the frames to export
+        - worker_args (list) - arguments passed to worker_main(), describing
+                               what to export.
+
+        Returns:
+        - (list) - frames that could not be exported, or None if the
+                   workers could not be started at all
+        """
+
+        if not self.stash_file or not os.path.exists(self.stash_file):
+            return None
+
+        self._num_frames = len(frames)
+        self._num_done = 0
+        pending = list(frames)
+        for attempt in range(__RIB_MAX_RETRIES__ + 1):
+            if not pending or self.aborted:
+                break
+            if attempt > 0:
+                rfb_log().warning("Retrying RIB export for frames: %s" % ', '.join([str(f) for f in pending]))
+            pending = self._run_workers(self.stash_file, pending, worker_args)
+
+        return pending
+
+    def _read_output(self, proc, output_queue):
+        for line in proc.stdout:
+            tokens = line.split()
+            if len(tokens) == 2 and tokens[0] in (__RIB_FRAME_DONE__, __RIB_FRAME_FAILED__):
+                output_queue.put((tokens[0] == __RIB_FRAME_DONE__, int(tokens[1])))
+            else:
+                rfb_log().debug("RIB export process %d: %s" % (proc.pid, line.rstrip()))
+
+    def _run_workers(self, stash_file, frames, worker_args):
+        """Launch the workers for frames and wait for them to finish.
+
+        Returns:
+        - (list) - frames that were not exported
+        """
+        num_workers = max(1, min(self.num_workers, len(frames)))
+        # interleave the frames, so each worker gets a similar mix
+        # of heavy and light parts of the shot
+        shards = [frames[i::num_workers] for i in range(num_workers)]
+        python_expr = "import importlib; importlib.import_module('%s.rman_rib_workers').worker_main()" % __package__
+
+        output_queue = queue.Queue()
+        procs = list()
+        threads = list()
+        for shard in shards:
+            args = [bpy.app.binary_path, '-b', stash_file, '--python-expr', python_expr, '--']
+            args.extend(worker_args)
+            args.extend([str(f) for f in shard])
+            proc = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                    universal_newlines=True)
+            t = threading.Thread(target=self._read_output, args=(proc, output_queue))
+            t.daemon = True
+            t.start()
+            procs.append(proc)
+            threads.append(t)
+
+        done = set()
+        while True:
+            finished = all(proc.poll() is not None for proc in procs) and \
+                not any(t.is_alive() for t in threads)
+            try:
+                while True:
+                    success, frame = output_queue.get_nowait()
+                    if success:
+                        done.add(frame)
+                        self._update_progress(frame)
+                    else:
+                        rfb_log().error("Failed to write RIB for frame %d" % frame)
+            except queue.Empty:
+                pass
+            if finished:
+                break
+            bl_engine = self.rman_render.bl_engine
+            if bl_engine and bl_engine.test_break():
+                rfb_log().info("RIB export cancelled.")
+                self.aborted = True
+                for proc in procs:
+                    proc.kill()
+            time.sleep(0.1)
+
+        return [f for f in frames if f not in done]
+
+    def _update_progress(self, frame):
+        self._num_done += 1
+        rfb_log().info("Wrote RIB for frame %d (%d/%d)" % (frame, self._num_done, self._num_frames))
+        bl_engine = self.rman_render.bl_engine
+        if bl_engine:
+            bl_engine.update_progress(self._num_done / self._num_frames)
+            bl_engine.update_stats('', 'Writing RIB: %d/%d frames' % (self._num_done, self._num_frames))
+
+def _report_frame(success, frame):
+    marker = __RIB_FRAME_DONE__ if success else __RIB_FRAME_FAILED__
+    print('%s %d' % (marker, frame), flush=True)
+
+def worker_main():
+    """Entry point for the worker processes launched by RmanRibWorkers.
+
+    The arguments after '--' are the export mode, followed by the mode's
+    arguments and the frames to export:
+    - render <scene> <view layer> <static archive, or '-'> <frames...>
+    - selected <rib path> <export materials> <frames...>
+    """
+    from .rman_render import RmanRender
+
+    argv = sys.argv[sys.argv.index('--') + 1:]
+    mode = argv[0]
+    if mode == 'render':
+        scene_name, layer_name, static_archive = argv[1], argv[2], argv[3]
+        frames = [int(f) for f in argv[4:]]
+        bl_scene = bpy.data.scenes[scene_name]
+        if static_archive != '-':
+            RmanRender.get_rman_render().rib_static_archive = static_archive
+    else:
+        rib_path, export_materials = argv[1], (argv[2] == '1')
+        frames = [int(f) for f in argv[3:]]
+        bl_scene = bpy.context.scene
+
+    rm = bl_scene.renderman
+    if mode == 'render':
+        # export a single frame per render, and don't spool from the workers
+        rm.external_animation = False
+        rm.queuing_system = 'none'
+        rm.enable_external_rendering = True
+    version_token = rm.version_token
+    take_token = rm.take_token
+
+    for frame in frames:
+        try:
+            bl_scene.frame_set(frame, subframe=0.0)
+            if mode == 'render':
+                rib_output = string_utils.expand_string(rm.path_rib_output, frame=frame, asFilePath=True)
+            else:
+                rib_output = string_utils.expand_string(rib_path, frame=frame, asFilePath=True)
+            # remove any RIB left over from an earlier export, 
+            # so it isn't mistaken for this one
+            if os.path.exists(rib_output):
+                os.remove(rib_output)
+            if mode == 'render':
+                bpy.ops.render.render(layer=layer_name, scene=scene_name)
+            else:
+                rr = RmanRender.get_rman_render()
+                rr.start_export_rib_selected(bpy.context, rib_path, export_materials=export_materials, export_all_frames=False)
+            _report_frame(os.path.exists(rib_output), frame)
+        except Exception as e:
+            rfb_log().error("Failed to write RIB for frame %d: %s" % (frame, str(e)))
+            _report_frame(False, frame)
+
+        # renders may bump these, but every frame needs to
+        # expand to the same RIB filename as the parent
+        if rm.version_token != version_token or rm.take_token != take_token:
+            rm.version_token = version_token
+            rm.take_token = take_token
+            string_utils.update_blender_tokens_cb(bl_scene)
@@ -49,6 +49,13 @@ from .rman_sg_nodes.rman_sg_node import RmanSgNode
 import bpy
 import os
 import sys
+import numpy as np
+
+# modifiers that only depend on the object's own data, and so
+# can't make an otherwise static object change over an animation
+__RMAN_STATIC_MODIFIERS__ = ['SUBSURF', 'MULTIRES', 'TRIANGULATE', 'EDGE_SPLIT', 'WEIGHTED_NORMAL',
+                             'WELD', 'BEVEL', 'SOLIDIFY', 'DECIMATE', 'REMESH', 'WIREFRAME',
+                             'SKIN', 'SCREW', 'MIRROR', 'ARRAY']
 
 class RmanScene(object):
     '''
@@ -77,9 +84,13 @@ class RmanScene(object):
         rman_cameras (dict) - dictionary of all cameras in the scene
         obj_hash (dict) - dictionary of hashes to objects ( for object picking )
         moving_objects (dict) - dictionary of objects that are moving/deforming in the scene
-        processed_obs (dict) - dictionary of objects already processed
+        processed_obs (set) - set of objects already processed
+        rman_shared_geometry (dict) - dictionary of geometry that is shared between objects, keyed
+                                      by _get_shared_geometry_key
         motion_steps (set) - the full set of motion steps for the scene, including 
                             overrides from individual objects
+        motion_step_indices (dict) - dictionary of motion steps (as a tuple) to a dictionary
+                            of each step to its index
         main_camera (RmanSgCamera) - pointer to the main scene camera                            
         rman_root_sg_node (RixSGGroup) - the main root RixSceneGraph node
         render_default_light (bool) - whether to add a "headlight" light when there are no lights in the scene
@@ -89,6 +100,13 @@ class RmanScene(object):
         num_object_instances (int) - the current number of object instances. This is used during IPR to
                                     track the number of instances between edits. We try to use this to determine
                                     when an object is added or deleted.
+        light_registry (RmanLightRegistry) - the lights, mesh lights and light filters in the scene
+        group_membership (RmanGroupMembership) - index of the object groups and light links objects belong to
+        static_archive (str) - path to a RIB archive holding the static objects of an animation. When set,
+                               those objects are skipped and the archive is referenced instead.
+        static_archive_obs (set) - set of objects that were written to the static archive
+        static_archive_mats (set) - set of materials only used by objects in the static archive
+        static_archive_bound (list) - world space bound of the objects in the static archive
     '''
 
     def __init__(self, rman_render=None):
@@ -112,16 +130,20 @@ class RmanScene(object):
         self.scene_any_lights = False
         self.is_xpu = False
 
-        self.rman_materials = dict()
-        self.rman_objects = dict()
+        self.rman_materials = scenegraph_utils.RmanSgNodeDict()
+        self.rman_objects = scenegraph_utils.RmanSgNodeDict()
         self.rman_translators = dict()
         self.rman_particles = dict()
         self.rman_cameras = dict()
         self.obj_hash = dict() 
         self.moving_objects = dict()
-        self.processed_obs = []
+        self.processed_obs = set()
+        self.rman_shared_geometry = dict()
+        self.light_registry = scene_utils.RmanLightRegistry()
+        self.group_membership = scene_utils.RmanGroupMembership()
 
         self.motion_steps = set()
+        self.motion_step_indices = dict()
         self.main_camera = None
         self.rman_root_sg_node = None
 
@@ -132,6 +154,11 @@ class RmanScene(object):
         self.viewport_render_res_mult = 1.0
         self.num_object_instances = 0
 
+        self.static_archive = ''
+        self.static_archive_obs = set()
+        self.static_archive_mats = set()
+        self.static_archive_bound = None
+
         self.create_translators()     
 
 
@@ -169,7 +196,7 @@ class RmanScene(object):
         if self.bl_view_layer.renderman.use_renderman:
             self.rm_rl = self.bl_view_layer.renderman  
 
-    def reset(self):
+    def reset(self, keep_static_archive=False):
         # clear out dictionaries etc.
         self.rman_materials.clear()
         self.rman_objects.clear()
@@ -177,9 +204,13 @@ class RmanScene(object):
         self.rman_cameras.clear()        
         self.obj_hash.clear() 
         self.motion_steps = set()       
+        self.motion_step_indices.clear()
         self.moving_objects.clear()
         
         self.processed_obs.clear()
+        self.rman_shared_geometry.clear()
+        self.light_registry.clear()
+        self.group_membership.invalidate()
   
         self.render_default_light = False
         self.world_df_node = None
@@ -191,6 +222,8 @@ class RmanScene(object):
         self.is_xpu = False  
         self.rman_bake = False
         self.num_object_instances = 0
+        if not keep_static_archive:
+            self.set_static_archive(None, '', [])
 
     def export_for_final_render(self, depsgraph, sg_scene, bl_view_layer, is_external=False):
         self.sg_scene = sg_scene
@@ -259,6 +292,184 @@ class RmanScene(object):
         self.export_data_blocks(objs)
         self.export_instances(obj_selected=objs)
 
+    def export_for_static_archive(self, depsgraph, sg_scene, bl_view_layer, static_obs):
+        '''
+        Export the objects returned by get_static_objects() and their materials,
+        so they can be written once to a RIB archive and referenced by every frame
+        of an animation.
+        '''
+        self.reset()
+        self.sg_scene = sg_scene
+        self.context = bpy.context
+        self.bl_scene = depsgraph.scene_eval
+        self.bl_frame_current = self.bl_scene.frame_current
+        self.bl_view_layer = bl_view_layer
+        self._find_renderman_layer()
+        self.depsgraph = depsgraph
+        self.external_render = True
+        self.is_interactive = False
+        self.is_viewport_render = False
+        self.rman_bake = False
+        # static objects don't need any motion samples
+        self.do_motion_blur = False
+
+        texture_utils.get_txmanager().referenced_ids.clear()
+        self.export_materials([m.evaluated_get(self.depsgraph) for m in self._get_objects_materials(static_obs)])
+        texture_utils.get_txmanager().rman_scene = self
+        texture_utils.get_txmanager().txmake_referenced(self.bl_scene, lights=[], bl_engine=self.rman_render.bl_engine)
+
+        rfb_log().debug("Calling export_data_blocks()")
+        self.export_data_blocks(static_obs)
+        self.export_instances(obj_selected=static_obs)
+
+    def _is_material_animated(self, mat):
+        if mat.animation_data:
+            return True
+        nt = mat.node_tree
+        if not nt:
+            return False
+        if nt.animation_data:
+            return True
+        for node in nt.nodes:
+            # look for frame tokens in any texture paths
+            for prop in node.bl_rna.properties:
+                if prop.type != 'STRING':
+                    continue
+                val = getattr(node, prop.identifier, '')
+                if isinstance(val, str) and '<f' in val.lower():
+                    return True
+        return False
+
+    def _get_objects_materials(self, obs):
+        mats = set()
+        for ob in obs:
+            for slot in ob.material_slots:
+                if slot.material:
+                    mats.add(slot.material.original)
+        return mats
+
+    def _is_static_modifier(self, ob, mod):
+        if mod.type not in __RMAN_STATIC_MODIFIERS__:
+            return False
+        # modifiers like mirror and array can follow other objects
+        for prop in mod.bl_rna.properties:
+            if prop.type != 'POINTER':
+                continue
+            val = getattr(mod, prop.identifier, None)
+            if isinstance(val, bpy.types.Object) and val != ob:
+                return False
+        return True
+
+    def _is_static_object(self, ob):
+        rman_type = object_utils._detect_primitive_(ob)
+        if rman_type not in ['MESH', 'POINTS', 'QUADRIC', 'CURVE', 'NURBS']:
+            return False
+        if object_utils.is_transforming(ob) or object_utils._is_deforming_(ob):
+            return False
+        for mod in ob.modifiers:
+            if not self._is_static_modifier(ob, mod):
+                return False
+        if ob.is_instancer or len(ob.particle_systems) > 0 or object_utils.is_fluid(ob):
+            return False
+        if ob.data and ob.data.animation_data:
+            return False
+        parent = ob
+        while parent:
+            if parent.constraints:
+                return False
+            parent = parent.parent
+        if ob.parent and object_utils._detect_primitive_(ob.parent) == 'EMPTY':
+            # these get added to the empty's scene graph node
+            return False
+        for mat in self._get_objects_materials([ob]):
+            if self._is_material_animated(mat):
+                return False
+        return True
+
+    def get_static_objects(self, depsgraph):
+        '''
+        Return the list of visible objects that don't change over an animation.
+        These are objects that are not transforming or deforming, and that don't
+        use any animated materials. Objects that are instanced by other objects are
+        always treated as dynamic.
+        '''
+        instanced_obs = set()
+        candidates = list()
+        for ob_inst in depsgraph.object_instances:
+            if ob_inst.is_instance:
+                instanced_obs.add(ob_inst.instance_object.original)
+            elif ob_inst.show_self:
+                candidates.append(ob_inst.object)
+
+        return [ob.original for ob in candidates if ob.original not in instanced_obs and self._is_static_object(ob)]
+
+    def get_object_signatures(self, depsgraph, obs):
+        '''
+        Return a signature of the evaluated transform and geometry of each object
+        in obs, for the depsgraph's current frame. get_static_objects() can only look 
+        at an object's settings, so comparing signatures from different frames catches 
+        objects that still change, for example through drivers or geometry nodes.
+        '''
+        signatures = dict()
+        for ob in obs:
+            ob_eval = ob.evaluated_get(depsgraph)
+            sig = [hash(np.array(ob_eval.matrix_world, dtype=np.float32).tobytes())]
+            if ob_eval.type == 'MESH':
+                mesh = ob_eval.to_mesh()
+                if mesh:
+                    P = np.zeros(len(mesh.vertices)*3, dtype=np.float32)
+                    mesh.vertices.foreach_get('co', P)
+                    sig.append(len(mesh.polygons))
+                    sig.append(hash(P.tobytes()))
+                ob_eval.to_mesh_clear()
+            else:
+                sig.append(hash(np.array([list(c) for c in ob_eval.bound_box], dtype=np.float32).tobytes()))
+            signatures[ob] = tuple(sig)
+        return signatures
+
+    def set_static_archive(self, depsgraph, static_archive, static_obs):
+        '''
+        Set the RIB archive that holds static_obs. Subsequent exports will skip 
+        these objects, along with materials only they use, and reference the 
+        archive instead. Pass an empty path to go back to exporting every object.
+        '''
+        self.static_archive = static_archive
+        self.static_archive_obs = set()
+        self.static_archive_mats = set()
+        self.static_archive_bound = None
+        if not static_archive:
+            return
+
+        self.static_archive_obs = set(static_obs)
+        dynamic_obs = [ob for ob in bpy.data.objects if ob not in self.static_archive_obs]
+        self.static_archive_mats = self._get_objects_materials(static_obs) - self._get_objects_materials(dynamic_obs)
+
+        corners = list()
+        for ob in static_obs:
+            ob_eval = ob.evaluated_get(depsgraph)
+            mtx = np.array(ob_eval.matrix_world, dtype=np.float32)
+            bbox = np.array([list(c) + [1.0] for c in ob_eval.bound_box], dtype=np.float32)
+            corners.append((bbox @ mtx.T)[:, :3])
+        if corners:
+            corners = np.concatenate(corners)
+            bmin = corners.min(axis=0)
+            bmax = corners.max(axis=0)
+            self.static_archive_bound = [float(bmin[0]), float(bmax[0]), float(bmin[1]), float(bmax[1]), float(bmin[2]), float(bmax[2])]
+
+    def export_static_archive_reference(self):
+        # reference the archive written by export_for_static_archive()
+        sg_node = self.sg_scene.CreateProcedural('__rman_static_archive')
+        sg_node.Define("DelayedReadArchive", None)
+        bounds = self.static_archive_bound
+        if not bounds:
+            bounds = (-100000, 100000, -100000, 100000, -100000, 100000 )
+
+        primvar = sg_node.GetPrimVars()
+        primvar.SetString(self.rman.Tokens.Rix.k_filename, self.static_archive)
+        primvar.SetFloatArray(self.rman.Tokens.Rix.k_bound, bounds, 6)
+        sg_node.SetPrimVars(primvar)
+        self.get_root_sg_node().AddChild(sg_node)
+
     def export_for_swatch_render(self, depsgraph, sg_scene):
         self.sg_scene = sg_scene
         self.context = bpy.context #None
@@ -274,7 +485,9 @@ class RmanScene(object):
 
     def export(self):
 
-        self.reset()
+        # the static archive is set by the caller, just before
+        # exporting each frame of an external render
+        self.reset(keep_static_archive=self.external_render)
 
         self.render_default_light = self.bl_scene.renderman.render_default_light
         if sys.platform != "darwin":
@@ -290,14 +503,16 @@ class RmanScene(object):
         self.export_root_sg_node()        
 
         rfb_log().debug("Calling export_materials()")
+        texture_utils.get_txmanager().referenced_ids.clear()
         #self.export_materials(bpy.data.materials)
-        self.export_materials([m for m in self.depsgraph.ids if isinstance(m, bpy.types.Material)])  
+        self.export_materials([m for m in self.depsgraph.ids if isinstance(m, bpy.types.Material) and m.original not in self.static_archive_mats])  
                 
         # tell the texture manager to start converting any unconverted textures
         # normally textures are converted as they are added to the scene                
         rfb_log().debug("Calling txmake_all()")
+        self.light_registry.rebuild(self.bl_scene)
         texture_utils.get_txmanager().rman_scene = self  
-        texture_utils.get_txmanager().txmake_all(blocking=True)
+        texture_utils.get_txmanager().txmake_all(blocking=False)
 
         self.scene_any_lights = self._scene_has_lights()
         
@@ -327,6 +542,11 @@ class RmanScene(object):
             rfb_log().debug("Calling export_instances()")
             self.export_instances()
 
+        if self.static_archive:
+            self.export_static_archive_reference()
+
+        self.wait_for_referenced_textures()
+
         self.rman_render.stats_mgr.set_export_stats("Finished Export", 1.0)
 
         if self.is_interactive:
@@ -349,11 +569,13 @@ class RmanScene(object):
         self.export_root_sg_node()
 
         rfb_log().debug("Calling export_materials()")
+        texture_utils.get_txmanager().referenced_ids.clear()
         self.export_materials([m for m in self.depsgraph.ids if isinstance(m, bpy.types.Material)]) 
                 
         rfb_log().debug("Calling txmake_all()")
+        self.light_registry.rebuild(self.bl_scene)
         texture_utils.get_txmanager().rman_scene = self  
-        texture_utils.get_txmanager().txmake_all(blocking=True)
+        texture_utils.get_txmanager().txmake_all(blocking=False)
 
         self.scene_any_lights = self._scene_has_lights()
         
@@ -388,6 +610,8 @@ class RmanScene(object):
         options.SetIntegerArray(self.rman.Tokens.Rix.k_Ri_FormatResolution, (bake_resolution, bake_resolution), 2) 
         self.sg_scene.SetOptions(options)
 
+        self.wait_for_referenced_textures()
+
     def export_bake_brickmap_selected(self):
         self.reset()
 
@@ -400,10 +624,12 @@ class RmanScene(object):
         self.export_root_sg_node()
 
         rfb_log().debug("Calling export_materials()")
+        texture_utils.get_txmanager().referenced_ids.clear()
         self.export_materials([m for m in self.depsgraph.ids if isinstance(m, bpy.types.Material)])
         rfb_log().debug("Calling txmake_all()")
+        self.light_registry.rebuild(self.bl_scene)
         texture_utils.get_txmanager().rman_scene = self  
-        texture_utils.get_txmanager().txmake_all(blocking=True)        
+        texture_utils.get_txmanager().txmake_all(blocking=False)
 
         self.scene_any_lights = self._scene_has_lights()        
                         
@@ -444,7 +670,20 @@ class RmanScene(object):
         display = self.rman.SGManager.RixSGShader("Display", display_driver, render_output)
         display.params.SetString("mode", 'Ci')
         self.main_camera.sg_camera_node.SetDisplay(display)         
+
+        self.wait_for_referenced_textures()
                  
+    def wait_for_referenced_textures(self):
+        '''
+        Wait for the textures referenced during the export to finish converting.
+        This needs to be called after everything that can reference a texture
+        (materials, lights, the integrator, displays and filters) has been exported.
+        '''
+        rfb_log().debug("Calling txmake_referenced()")
+        texture_utils.get_txmanager().txmake_referenced(self.bl_scene, 
+                                                        lights=self.light_registry.get_lights(),
+                                                        bl_engine=self.rman_render.bl_engine)
+
     def export_swatch_render_scene(self):
         self.reset()
 
@@ -532,18 +771,53 @@ class RmanScene(object):
             rfb_log().debug("   Exported %d/%d data blocks... (%s)" % (i, total, obj.name))
             self.rman_render.stats_mgr.set_export_stats("Exporting data blocks",i/total)
 
-    def export_data_block(self, db_ob):
+    def _get_shared_geometry_key(self, ob, rman_type):
+        '''
+        Return a key that identifies geometry that can be shared between
+        Objects, or None if this object needs its own geometry.
+
+        By default, we export a unique geometry/mesh per Object, even if the 
+        datablock is shared in Blender, because:
+
+        1. Each object can have different modifiers applied. This includes applying a subdiv and/or bevel modifiers.
+        2. Each object may want a different number of deformation motion samples
+        3. Each object can set its own primvars
+
+        When none of these apply, objects that use the same mesh datablock can
+        be instances of the same geometry. We don't do this during IPR, where
+        any of the above can change at any time.
+        '''
+
+        if self.is_interactive or rman_type != 'MESH':
+            return None
+        if not isinstance(ob.data, bpy.types.Mesh):
+            return None
+        if len(ob.modifiers) > 0:
+            return None
+        if ob.renderman.motion_segments_override:
+            return None
+        if object_utils._is_deforming_(ob):
+            return None
+        for p in ob.data.renderman.prim_vars:
+            # vertex groups belong to the object
+            if p.data_source == 'VERTEX_GROUP':
+                return None
+
+        rm = ob.renderman
+        primvars = []
+        for prop_name, meta in rm.prop_meta.items():
+            if 'primvar' not in meta:
+                continue
+            val = getattr(rm, prop_name)
+            if hasattr(val, '__len__') and not isinstance(val, str):
+                val = tuple(val)
+            primvars.append(val)
 
-        # FIXME? 
-        # We currently export a unique geometry/mesh per Object
-        # This means we're not actually sharing datablocks per Object, even if they are shared
-        # in Blender. We do this for a couple of reasons:
-        # 
-        # 1. Each object can have different modifiers applied. This includes applying a subdiv and/or bevel modifiers.
-        # 2. Each object may want a different number of deformation motion samples
-        #
-        # This is incredibly wasteful when these don't apply. We could try and detect this case and
-        # create a shareable geometry.
+        is_transforming = self.do_motion_blur and object_utils.is_transforming(ob)
+
+        return (ob.data.original, object_utils.is_subdmesh(ob), is_transforming, tuple(primvars))
+
+    def export_data_block(self, db_ob):
 
         obj = bpy.data.objects.get(db_ob.name, None)
         if not obj and self.is_swatch_render:
@@ -567,11 +841,28 @@ class RmanScene(object):
             if ob.original in self.rman_objects:
                 return
 
-            rman_sg_node = translator.export(ob, db_name)
-            if not rman_sg_node:
+            if ob.original in self.static_archive_obs:
+                # already written to the static archive
                 return
-            rman_sg_node.rman_type = rman_type
-            self.rman_objects[ob.original] = rman_sg_node       
+
+            shared_key = self._get_shared_geometry_key(ob, rman_type)
+            if shared_key:
+                rman_sg_node = self.rman_shared_geometry.get(shared_key, None)
+
+            if rman_sg_node:
+                # another object already exported this geometry.
+                # Our instances will reference that instead.
+                rman_sg_node.shared_obs.add(ob.original)
+                self.rman_objects[ob.original] = rman_sg_node
+            else:
+                rman_sg_node = translator.export(ob, db_name)
+                if not rman_sg_node:
+                    return
+                rman_sg_node.rman_type = rman_type
+                self.rman_objects[ob.original] = rman_sg_node       
+                if shared_key:
+                    rman_sg_node.shared_obs.add(ob.original)
+                    self.rman_shared_geometry[shared_key] = rman_sg_node
 
             if rman_type in ['MESH', 'POINTS']:
                 # Deal with any particles now. Particles are children to mesh nodes.
@@ -599,7 +890,7 @@ class RmanScene(object):
                     ob_psys[psys.settings.original] = rman_sg_particles
                     self.rman_particles[ob.original] = ob_psys 
                     self.rman_objects[psys.settings.original] = rman_sg_particles  
-                    self.processed_obs.append(psys.settings.original)
+                    self.processed_obs.add(psys.settings.original)
                     rman_sg_node.rman_sg_particle_group_node.sg_node.AddChild(rman_sg_particles.sg_node)
 
             elif rman_type == 'EMPTY' and (ob.hide_render or ob.hide_viewport):
@@ -645,8 +936,7 @@ class RmanScene(object):
 
     def _scene_has_lights(self):
         # Determine if there are any lights in the scene
-        num_lights = len(scene_utils.get_all_lights(self.bl_scene, include_light_filters=False))
-        return num_lights > 0     
+        return self.light_registry.has_lights()
 
     def _export_hidden_instance(self, ob, rman_sg_node):
         translator = self.rman_translators.get('EMPTY')
@@ -734,7 +1024,10 @@ class RmanScene(object):
                 if not ob.original in self.processed_obs:
                     translator.update(ob, rman_sg_node)
                     translator.export_object_primvars(ob, rman_sg_node)
-                    self.processed_obs.append(ob.original)
+                    self.processed_obs.add(ob.original)
+                    if rman_type == 'MESH':
+                        # any other objects sharing this geometry are done as well
+                        self.processed_obs.update(rman_sg_node.shared_obs)
 
                 rman_sg_group = rman_group_translator.export(ob, group_db_name)
                 if ob.is_instancer and ob.instance_type != 'NONE':
@@ -791,26 +1084,28 @@ class RmanScene(object):
         obj_selected_names = []
         if obj_selected:
             obj_selected_names = [o.name for o in obj_selected]
-        for i, ob_inst in enumerate(self.depsgraph.object_instances):
-            if obj_selected:
-                objFound = False
+        rman_group_translator = self.rman_translators['GROUP']
+        with rman_group_translator.transform_batch():
+            for i, ob_inst in enumerate(self.depsgraph.object_instances):
+                if obj_selected:
+                    objFound = False
 
-                if ob_inst.is_instance:
-                    if ob_inst.instance_object.name in obj_selected_names:
-                        objFound = True
-                elif ob_inst.object.name in obj_selected_names:
-                        objFound = True
+                    if ob_inst.is_instance:
+                        if ob_inst.instance_object.name in obj_selected_names:
+                            objFound = True
+                    elif ob_inst.object.name in obj_selected_names:
+                            objFound = True
 
-                if not objFound:
-                    continue
+                    if not objFound:
+                        continue
 
-            if not ob_inst.show_self:
-                continue
+                if not ob_inst.show_self:
+                    continue
 
-            self._export_instance(ob_inst)  
-            self.rman_render.stats_mgr.set_export_stats("Exporting instances", i/total)
+                self._export_instance(ob_inst)  
+                self.rman_render.stats_mgr.set_export_stats("Exporting instances", i/total)
             
-            rfb_log().debug("   Exported %d/%d instances..." % (i, total))
+                rfb_log().debug("   Exported %d/%d instances..." % (i, total))
 
     def attach_material(self, ob, rman_sg_node):
         mat = object_utils.get_active_material(ob)
@@ -843,6 +1138,19 @@ class RmanScene(object):
                     scenegraph_utils.set_material(group.sg_node, rman_sg_material.sg_node)
                     group.is_meshlight = rman_sg_material.has_meshlight 
 
+    def _get_motion_step_index(self, motion_steps, seg):
+        # look up the index of seg in motion_steps, or -1 if it's not there.
+        # Most nodes share the same motion steps, so keep a dictionary 
+        # for each distinct set.
+        key = tuple(motion_steps)
+        step_indices = self.motion_step_indices.get(key, None)
+        if step_indices is None:
+            step_indices = dict()
+            for i, s in enumerate(motion_steps):
+                step_indices.setdefault(s, i)
+            self.motion_step_indices[key] = step_indices
+        return step_indices.get(seg, -1)
+
     def export_instances_motion(self, obj_selected=None):
         origframe = self.bl_scene.frame_current
 
@@ -851,6 +1159,8 @@ class RmanScene(object):
 
         motion_steps = sorted(list(self.motion_steps))
 
+        deforming_obs = None
+        deform_states = dict()
         first_sample = False
         delta = -motion_steps[0]
         for samp, seg in enumerate(motion_steps):
@@ -868,96 +1178,132 @@ class RmanScene(object):
             # update camera
             if not first_sample and self.main_camera.is_transforming and seg in self.main_camera.motion_steps:
                 cam_translator =  self.rman_translators['CAMERA']
-                idx = 0
-                for i, s in enumerate(self.main_camera.motion_steps):
-                    if s == seg:
-                        idx = i
-                        break
+                idx = self._get_motion_step_index(self.main_camera.motion_steps, seg)
                 cam_translator.update_transform(self.depsgraph.scene_eval.camera, self.main_camera, idx, time_samp)
 
-            for i, ob_inst in enumerate(self.depsgraph.object_instances):  
-                if obj_selected:
-                    if objFound:
-                        break
+            rman_group_translator = self.rman_translators['GROUP']
+            with rman_group_translator.transform_batch():
+                for i, ob_inst in enumerate(self.depsgraph.object_instances):  
+                    if obj_selected:
+                        if objFound:
+                            break
+
+                        if ob_inst.is_instance:
+                            if ob_inst.instance_object.name == obj_selected:
+                                objFound = True
+                        elif ob_inst.object.name == obj_selected.name:
+                                objFound = True
+
+                        if not objFound:
+                            continue       
+
+                    if not ob_inst.show_self:
+                        continue                    
+
+                    if first_sample:
+                        # for the first motion sample use _export_instance()
+                        self._export_instance(ob_inst, seg=time_samp)  
+                        self.rman_render.stats_mgr.set_export_stats("Exporting instances (%f)" % seg, i/total)
+                        continue  
 
+                    psys = None
                     if ob_inst.is_instance:
-                        if ob_inst.instance_object.name == obj_selected:
-                            objFound = True
-                    elif ob_inst.object.name == obj_selected.name:
-                            objFound = True
-
-                    if not objFound:
-                        continue       
-
-                if not ob_inst.show_self:
-                    continue                    
-
-                if first_sample:
-                    # for the first motion sample use _export_instance()
-                    self._export_instance(ob_inst, seg=time_samp)  
-                    self.rman_render.stats_mgr.set_export_stats("Exporting instances (%f)" % seg, i/total)
-                    continue  
-
-                rman_group_translator = self.rman_translators['GROUP']
-                psys = None
-                if ob_inst.is_instance:
-                    ob = ob_inst.instance_object.original  
-                    psys = ob_inst.particle_system
-                else:
-                    ob = ob_inst.object
+                        ob = ob_inst.instance_object.original  
+                        psys = ob_inst.particle_system
+                    else:
+                        ob = ob_inst.object
 
-                if ob.name_full not in self.moving_objects and not psys:
-                    continue
+                    if ob.name_full not in self.moving_objects and not psys:
+                        continue
 
-                if ob.type not in ['MESH']:
-                    continue                
+                    if ob.type not in ['MESH']:
+                        continue                
 
-                group_db_name = object_utils.get_group_db_name(ob_inst)          
+                    group_db_name = object_utils.get_group_db_name(ob_inst)          
 
-                rman_sg_node = self.rman_objects.get(ob.original, None)
-                if not rman_sg_node:
-                    continue
+                    rman_sg_node = self.rman_objects.get(ob.original, None)
+                    if not rman_sg_node:
+                        continue
                 
-                if not seg in rman_sg_node.motion_steps:
-                    continue
-
-                idx = 0
-                for i, s in enumerate(rman_sg_node.motion_steps):
-                    if s == seg:
-                        idx = i
-                        break                
+                    idx = self._get_motion_step_index(rman_sg_node.motion_steps, seg)
+                    if idx < 0:
+                        continue
 
-                if rman_sg_node.is_transforming or psys:
-                    rman_sg_group = rman_sg_node.instances.get(group_db_name, None)
-                    if rman_sg_group:
-                        rman_group_translator.update_transform_num_samples(rman_sg_group, rman_sg_node.motion_steps ) # should have been set in _export_instances()                       
-                        rman_group_translator.update_transform_sample( ob_inst, rman_sg_group, idx, time_samp)
+                    if rman_sg_node.is_transforming or psys:
+                        rman_sg_group = rman_sg_node.instances.get(group_db_name, None)
+                        if rman_sg_group:
+                            rman_group_translator.update_transform_num_samples(rman_sg_group, rman_sg_node.motion_steps ) # should have been set in _export_instances()                       
+                            rman_group_translator.update_transform_sample( ob_inst, rman_sg_group, idx, time_samp)
 
-                self.rman_render.stats_mgr.set_export_stats("Exporting instances (%f)" % seg, i/total)
+                    self.rman_render.stats_mgr.set_export_stats("Exporting instances (%f)" % seg, i/total)
 
-            for ob_original,rman_sg_node in self.rman_objects.items():
+            psys_translator = self.rman_translators['PARTICLES']
+            for ob_original, ob_psys in self.rman_particles.items():
                 ob = ob_original.evaluated_get(self.depsgraph)
-                psys_translator = self.rman_translators['PARTICLES']
                 for psys in ob.particle_systems:
-                    ob_psys = self.rman_particles.get(ob.original, dict())
                     rman_sg_particles = ob_psys.get(psys.settings.original, None)
                     if rman_sg_particles:
                         if not seg in rman_sg_particles.motion_steps:
                             continue
                         psys_translator.export_deform_sample(rman_sg_particles, ob, psys, samp)                                    
 
-                if rman_sg_node.is_deforming:
-                    rman_type = rman_sg_node.rman_type
-                    if rman_type == 'MESH':
-                        translator = self.rman_translators.get(rman_type, None)
-                        if translator:
-                            translator.export_deform_sample(rman_sg_node, ob, samp)                     
+            if deforming_obs is None:
+                # look for deforming meshes once the first sample
+                # has been exported
+                deforming_obs = [(ob_original, rman_sg_node) for ob_original, rman_sg_node in self.rman_objects.items()
+                                 if rman_sg_node.is_deforming and rman_sg_node.rman_type == 'MESH']
+            self._export_deform_samples(deforming_obs, deform_states, seg)
 
+        self._finish_deform_samples(deform_states)
         self.rman_render.bl_engine.frame_set(origframe, subframe=0)  
 
+    def _export_deform_samples(self, deforming_obs, deform_states, seg):
+        # Export the deformation sample for seg. A sample is only written once we 
+        # know the mesh is actually changing. Until then, we hold onto the samples
+        # that are the same as the first one.
+        mesh_translator = self.rman_translators['MESH']
+        for ob_original, rman_sg_node in deforming_obs:
+            if not rman_sg_node.is_deforming:
+                continue
+            time_sample = self._get_motion_step_index(rman_sg_node.motion_steps, seg)
+            if time_sample < 0:
+                continue
+            ob = ob_original.evaluated_get(self.depsgraph)
+            P = mesh_translator.get_deform_sample_points(ob)
+            if P is None:
+                continue
+
+            state = deform_states.get(ob_original, None)
+            if state is None:
+                deform_states[ob_original] = {'rman_sg_node': rman_sg_node, 'P': P, 'pending': [time_sample], 'is_moving': False}
+                continue
+
+            if not state['is_moving']:
+                if np.array_equal(P, state['P']):
+                    state['pending'].append(time_sample)
+                    continue
+                # write out the samples we skipped
+                for t in state['pending']:
+                    mesh_translator.export_deform_sample(rman_sg_node, ob, t, P=state['P'])
+                state['pending'] = []
+                state['is_moving'] = True
+
+            mesh_translator.export_deform_sample(rman_sg_node, ob, time_sample, P=P)
+            state['P'] = P
+
+    def _finish_deform_samples(self, deform_states):
+        # meshes whose points were the same for every sample don't need
+        # any motion samples
+        mesh_translator = self.rman_translators['MESH']
+        for state in deform_states.values():
+            rman_sg_node = state['rman_sg_node']
+            if state['is_moving'] or not rman_sg_node.is_deforming:
+                continue
+            mesh_translator.clear_deform_samples(rman_sg_node, state['P'])
+
     def check_solo_light(self):           
         if self.bl_scene.renderman.solo_light:   
-            for light_ob in scene_utils.get_all_lights(self.bl_scene, include_light_filters=False):
+            for light_ob in self.light_registry.get_lights(include_light_filters=False):
                 rman_sg_node = self.rman_objects.get(light_ob.original, None)
                 if not rman_sg_node:
                     continue
@@ -969,7 +1315,7 @@ class RmanScene(object):
                 else:
                     rman_sg_node.sg_node.SetHidden(1)  
         else:            
-            for light_ob in scene_utils.get_all_lights(self.bl_scene, include_light_filters=False):
+            for light_ob in self.light_registry.get_lights(include_light_filters=False):
                 rman_sg_node = self.rman_objects.get(light_ob.original, None)
                 if not rman_sg_node:
                     continue
@@ -1196,7 +1542,7 @@ class RmanScene(object):
                 self.rman_cameras[main_cam.original] = self.main_camera
                 self.rman_objects[main_cam.original] = self.main_camera
       
-                self.processed_obs.append(main_cam.original)
+                self.processed_obs.add(main_cam.original)
         else:
             if self.is_interactive:
                 main_cam = self.context.space_data.camera
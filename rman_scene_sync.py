@@ -107,6 +107,7 @@ class RmanSceneSync(object):
                             found = True
 
                     if found:
+                        self.rman_scene.light_registry.update(ob)
                         rman_sg_group = rman_sg_node.instances.get(group_db_name, None)
                         if rman_sg_group:
                             rman_sg_node.instances.pop(group_db_name)
@@ -121,6 +122,7 @@ class RmanSceneSync(object):
         if not rman_sg_material:
             # Double check if we can't find the material because of an undo
             rman_sg_material = self.update_materials_dict(mat)
+        has_meshlight = rman_sg_material.has_meshlight if rman_sg_material else False
 
         with self.rman_scene.rman.SGManager.ScopedEdit(self.rman_scene.sg_scene):   
             mat = obj.id              
@@ -135,6 +137,15 @@ class RmanSceneSync(object):
 
         # update db_name
         rman_sg_material.db_name = db_name
+        self.rman_scene.rman_materials.reindex(mat.original)
+
+        if has_meshlight != rman_sg_material.has_meshlight:
+            # objects using this material were added to, or removed from, 
+            # the light registry
+            for ob in self.rman_scene.bl_scene.objects:
+                active_mat = getattr(ob, 'active_material', None)
+                if active_mat and active_mat.original == mat.original:
+                    self.rman_scene.light_registry.update(ob)
 
     def _light_filter_transform_updated(self, obj):
         ob = obj.id
@@ -351,36 +362,37 @@ class RmanSceneSync(object):
             # Re-emit instances for all objects in self.update_instances
             rfb_log().debug("Re-emit instances")
             rman_group_translator = self.rman_scene.rman_translators['GROUP']
-            for ob_inst in self.rman_scene.depsgraph.object_instances: 
-                parent = None
-                if ob_inst.is_instance:
-                    ob = ob_inst.instance_object
-                    parent = ob_inst.parent
-                else:
-                    ob = ob_inst.object
+            with rman_group_translator.transform_batch():
+                for ob_inst in self.rman_scene.depsgraph.object_instances: 
+                    parent = None
+                    if ob_inst.is_instance:
+                        ob = ob_inst.instance_object
+                        parent = ob_inst.parent
+                    else:
+                        ob = ob_inst.object
 
-                if ob.original not in self.update_instances:
-                    continue
+                    if ob.original not in self.update_instances:
+                        continue
 
-                rman_type = object_utils._detect_primitive_(ob)
-                rman_sg_node = self.rman_scene.rman_objects.get(ob.original, None)
-                if rman_sg_node:
-                    translator = self.rman_scene.rman_translators.get(rman_type, None)
-                    translator.export_object_primvars(ob, rman_sg_node)
+                    rman_type = object_utils._detect_primitive_(ob)
+                    rman_sg_node = self.rman_scene.rman_objects.get(ob.original, None)
+                    if rman_sg_node:
+                        translator = self.rman_scene.rman_translators.get(rman_type, None)
+                        translator.export_object_primvars(ob, rman_sg_node)
 
-                    group_db_name = object_utils.get_group_db_name(ob_inst) 
-                    rman_sg_group = rman_sg_node.instances.get(group_db_name, None)
-                    if rman_sg_group:
-                        rman_group_translator.update_transform(ob_inst, rman_sg_group)
-                        # object attrs             
-                        rman_group_translator.export_object_attributes(ob, rman_sg_group)  
-                        if rman_sg_group.bl_psys_settings:
-                            self.rman_scene.attach_particle_material(rman_sg_group.bl_psys_settings, parent, ob, rman_sg_group)
-                        else:
-                            self.rman_scene.attach_material(ob, rman_sg_group)
-                        continue                    
+                        group_db_name = object_utils.get_group_db_name(ob_inst) 
+                        rman_sg_group = rman_sg_node.instances.get(group_db_name, None)
+                        if rman_sg_group:
+                            rman_group_translator.update_transform(ob_inst, rman_sg_group)
+                            # object attrs             
+                            rman_group_translator.export_object_attributes(ob, rman_sg_group)  
+                            if rman_sg_group.bl_psys_settings:
+                                self.rman_scene.attach_particle_material(rman_sg_group.bl_psys_settings, parent, ob, rman_sg_group)
+                            else:
+                                self.rman_scene.attach_material(ob, rman_sg_group)
+                            continue                    
                 
-                self.rman_scene._export_instance(ob_inst)            
+                    self.rman_scene._export_instance(ob_inst)
 
     def clear_instances(self, ob, rman_sg_node=None):
         rfb_log().debug("Deleting instances")
@@ -397,15 +409,11 @@ class RmanSceneSync(object):
 
     def update_materials_dict(self, mat):    
         # See comment below in update_objects_dict 
-        rman_sg_material = None
-        for id, rman_sg_node in self.rman_scene.rman_materials.items():
-            if rman_sg_node:
-                db_name = object_utils.get_db_name(mat)
-                if rman_sg_node.db_name == db_name:
-                    self.rman_scene.rman_materials[mat.original] = rman_sg_node
-                    del self.rman_scene.rman_materials[id]
-                    rman_sg_material = rman_sg_node 
-                    break
+        db_name = object_utils.get_db_name(mat)
+        id, rman_sg_material = self.rman_scene.rman_materials.find_by_db_name(db_name)
+        if rman_sg_material:
+            del self.rman_scene.rman_materials[id]
+            self.rman_scene.rman_materials[mat.original] = rman_sg_material
         
         return rman_sg_material
 
@@ -415,15 +423,11 @@ class RmanSceneSync(object):
         # references to be invalidated (see: https://docs.blender.org/api/current/info_gotcha.html)
         # We don't want to accidentally mistake this for a new object, so we need to update
         # our objects dictionary with the new bpy.types.ID reference
-        rman_sg_node = None
-        for id, rsn in self.rman_scene.rman_objects.items():
-            if rsn:
-                db_name = object_utils.get_db_name(ob, rman_type=rman_type)
-                if rsn.db_name == db_name:
-                    self.rman_scene.rman_objects[ob.original] = rsn
-                    del self.rman_scene.rman_objects[id]
-                    rman_sg_node = rsn
-                    break
+        db_name = object_utils.get_db_name(ob, rman_type=rman_type)
+        id, rman_sg_node = self.rman_scene.rman_objects.find_by_db_name(db_name)
+        if rman_sg_node:
+            del self.rman_scene.rman_objects[id]
+            self.rman_scene.rman_objects[ob.original] = rman_sg_node
         return rman_sg_node
 
     def update_collection(self, coll):
@@ -494,6 +498,9 @@ class RmanSceneSync(object):
         self.rman_scene.bl_scene = depsgraph.scene
         self.rman_scene.context = context           
 
+        # object groups or light links may have changed
+        self.rman_scene.group_membership.check_for_changes(self.rman_scene.bl_scene)
+
         particle_settings_node = None   
         did_mesh_update = False # did the mesh actually update
         prev_num_instances = self.rman_scene.num_object_instances # the number of instances previously
@@ -631,10 +638,15 @@ class RmanSceneSync(object):
                                 self.num_instances_changed = False
                     continue      
 
+                if rman_sg_node:
+                    # the light role or the active material could have changed
+                    self.rman_scene.light_registry.update(ob_data)
+
                 if rman_sg_node and rman_sg_node.sg_node:
                     # update db_name
                     db_name = object_utils.get_db_name(ob, rman_type=rman_type)
                     rman_sg_node.db_name = db_name
+                    self.rman_scene.rman_objects.reindex(obj.id.original)
 
                     # double check hidden value
                     if rman_type in ['LIGHT']:
@@ -747,6 +759,8 @@ class RmanSceneSync(object):
     def add_objects(self):
         with self.rman_scene.rman.SGManager.ScopedEdit(self.rman_scene.sg_scene): 
             rfb_log().debug("Adding new objects:")
+            for ob in self.new_objects:
+                self.rman_scene.light_registry.update(ob)
             self.rman_scene.export_data_blocks(self.new_objects)
 
             self.rman_scene.scene_any_lights = self.rman_scene._scene_has_lights()
@@ -779,6 +793,7 @@ class RmanSceneSync(object):
 
                     # self.rman_scene.sg_scene.DeleteDagNode(rman_sg_node.sg_node)                     
                     del self.rman_scene.rman_objects[obj]
+                    self.rman_scene.light_registry.remove(obj)
 
                     # We just deleted a light filter. We need to tell all lights
                     # associated with this light filter to update
@@ -788,11 +803,7 @@ class RmanSceneSync(object):
                             rman_sg_light = self.rman_scene.rman_objects.get(light_ob.original, None)
                             if rman_sg_light:
                                 self.rman_scene.rman_translators['LIGHT'].update_light_filters(light_ob, rman_sg_light)                                
-                    try:
-                        self.rman_scene.processed_obs.remove(obj)
-                    except ValueError:
-                        rfb_log().debug("Obj not in self.rman_scene.processed_obs: %s")
-                        pass
+                    self.rman_scene.processed_obs.discard(obj)
 
                 if self.rman_scene.render_default_light:
                     self.rman_scene.scene_any_lights = self.rman_scene._scene_has_lights()     
@@ -867,6 +878,9 @@ class RmanSceneSync(object):
         translator = self.rman_scene.rman_translators["MATERIAL"]     
         has_meshlight = rman_sg_material.has_meshlight   
         rfb_log().debug("Manual material update called for: %s." % mat.name)
+        # manual updates are issued for changes the node signatures 
+        # don't see, like solo nodes and converted textures
+        rman_sg_material.shader_cache.clear()
         with self.rman_scene.rman.SGManager.ScopedEdit(self.rman_scene.sg_scene):                  
             translator.update(mat, rman_sg_material)
 
@@ -909,7 +923,7 @@ class RmanSceneSync(object):
         self.rman_scene.scene_solo_light = self.rman_scene.bl_scene.renderman.solo_light
                     
         with self.rman_scene.rman.SGManager.ScopedEdit(self.rman_scene.sg_scene):            
-            for light_ob in scene_utils.get_all_lights(self.rman_scene.bl_scene, include_light_filters=False):
+            for light_ob in self.rman_scene.light_registry.get_lights(include_light_filters=False):
                 rman_sg_node = self.rman_scene.rman_objects.get(light_ob.original, None)
                 if not rman_sg_node:
                     continue
@@ -930,7 +944,7 @@ class RmanSceneSync(object):
         self.rman_scene.scene_solo_light = self.rman_scene.bl_scene.renderman.solo_light
                     
         with self.rman_scene.rman.SGManager.ScopedEdit(self.rman_scene.sg_scene):                                               
-            for light_ob in scene_utils.get_all_lights(self.rman_scene.bl_scene, include_light_filters=False):
+            for light_ob in self.rman_scene.light_registry.get_lights(include_light_filters=False):
                 rman_sg_node = self.rman_scene.rman_objects.get(light_ob.original, None)
                 if not rman_sg_node:
                     continue
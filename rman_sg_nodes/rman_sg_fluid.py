@@ -3,4 +3,15 @@ from .rman_sg_node import RmanSgNode
 class RmanSgFluid(RmanSgNode):
 
     def __init__(self, rman_scene, sg_node, db_name):
-        super().__init__(rman_scene, sg_node, db_name)
\ No newline at end of file
+        super().__init__(rman_scene, sg_node, db_name)
+
+        # buffers the grids are read into from the domain
+        self.grids = dict()
+
+    @property
+    def grids(self):
+        return self.__grids
+
+    @grids.setter
+    def grids(self, grids):
+        self.__grids = grids
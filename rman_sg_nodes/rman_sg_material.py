@@ -10,6 +10,10 @@ class RmanSgMaterial(RmanSgNode):
         self.sg_stroke_mat = None
         self.sg_fill_mat = None
 
+        # shaders emitted for each node in the material's node tree, keyed by
+        # node name. Each entry is a (signature, list of RixSGShader) tuple.
+        self.shader_cache = dict()
+
     @property
     def has_meshlight(self):
         return self.__has_meshlight
@@ -40,4 +44,12 @@ class RmanSgMaterial(RmanSgNode):
 
     @sg_fill_mat.setter
     def sg_fill_mat(self, sg_fill_mat):
-        self.__sg_fill_mat = sg_fill_mat                                  
\ No newline at end of file
+        self.__sg_fill_mat = sg_fill_mat
+
+    @property
+    def shader_cache(self):
+        return self.__shader_cache
+
+    @shader_cache.setter
+    def shader_cache(self, shader_cache):
+        self.__shader_cache = shader_cache                                  
\ No newline at end of file
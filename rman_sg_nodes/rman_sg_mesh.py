@@ -13,6 +13,9 @@ class RmanSgMesh(RmanSgNode):
         self.is_multi_material = False
         self.multi_material_children = []
 
+        # objects that share this mesh
+        self.shared_obs = set()
+
     @property
     def matrix_world(self):
         return self.__matrix_world
@@ -45,6 +48,14 @@ class RmanSgMesh(RmanSgNode):
     def nverts(self, nverts):
         self.__nverts = nverts 
 
+    @property
+    def shared_obs(self):
+        return self.__shared_obs
+
+    @shared_obs.setter
+    def shared_obs(self, shared_obs):
+        self.__shared_obs = shared_obs
+
     @property
     def is_subdiv(self):
         return self.__is_subdiv
@@ -6,9 +6,44 @@ from ..rfb_utils import scenegraph_utils
 
 import bpy
 import math
-
-def valid_particle(pa, valid_frames):
-    return pa.die_time >= valid_frames[-1] and pa.birth_time <= valid_frames[0]
+import numpy as np
+
+def _foreach_get_(collection, attr, num_components=1):
+    data = np.zeros(len(collection) * num_components, dtype=np.float32)
+    collection.foreach_get(attr, data)
+    if num_components > 1:
+        data = np.reshape(data, (-1, num_components))
+    return data
+
+class ParticleData(object):
+    '''
+    Per particle attributes of a particle system, restricted to the particles
+    that are alive for all of valid_frames. Attributes are read in one 
+    foreach_get call the first time they are asked for, and masked with 
+    the same validity mask.
+    '''
+
+    def __init__(self, psys, valid_frames):
+        self.particles = psys.particles
+        self.attrs = dict()
+        birth_time = _foreach_get_(self.particles, 'birth_time')
+        die_time = _foreach_get_(self.particles, 'die_time')
+        self.mask = (die_time >= valid_frames[-1]) & (birth_time <= valid_frames[0])
+        self.attrs['birth_time'] = birth_time[self.mask]
+        self.attrs['die_time'] = die_time[self.mask]
+
+    def __len__(self):
+        return len(self.attrs['birth_time'])
+
+    def get(self, attr, num_components=1):
+        data = self.attrs.get(attr, None)
+        if data is None:
+            data = _foreach_get_(self.particles, attr, num_components)[self.mask]
+            self.attrs[attr] = data
+        return data
+
+    def get_ids(self):
+        return np.flatnonzero(self.mask).astype(np.float32)
 
 class RmanEmitterTranslator(RmanTranslator):
 
@@ -16,71 +51,54 @@ class RmanEmitterTranslator(RmanTranslator):
         super().__init__(rman_scene)
         self.bl_type = 'EMITTER' 
 
-    def get_particles(self, ob, psys, inv_mtx, valid_frames=None):
-        P = []
-        rot = []
-        width = []
+    def get_particles(self, ob, psys, inv_mtx, valid_frames=None, pdata=None):
+        cfra = self.rman_scene.bl_scene.frame_current
+        valid_frames = (cfra, cfra) if valid_frames is None else valid_frames
+        if pdata is None:
+            pdata = ParticleData(psys, valid_frames)
 
-        valid_frames = (self.rman_scene.bl_scene.frame_current,
-                        self.rman_scene.bl_scene.frame_current) if valid_frames is None else valid_frames
-        
-        for pa in [p for p in psys.particles if valid_particle(p, valid_frames)]:
-            pt = inv_mtx @ pa.location
-            P.extend(pt)
-            rot.extend(pa.rotation)
-
-            if pa.alive_state != 'ALIVE':
-                width.append(0.0)
-            else:
-                width.append(pa.size)
-        return (P, rot, width)    
-
-    def get_primvars_particle(self, primvar, psys, subframes, sample):
+        inv_mtx = np.array(inv_mtx, dtype=np.float32)
+        P = pdata.get('location', 3) @ inv_mtx[:3, :3].T + inv_mtx[:3, 3]
+        rot = pdata.get('rotation', 4)
+
+        # alive_state is an enum, which foreach_get can't read. Derive it 
+        # from the birth and die times instead
+        alive = (pdata.get('birth_time') <= cfra) & (pdata.get('die_time') > cfra)
+        width = np.where(alive, pdata.get('size'), 0.0).astype(np.float32)
+
+        return (np.ascontiguousarray(P, dtype=np.float32), rot, width)
+
+    def get_primvars_particle(self, primvar, psys, subframes, sample, pdata=None):
         rm = psys.settings.renderman
         cfra = self.rman_scene.bl_scene.frame_current
+        if pdata is None:
+            pdata = ParticleData(psys, subframes)
 
         for p in rm.prim_vars:
-            pvars = []
-
             if p.data_source in ('VELOCITY', 'ANGULAR_VELOCITY'):
                 if p.data_source == 'VELOCITY':
-                    for pa in \
-                            [p for p in psys.particles if valid_particle(p, subframes)]:
-                        pvars.extend(pa.velocity)
+                    pvars = pdata.get('velocity', 3)
                 elif p.data_source == 'ANGULAR_VELOCITY':
-                    for pa in \
-                            [p for p in psys.particles if valid_particle(p, subframes)]:
-                        pvars.extend(pa.angular_velocity)
+                    pvars = pdata.get('angular_velocity', 3)
 
-                primvar.SetFloatArrayDetail(p.name, pvars, 3, "uniform", sample)
+                scenegraph_utils.set_primvar_detail(primvar, 'SetFloatArrayDetail', p.name, np.ravel(pvars), 3, "uniform", sample)
 
             elif p.data_source in \
                     ('SIZE', 'AGE', 'BIRTH_TIME', 'DIE_TIME', 'LIFE_TIME', 'ID'):
                 if p.data_source == 'SIZE':
-                    for pa in \
-                            [p for p in psys.particles if valid_particle(p, subframes)]:
-                        pvars.append(pa.size)
+                    pvars = pdata.get('size')
                 elif p.data_source == 'AGE':
-                    for pa in \
-                            [p for p in psys.particles if valid_particle(p, subframes)]:
-                        pvars.append((cfra - pa.birth_time) / pa.lifetime)
+                    pvars = (cfra - pdata.get('birth_time')) / pdata.get('lifetime')
                 elif p.data_source == 'BIRTH_TIME':
-                    for pa in \
-                            [p for p in psys.particles if valid_particle(p, subframes)]:
-                        pvars.append(pa.birth_time)
+                    pvars = pdata.get('birth_time')
                 elif p.data_source == 'DIE_TIME':
-                    for pa in \
-                            [p for p in psys.particles if valid_particle(p, subframes)]:
-                        pvars.append(pa.die_time)
+                    pvars = pdata.get('die_time')
                 elif p.data_source == 'LIFE_TIME':
-                    for pa in \
-                            [p for p in psys.particles if valid_particle(p, subframes)]:
-                        pvars.append(pa.lifetime)
+                    pvars = pdata.get('lifetime')
                 elif p.data_source == 'ID':
-                    pvars = [id for id, p in psys.particles.items(
-                    ) if valid_particle(p, subframes)]
+                    pvars = pdata.get_ids()
                 
-                primvar.SetFloatDetail(p.name, pvars, "varying", sample)         
+                scenegraph_utils.set_primvar_detail(primvar, 'SetFloatDetail', p.name, pvars, "varying", sample)         
 
     def export(self, ob, psys, db_name):
 
@@ -97,11 +115,11 @@ class RmanEmitterTranslator(RmanTranslator):
         inv_mtx = ob.matrix_world.inverted_safe()
         P, rot, width = self.get_particles(ob, psys, inv_mtx)
 
-        if (len(P) < 3):
+        if (len(P) < 1):
             return
 
         primvar = sg_emitter_node.GetPrimVars()
-        primvar.SetPointDetail(self.rman_scene.rman.Tokens.Rix.k_P, P, "vertex", time_sample)
+        scenegraph_utils.set_primvar_detail(primvar, 'SetPointDetail', self.rman_scene.rman.Tokens.Rix.k_P, P, "vertex", time_sample)
 
         sg_emitter_node.SetPrimVars(primvar)     
 
@@ -122,12 +140,14 @@ class RmanEmitterTranslator(RmanTranslator):
 
         rm = psys.settings.renderman
         inv_mtx = ob.matrix_world.inverted_safe()
-        P, rot, width = self.get_particles(ob, psys, inv_mtx)
+        cfra = self.rman_scene.bl_scene.frame_current
+        pdata = ParticleData(psys, (cfra, cfra))
+        P, rot, width = self.get_particles(ob, psys, inv_mtx, pdata=pdata)
 
-        if (len(P) < 3):
+        if (len(P) < 1):
             return
 
-        nm_pts = int(len(P)/3)
+        nm_pts = len(P)
         sg_emitter_node.Define(nm_pts)          
 
         primvar = sg_emitter_node.GetPrimVars()
@@ -137,14 +157,14 @@ class RmanEmitterTranslator(RmanTranslator):
             super().set_primvar_times(rman_sg_emitter.motion_steps, primvar)
         
         
-        self.get_primvars_particle(primvar,  psys, [self.rman_scene.bl_scene.frame_current], 0)      
+        self.get_primvars_particle(primvar,  psys, [cfra], 0, pdata=pdata)      
         
-        primvar.SetPointDetail(self.rman_scene.rman.Tokens.Rix.k_P, P, "vertex")                   
+        scenegraph_utils.set_primvar_detail(primvar, 'SetPointDetail', self.rman_scene.rman.Tokens.Rix.k_P, P, "vertex")                   
         if rm.constant_width:
             width = rm.width
             primvar.SetFloatDetail(self.rman_scene.rman.Tokens.Rix.k_constantwidth, width, "constant")
         else:
-            primvar.SetFloatDetail(self.rman_scene.rman.Tokens.Rix.k_width, width, "vertex")                     
+            scenegraph_utils.set_primvar_detail(primvar, 'SetFloatDetail', self.rman_scene.rman.Tokens.Rix.k_width, width, "vertex")                     
 
         sg_emitter_node.SetPrimVars(primvar)
 
@@ -2,8 +2,10 @@ from .rman_translator import RmanTranslator
 from ..rman_sg_nodes.rman_sg_fluid import RmanSgFluid
 from ..rfb_utils import transform_utils
 from ..rfb_utils import string_utils
+from ..rfb_utils import scenegraph_utils
 import bpy
 import os
+import numpy as np
 
 def locate_openVDB_cache(cache_dir, frameNum):
     if not bpy.data.is_saved:
@@ -85,11 +87,37 @@ class RmanFluidTranslator(RmanTranslator):
         primvar.SetString(self.rman_scene.rman.Tokens.Rix.k_Ri_type, "box")
         primvar.SetFloatArray(self.rman_scene.rman.Tokens.Rix.k_Ri_Bound, transform_utils.convert_ob_bounds(ob.bound_box), 6)
 
-        primvar.SetFloatDetail("density", fluid_data.density_grid, "varying")
-        primvar.SetFloatDetail("flame", fluid_data.flame_grid, "varying")   
-        primvar.SetFloatDetail("heat", fluid_data.heat_grid, "varying")
-        primvar.SetColorDetail("color", [item for index, item in enumerate(fluid_data.color_grid) if index % 4 != 0], "varying")
-        primvar.SetVectorDetail("velocity", fluid_data.velocity_grid, "varying")
-        primvar.SetFloatDetail("temperature", fluid_data.temperature_grid, "varying")
+        grids = self.get_grids(rman_sg_fluid, fluid_data)
+
+        scenegraph_utils.set_primvar_detail(primvar, 'SetFloatDetail', "density", grids['density_grid'], "varying")
+        scenegraph_utils.set_primvar_detail(primvar, 'SetFloatDetail', "flame", grids['flame_grid'], "varying")
+        scenegraph_utils.set_primvar_detail(primvar, 'SetFloatDetail', "heat", grids['heat_grid'], "varying")
+        scenegraph_utils.set_primvar_detail(primvar, 'SetColorDetail', "color", grids['color_grid'], "varying")
+        scenegraph_utils.set_primvar_detail(primvar, 'SetVectorDetail', "velocity", grids['velocity_grid'], "varying")
+        scenegraph_utils.set_primvar_detail(primvar, 'SetFloatDetail', "temperature", grids['temperature_grid'], "varying")
 
         rman_sg_fluid.sg_node.SetPrimVars(primvar)     
+
+    def get_grids(self, rman_sg_fluid, fluid_data):
+        '''
+        Read the grids from the domain into NumPy arrays. The grids are read 
+        again on every update, but the arrays are kept on rman_sg_fluid and 
+        reused as long as the domain resolution doesn't change.
+        '''
+        grids = rman_sg_fluid.grids
+        for nm in ['density_grid', 'flame_grid', 'heat_grid', 'color_grid', 'velocity_grid', 'temperature_grid']:
+            grid = getattr(fluid_data, nm)
+            buf = grids.get(nm, None)
+            if nm == 'color_grid':
+                buf = grids.get('color_grid_rgba', None)
+            if buf is None or len(buf) != len(grid):
+                buf = np.zeros(len(grid), dtype=np.float32)
+            grid.foreach_get(buf)
+            if nm == 'color_grid':
+                # strip alpha from RGBA
+                grids['color_grid_rgba'] = buf
+                buf = np.ascontiguousarray(np.reshape(buf, (-1, 4))[:, :3])
+            grids[nm] = buf
+
+        rman_sg_fluid.grids = grids
+        return grids
@@ -4,7 +4,7 @@ from ..rfb_utils import object_utils
 from ..rfb_utils import string_utils
 from ..rfb_utils import scenegraph_utils
 from ..rfb_logger import rfb_log
-from mathutils import Vector, Matrix
+from mathutils import Matrix
 
 import bpy
 import math
@@ -42,162 +42,168 @@ class RmanGPencilTranslator(RmanTranslator):
 
         return True    
 
-    def _create_mesh(self, ob, i, lyr, stroke, rman_sg_gpencil, rman_sg_material, adjust_point=False):
-
-        gp_ob = ob.data     
-
-        pts = stroke.points
-        nverts = []
-        verts = []
-        st = []
-
-        mesh_sg = self.rman_scene.sg_scene.CreateMesh('%s-MESH-%d' % (lyr.info, i))
-
-        # get points
-        num_pts = len(pts)
+    def _get_stroke_points_(self, stroke):
+        num_pts = len(stroke.points)
         P = np.zeros(num_pts*3, dtype=np.float32)
-        pts.foreach_get('co', P)
-        P = np.reshape(P, (num_pts, 3))
-        P = P.tolist()
-
-        if hasattr(pts[0], 'uv_fill'):
-            st = np.zeros(num_pts*2, dtype=np.float32)
-            pts.foreach_get('uv_fill', st)
-            st = np.reshape(st, (num_pts, 2))
-            st = st.tolist()                
-
-        for t in stroke.triangles:
-            nverts.append(3)
-            verts.append(t.v1)
-            verts.append(t.v2)
-            verts.append(t.v3)       
-
-            if adjust_point:
-
-                if _ADJUST_IN_NORMAL_DIR_FOR_FILLS_:
-                    # move each point in the normal direction a little bit
-                    # for fills                
-                    p1 = Vector(pts[t.v1].co)
-                    p2 = Vector(pts[t.v2].co)
-                    p3 = Vector(pts[t.v3].co)
-                    vec1 = p1 - p2
-                    vec2 = p1 - p3
-                    normal = vec2.cross(vec1).normalized()
-                    epsilon = normal * i * _BIAS_
-
-                    P[t.v1] = Vector(P[t.v1]) + epsilon
-                    P[t.v2] = Vector(P[t.v2]) + epsilon
-                    P[t.v3] = Vector(P[t.v3]) + epsilon
-
-                else:
-                    # get camera position
-                    cam_pos, rot, sca = self.rman_scene.main_camera.bl_camera.matrix_world.decompose()
-
-                    epsilon = i * _BIAS_
-                    P[t.v1] = Vector(P[t.v1]) + ((cam_pos - Vector(P[t.v1])).normalized() * epsilon)
-                    P[t.v2] = Vector(P[t.v2]) + ((cam_pos - Vector(P[t.v2])).normalized() * epsilon)
-                    P[t.v3] = Vector(P[t.v3]) + ((cam_pos - Vector(P[t.v3])).normalized() * epsilon)
+        stroke.points.foreach_get('co', P)
+        return np.reshape(P, (num_pts, 3))
 
-
-        num_polygons = len(stroke.triangles)
+    def _get_stroke_widths_(self, stroke, width_factor):
+        num_pts = len(stroke.points)
+        widths = np.zeros(num_pts, dtype=np.float32)
+        stroke.points.foreach_get('pressure', widths)
+        return widths * (width_factor * stroke.line_width)
+
+    def _get_stroke_triangles_(self, stroke):
+        num_tris = len(stroke.triangles)
+        tris = np.zeros((3, num_tris), dtype=np.int32)
+        stroke.triangles.foreach_get('v1', tris[0])
+        stroke.triangles.foreach_get('v2', tris[1])
+        stroke.triangles.foreach_get('v3', tris[2])
+        return tris.T
+
+    def _adjust_points_towards_camera_(self, P, bias):
+        # move each point towards the camera a little bit, by
+        # its stroke's bias
+        cam_pos = np.array(self.rman_scene.main_camera.bl_camera.matrix_world.to_translation(), dtype=np.float32)
+        dirs = cam_pos - P
+        lengths = np.linalg.norm(dirs, axis=1)
+        lengths[lengths == 0.0] = 1.0
+        return P + dirs * (bias / lengths)[:, None]
+
+    def _create_mesh(self, ob, i, lyr, strokes, rman_sg_gpencil, rman_sg_material, adjust_point=False):
+        # create a single mesh for the fills of all strokes, where strokes is a 
+        # list of (bias index, stroke)
+        P = list()
+        verts = list()
+        st = list()
+        bias = list()
+        num_pts = 0
+        for j, stroke in strokes:
+            pts = self._get_stroke_points_(stroke)
+            tris = self._get_stroke_triangles_(stroke)
+
+            if hasattr(stroke.points[0], 'uv_fill'):
+                uvs = np.zeros(len(pts)*2, dtype=np.float32)
+                stroke.points.foreach_get('uv_fill', uvs)
+                st.append(np.reshape(uvs, (len(pts), 2)))
+
+            if adjust_point and _ADJUST_IN_NORMAL_DIR_FOR_FILLS_:
+                # move each point in the normal direction a little bit
+                # for fills
+                p1 = pts[tris[:, 0]]
+                normals = np.cross(p1 - pts[tris[:, 2]], p1 - pts[tris[:, 1]])
+                lengths = np.linalg.norm(normals, axis=1)
+                lengths[lengths == 0.0] = 1.0
+                epsilon = normals * (j * _BIAS_ / lengths)[:, None]
+                adjusted = pts.copy()
+                for k in range(3):
+                    np.add.at(adjusted, tris[:, k], epsilon)
+                pts = adjusted
+
+            P.append(pts)
+            verts.append(tris.flatten() + num_pts)
+            bias.append(np.full(len(pts), j * _BIAS_, dtype=np.float32))
+            num_pts += len(pts)
+
+        P = np.concatenate(P)
+        verts = np.concatenate(verts)
+        if adjust_point and not _ADJUST_IN_NORMAL_DIR_FOR_FILLS_:
+            P = self._adjust_points_towards_camera_(P, np.concatenate(bias))
+
+        num_polygons = len(verts) // 3
         num_verts = len(verts)
+        nverts = np.full(num_polygons, 3, dtype=np.int32)
+
+        mesh_sg = self.rman_scene.sg_scene.CreateMesh('%s-MESH-%d' % (lyr.info, i))
         mesh_sg.Define( num_polygons, num_pts, num_verts )
                             
         primvar = mesh_sg.GetPrimVars()
-        primvar.SetPointDetail(self.rman_scene.rman.Tokens.Rix.k_P, P, "vertex")
+        scenegraph_utils.set_primvar_detail(primvar, 'SetPointDetail', self.rman_scene.rman.Tokens.Rix.k_P, P, "vertex")
 
-        primvar.SetIntegerDetail(self.rman_scene.rman.Tokens.Rix.k_Ri_nvertices, nverts, "uniform")
-        primvar.SetIntegerDetail(self.rman_scene.rman.Tokens.Rix.k_Ri_vertices, verts, "facevarying")  
-        if st:
-            primvar.SetFloatArrayDetail("st", st, 2, "vertex")  
+        scenegraph_utils.set_primvar_detail(primvar, 'SetIntegerDetail', self.rman_scene.rman.Tokens.Rix.k_Ri_nvertices, nverts, "uniform")
+        scenegraph_utils.set_primvar_detail(primvar, 'SetIntegerDetail', self.rman_scene.rman.Tokens.Rix.k_Ri_vertices, verts, "facevarying")  
+        if len(st) == len(strokes):
+            scenegraph_utils.set_primvar_detail(primvar, 'SetFloatArrayDetail', "st", np.concatenate(st), 2, "vertex")
         mesh_sg.SetPrimVars(primvar)
         if rman_sg_material:
             scenegraph_utils.set_material(mesh_sg, rman_sg_material.sg_fill_mat)
         rman_sg_gpencil.sg_node.AddChild(mesh_sg)     
 
-    def _create_points(self, ob, i, lyr, stroke, rman_sg_gpencil, rman_sg_material, adjust_point=False):
-        gp_ob = ob.data 
-
-        num_pts = len(stroke.points)
-        points = np.zeros(num_pts*3, dtype=np.float32)
-        widths = np.zeros(num_pts, dtype=np.float32)
-        stroke.points.foreach_get('co', points)
-        stroke.points.foreach_get('pressure', widths)
-
-        points = np.reshape(points, (num_pts, 3))
-        points = points.tolist()    
+    def _create_points(self, ob, i, lyr, strokes, rman_sg_gpencil, rman_sg_material, adjust_point=False):
+        # create a single points primitive for all strokes, where strokes is a 
+        # list of (bias index, stroke)
+        points = [self._get_stroke_points_(stroke) for j, stroke in strokes]
+        widths = [self._get_stroke_widths_(stroke, 0.0012) for j, stroke in strokes] #0.03
 
         if adjust_point:
-            cam_pos, rot, sca = self.rman_scene.main_camera.bl_camera.matrix_world.decompose()
-            for j, pt in enumerate(points):
-                epsilon = i * _BIAS_            
-                points[j] = Vector(pt) + ((cam_pos - Vector(pt)).normalized() * epsilon)              
-        
-        width_factor = 0.0012 * stroke.line_width
-        widths = widths * width_factor #0.03
-        widths = widths.tolist()
+            bias = [np.full(len(pts), j * _BIAS_, dtype=np.float32) for (j, stroke), pts in zip(strokes, points)]
+            points = [self._adjust_points_towards_camera_(np.concatenate(points), np.concatenate(bias))]
+
+        points = np.concatenate(points)
+        widths = np.concatenate(widths)
+        num_pts = len(points)
 
         points_sg = self.rman_scene.sg_scene.CreatePoints("%s-DOTS-%d" % (lyr.info, i))
-        i += 1                
         points_sg.Define(num_pts)
         primvar = points_sg.GetPrimVars()
 
-        primvar.SetPointDetail(self.rman_scene.rman.Tokens.Rix.k_P, points, "vertex")  
-        primvar.SetFloatDetail(self.rman_scene.rman.Tokens.Rix.k_width, widths, "vertex")              
+        scenegraph_utils.set_primvar_detail(primvar, 'SetPointDetail', self.rman_scene.rman.Tokens.Rix.k_P, points, "vertex")  
+        scenegraph_utils.set_primvar_detail(primvar, 'SetFloatDetail', self.rman_scene.rman.Tokens.Rix.k_width, widths, "vertex")              
                     
         points_sg.SetPrimVars(primvar)
 
         # Attach material
         if rman_sg_material:
-            scenegraph_utils.set_material(points_sg, rman_sg_material.sg_strok_mat)
+            scenegraph_utils.set_material(points_sg, rman_sg_material.sg_stroke_mat)
 
         rman_sg_gpencil.sg_node.AddChild(points_sg)                     
         
-    def _create_curve(self, ob, i, lyr, stroke, rman_sg_gpencil, rman_sg_material, adjust_point=False):
-        gp_ob = ob.data       
-
-        vertsArray = []
-        num_pts = len(stroke.points)
-        points = np.zeros(num_pts*3, dtype=np.float32)
-        widths = np.zeros(num_pts, dtype=np.float32)
-        stroke.points.foreach_get('co', points)
-        stroke.points.foreach_get('pressure', widths)
-
-        points = np.reshape(points, (num_pts, 3))
-        points = points.tolist()        
-        
-        width_factor = 0.00083 * stroke.line_width
-        widths = widths * width_factor #0.05
-        widths = widths.tolist()
-
-        # double the first and last
-        points = points[:1] + \
-            points + points[-1:]
-
-        if len(points) < 4:
-            # not enough points to be a curve. export as points
-            self._create_points(ob, i, lyr, stroke, rman_sg_gpencil, rman_sg_material, adjust_point=adjust_point)
+    def _create_curve(self, ob, i, lyr, strokes, rman_sg_gpencil, rman_sg_material, adjust_point=False):
+        # create a single curves primitive for all strokes, where strokes is a 
+        # list of (bias index, stroke). Strokes with too few points to be a
+        # curve are exported as points.
+        points = list()
+        widths = list()
+        bias = list()
+        vertsArray = list()
+        dots = list()
+        for j, stroke in strokes:
+            if len(stroke.points) < 2:
+                # not enough points to be a curve, even after
+                # doubling the first and last
+                dots.append((j, stroke))
+                continue
+            pts = self._get_stroke_points_(stroke)
+            w = self._get_stroke_widths_(stroke, 0.00083) #0.05
+
+            # double the first and last
+            idx = np.concatenate(([0], np.arange(len(pts)), [len(pts)-1]))
+            points.append(pts[idx])
+            widths.append(w[idx])
+            bias.append(np.full(len(idx), j * _BIAS_, dtype=np.float32))
+            vertsArray.append(len(idx))
+
+        if dots:
+            self._create_points(ob, i, lyr, dots, rman_sg_gpencil, rman_sg_material, adjust_point=adjust_point)
+        if not vertsArray:
             return
 
+        points = np.concatenate(points)
+        widths = np.concatenate(widths)
         if adjust_point:
-            cam_pos, rot, sca = self.rman_scene.main_camera.bl_camera.matrix_world.decompose()            
-            for j, pt in enumerate(points):
-                epsilon = i * _BIAS_            
-                points[j] = Vector(pt) + ((cam_pos - Vector(pt)).normalized() * epsilon)            
-
-        widths = widths[:1] + widths + widths[-1:]
-        vertsArray.append(len(points))
+            points = self._adjust_points_towards_camera_(points, np.concatenate(bias))
+        vertsArray = np.array(vertsArray, dtype=np.int32)
 
         curves_sg = self.rman_scene.sg_scene.CreateCurves("%s-STROKE-%d" % (lyr.info, i))
-        i += 1                
         curves_sg.Define(self.rman_scene.rman.Tokens.Rix.k_cubic, "nonperiodic", "catmull-rom", len(vertsArray), len(points))
         primvar = curves_sg.GetPrimVars()
 
-        primvar.SetPointDetail(self.rman_scene.rman.Tokens.Rix.k_P, points, "vertex")                
-        primvar.SetIntegerDetail(self.rman_scene.rman.Tokens.Rix.k_Ri_nvertices, vertsArray, "uniform")
-        primvar.SetIntegerDetail("index", range(len(vertsArray)), "uniform")
+        scenegraph_utils.set_primvar_detail(primvar, 'SetPointDetail', self.rman_scene.rman.Tokens.Rix.k_P, points, "vertex")                
+        scenegraph_utils.set_primvar_detail(primvar, 'SetIntegerDetail', self.rman_scene.rman.Tokens.Rix.k_Ri_nvertices, vertsArray, "uniform")
+        scenegraph_utils.set_primvar_detail(primvar, 'SetIntegerDetail', "index", np.arange(len(vertsArray), dtype=np.int32), "uniform")
 
-        primvar.SetFloatDetail(self.rman_scene.rman.Tokens.Rix.k_width, widths, "vertex")
+        scenegraph_utils.set_primvar_detail(primvar, 'SetFloatDetail', self.rman_scene.rman.Tokens.Rix.k_width, widths, "vertex")
                     
         curves_sg.SetPrimVars(primvar)
 
@@ -212,6 +218,7 @@ class RmanGPencilTranslator(RmanTranslator):
         gp_ob = ob.data
 
         j = 0
+        n = 0
         for nm,lyr in gp_ob.layers.items():
             if lyr.hide:
                 continue
@@ -219,6 +226,12 @@ class RmanGPencilTranslator(RmanTranslator):
             frame = lyr.active_frame
             if not frame:
                 continue
+
+            # gather the strokes of this layer by material, so that each
+            # material gets a single mesh, points and curves primitive
+            fills = dict()
+            dots = dict()
+            curves = dict()
             for i, stroke in enumerate(frame.strokes):
                 j += i
                 mat =  gp_ob.materials[stroke.material_index]
@@ -226,18 +239,22 @@ class RmanGPencilTranslator(RmanTranslator):
                     continue      
                 rman_sg_material = self.rman_scene.rman_materials.get(mat.original, None)
 
-                if len(stroke.triangles) > 0 and rman_sg_material.sg_fill_mat:
-                    self._create_mesh(ob, j, lyr, stroke, rman_sg_gpencil, rman_sg_material, adjust_point=_ADJUST_POINT_) 
-                    if rman_sg_material.sg_stroke_mat:
-                        if mat.grease_pencil.mode in ['DOTS', 'BOX']:
-                            self._create_points(ob, j, lyr, stroke, rman_sg_gpencil, rman_sg_material, adjust_point=_ADJUST_POINT_)
-                        else:
-                            self._create_curve(ob, j, lyr, stroke, rman_sg_gpencil, rman_sg_material, adjust_point=_ADJUST_POINT_)                        
-
+                if len(stroke.triangles) > 0 and rman_sg_material and rman_sg_material.sg_fill_mat:
+                    fills.setdefault(mat.original, (rman_sg_material, list()))[1].append((j, stroke))
+                    if not rman_sg_material.sg_stroke_mat:
+                        continue
+                if mat.grease_pencil.mode in ['DOTS', 'BOX']:
+                    dots.setdefault(mat.original, (rman_sg_material, list()))[1].append((j, stroke))
                 else:
-                    if mat.grease_pencil.mode in ['DOTS', 'BOX']:
-                        self._create_points(ob, j, lyr, stroke, rman_sg_gpencil, rman_sg_material, adjust_point=_ADJUST_POINT_)
-                    else:
-                        self._create_curve(ob, j, lyr, stroke, rman_sg_gpencil, rman_sg_material, adjust_point=_ADJUST_POINT_)               
-                i +=1
-            j += 1
\ No newline at end of file
+                    curves.setdefault(mat.original, (rman_sg_material, list()))[1].append((j, stroke))
+            j += 1
+
+            for rman_sg_material, strokes in fills.values():
+                self._create_mesh(ob, n, lyr, strokes, rman_sg_gpencil, rman_sg_material, adjust_point=_ADJUST_POINT_) 
+                n += 1
+            for rman_sg_material, strokes in dots.values():
+                self._create_points(ob, n, lyr, strokes, rman_sg_gpencil, rman_sg_material, adjust_point=_ADJUST_POINT_)
+                n += 1
+            for rman_sg_material, strokes in curves.values():
+                self._create_curve(ob, n, lyr, strokes, rman_sg_gpencil, rman_sg_material, adjust_point=_ADJUST_POINT_)
+                n += 1
@@ -3,12 +3,49 @@ from ..rman_sg_nodes.rman_sg_group import RmanSgGroup
 from ..rfb_utils import transform_utils
 from ..rfb_utils import object_utils
 from mathutils import Matrix
+from contextlib import contextmanager
 import math
 
 class RmanGroupTranslator(RmanTranslator):
 
     def __init__(self, rman_scene):
         super().__init__(rman_scene)
+        self._transform_batch = None
+
+    def begin_transform_batch(self):
+        '''Start collecting transforms. Until end_transform_batch() is called,
+        update_transform() and update_transform_sample() only record the
+        matrices, so they can all be converted at once.
+        '''
+        self._transform_batch = list()
+
+    def end_transform_batch(self):
+        '''Convert and set all of the transforms collected since
+        begin_transform_batch() was called.
+        '''
+        batch = self._transform_batch
+        self._transform_batch = None
+        if not batch:
+            return
+        mtxs = transform_utils.convert_matrices([b[3] for b in batch]).tolist()
+        for (rman_sg_group, index, seg, m), mtx in zip(batch, mtxs):
+            if index is None:
+                rman_sg_group.sg_node.SetTransform( mtx )
+            else:
+                rman_sg_group.sg_node.SetTransformSample( index, mtx, seg)
+
+    @contextmanager
+    def transform_batch(self):
+        '''Batch the transforms set inside a with block. They are converted
+        and set when the block exits. If the block raises, the collected
+        transforms are dropped, and batching is turned off.
+        '''
+        self.begin_transform_batch()
+        try:
+            yield
+            self.end_transform_batch()
+        finally:
+            self._transform_batch = None
 
     def update_transform(self, ob, rman_sg_group):
         if hasattr(ob, 'renderman') and  object_utils._detect_primitive_(ob) == 'LIGHTFILTER':
@@ -17,11 +54,16 @@ class RmanGroupTranslator(RmanTranslator):
             m = m @ Matrix.Rotation(math.radians(90.0), 4, 'Y')
             m = transform_utils.convert_matrix(m)
             rman_sg_group.sg_node.SetTransform(m)     
+        elif self._transform_batch is not None:
+            self._transform_batch.append((rman_sg_group, None, None, ob.matrix_world.copy()))
         else:       
             mtx = transform_utils.convert_matrix(ob.matrix_world.copy())
             rman_sg_group.sg_node.SetTransform( mtx )
 
     def update_transform_sample(self, ob, rman_sg_group, index, seg):
+        if self._transform_batch is not None:
+            self._transform_batch.append((rman_sg_group, index, seg, ob.matrix_world.copy()))
+            return
         mtx = transform_utils.convert_matrix(ob.matrix_world.copy())
         rman_sg_group.sg_node.SetTransformSample( index, mtx, seg)
 
@@ -31,4 +73,4 @@ class RmanGroupTranslator(RmanTranslator):
     def export(self, ob, db_name=""):
         sg_group = self.rman_scene.sg_scene.CreateGroup(db_name)
         rman_sg_group = RmanSgGroup(self.rman_scene, sg_group, db_name)
-        return rman_sg_group   
\ No newline at end of file
+        return rman_sg_group
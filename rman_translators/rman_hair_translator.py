@@ -31,13 +31,17 @@ class RmanHairTranslator(RmanTranslator):
     def export_deform_sample(self, rman_sg_hair, ob, psys, time_sample):
 
         curves = self._get_points(ob, psys)
+        if not curves:
+            return
         for i, points in enumerate(curves):
+            if i >= len(rman_sg_hair.sg_curves_list):
+                break
             curves_sg = rman_sg_hair.sg_curves_list[i]
             if not curves_sg:
                 continue
             primvar = curves_sg.GetPrimVars()
 
-            primvar.SetPointDetail(self.rman_scene.rman.Tokens.Rix.k_P, points, "vertex", time_sample)  
+            scenegraph_utils.set_primvar_detail(primvar, 'SetPointDetail', self.rman_scene.rman.Tokens.Rix.k_P, points, "vertex", time_sample)
             curves_sg.SetPrimVars(primvar)
 
     def update(self, ob, psys, rman_sg_hair):
@@ -54,20 +58,20 @@ class RmanHairTranslator(RmanTranslator):
             curves_sg.Define(self.rman_scene.rman.Tokens.Rix.k_cubic, "nonperiodic", "catmull-rom", len(vertsArray), len(points))
             primvar = curves_sg.GetPrimVars()
 
-            primvar.SetPointDetail(self.rman_scene.rman.Tokens.Rix.k_P, points, "vertex")                
-            primvar.SetIntegerDetail(self.rman_scene.rman.Tokens.Rix.k_Ri_nvertices, vertsArray, "uniform")
+            scenegraph_utils.set_primvar_detail(primvar, 'SetPointDetail', self.rman_scene.rman.Tokens.Rix.k_P, points, "vertex")
+            scenegraph_utils.set_primvar_detail(primvar, 'SetIntegerDetail', self.rman_scene.rman.Tokens.Rix.k_Ri_nvertices, vertsArray, "uniform")
             index_nm = psys.settings.renderman.hair_index_name
             if index_nm == '':
                 index_nm = 'index'
-            primvar.SetIntegerDetail(index_nm, range(len(vertsArray)), "uniform")
+            scenegraph_utils.set_primvar_detail(primvar, 'SetIntegerDetail', index_nm, np.arange(len(vertsArray), dtype=np.int32), "uniform")
 
-            width_detail = "constant"
-            if isinstance(widths, list):
-                width_detail = "vertex"
-            primvar.SetFloatDetail(self.rman_scene.rman.Tokens.Rix.k_width, widths, width_detail)
+            if isinstance(widths, np.ndarray):
+                scenegraph_utils.set_primvar_detail(primvar, 'SetFloatDetail', self.rman_scene.rman.Tokens.Rix.k_width, widths, "vertex")
+            else:
+                primvar.SetFloatDetail(self.rman_scene.rman.Tokens.Rix.k_width, widths, "constant")
             
-            if len(scalpST):
-                primvar.SetFloatArrayDetail("scalpST", scalpST, 2, "uniform")
+            if scalpST is not None and len(scalpST):
+                scenegraph_utils.set_primvar_detail(primvar, 'SetFloatArrayDetail', "scalpST", scalpST, 2, "uniform")
                     
             if rman_sg_hair.motion_steps:
                 super().set_primvar_times(rman_sg_hair.motion_steps, primvar)
@@ -92,193 +96,155 @@ class RmanHairTranslator(RmanTranslator):
         rman_sg_hair.instances[rman_sg_group.db_name] = rman_sg_group
         rman_sg_group.rman_sg_group_parent = rman_sg_particles
 
-    def _get_points(self, ob, psys):
-        psys_modifier = None
+    def _get_psys_modifier(self, ob, psys):
         for mod in ob.modifiers:
             if hasattr(mod, 'particle_system') and mod.particle_system == psys:
-                psys_modifier = mod
-                break
+                return mod
+        return None
 
+    def _is_psys_visible(self, psys_modifier):
+        if not psys_modifier:
+            return True
         if self.rman_scene.is_interactive:
-            if psys_modifier and not psys_modifier.show_viewport:
-                return None
-        else:
-            if psys_modifier and not psys_modifier.show_render:
-                return None             
-                
+            return psys_modifier.show_viewport
+        return psys_modifier.show_render
+
+    def _get_strand_points_(self, ob, psys):
+        '''
+        Gather the points of all strands in object space.
+
+        Returns:
+            (tuple) - P (float32, Nx3) with the first and last point of each strand 
+                      doubled, the number of vertices in each strand (int32), 
+                      and the particle index of each strand.
+        '''
+
         if self.rman_scene.is_interactive:
             steps = 2 ** psys.settings.display_step
         else:
             steps = 2 ** psys.settings.render_step
-            
+
         num_parents = len(psys.particles)
         num_children = len(psys.child_particles)
         total_hair_count = num_parents + num_children
-        curve_sets = []
-        points = []
-        vertsArray = []
-        nverts = 0
-
-        ob_inv_mtx = ob.matrix_world.inverted_safe()
-        
-        for pindex in range(total_hair_count):
-            if psys.settings.child_type != 'NONE' and pindex < num_parents:
-                continue
-
-            strand_points = []
-            # walk through each strand
-            for step in range(0, steps + 1):           
-                pt = psys.co_hair(ob, particle_no=pindex, step=step)
 
+        # when there are children, only the children are rendered
+        first_pindex = 0
+        if psys.settings.child_type != 'NONE':
+            first_pindex = num_parents
+        pindices = np.arange(first_pindex, total_hair_count, dtype=np.int32)
+
+        # walk through each strand. co_hair has no batched equivalent, so
+        # the only per point work left in Python is the call itself
+        co = np.zeros((len(pindices), steps + 1, 3), dtype=np.float32)
+        lengths = np.full(len(pindices), steps + 1, dtype=np.int32)
+        co_hair = psys.co_hair
+        for i, pindex in enumerate(pindices.tolist()):
+            strand = co[i]
+            for step in range(0, steps + 1):
+                pt = co_hair(ob, particle_no=pindex, step=step)
                 if pt.length_squared == 0:
-                    # this strand ends prematurely                    
-                    break                
-
-                # put points in object space
-                pt = ob_inv_mtx @ pt
-
-                strand_points.append(pt)
-
-            if len(strand_points) > 1:
-                # double the first and last
-                strand_points = strand_points[:1] + \
-                    strand_points + strand_points[-1:]
-                vertsInStrand = len(strand_points)
-
-                if vertsInStrand < 4:
-                    continue
+                    # this strand ends prematurely
+                    lengths[i] = step
+                    break
+                strand[step] = pt
+
+        # catmull-rom requires at least 4 vertices, including the doubled
+        # first and last points
+        keep = lengths > 1
+        co = co[keep]
+        lengths = lengths[keep]
+        pindices = pindices[keep]
+        vertsArray = lengths + 2
+
+        # double the first and last point of each strand
+        nverts = int(vertsArray.sum())
+        strand_idx = np.repeat(np.arange(len(vertsArray)), vertsArray)
+        local_idx = np.arange(nverts) - np.repeat(np.cumsum(vertsArray) - vertsArray, vertsArray)
+        src_idx = np.clip(local_idx - 1, 0, np.repeat(lengths - 1, vertsArray))
+        P = co[strand_idx, src_idx]
+
+        # put points in object space
+        ob_inv_mtx = np.array(ob.matrix_world.inverted_safe(), dtype=np.float32)
+        P = P @ ob_inv_mtx[:3, :3].T + ob_inv_mtx[:3, 3]
+
+        return (np.ascontiguousarray(P, dtype=np.float32), vertsArray.astype(np.int32), pindices)
+
+    def _split_strands_(self, vertsArray, max_verts=100000):
+        '''
+        Split the strands into sets, starting a new set once a set has more 
+        than max_verts vertices. This is to avoid a maxint on the array length.
+
+        Returns:
+            (list) - (first strand, last strand + 1, first vertex, last vertex + 1)
+                     for each set
+        '''
+        splits = []
+        vert_ends = np.cumsum(vertsArray)
+        strand_start = 0
+        vert_start = 0
+        while strand_start < len(vertsArray):
+            strand_end = int(np.searchsorted(vert_ends, vert_start + max_verts, side='right')) + 1
+            strand_end = min(strand_end, len(vertsArray))
+            vert_end = int(vert_ends[strand_end - 1])
+            splits.append((strand_start, strand_end, vert_start, vert_end))
+            strand_start = strand_end
+            vert_start = vert_end
+        return splits
 
-                # add the last point again
-                points.extend(strand_points)
-                vertsArray.append(vertsInStrand)
-                nverts += vertsInStrand
-
-            if nverts > 100000:
-                curve_sets.append(points)
-
-                nverts = 0
-                points = []
-                vertsArray = []
-
-        if nverts > 0:
-            curve_sets.append(points)
+    def _get_points(self, ob, psys):
+        psys_modifier = self._get_psys_modifier(ob, psys)
+        if not self._is_psys_visible(psys_modifier):
+            return None
 
-        return curve_sets              
-                    
+        P, vertsArray, pindices = self._get_strand_points_(ob, psys)
+        return [P[v0:v1] for (s0, s1, v0, v1) in self._split_strands_(vertsArray)]
 
     def _get_strands_(self, ob, psys):
 
-        psys_modifier = None
-        for mod in ob.modifiers:
-            if hasattr(mod, 'particle_system') and mod.particle_system == psys:
-                psys_modifier = mod
-                break
-
-        if self.rman_scene.is_interactive:
-            if psys_modifier and not psys_modifier.show_viewport:
-                return None
-        else:
-            if psys_modifier and not psys_modifier.show_render:
-                return None             
+        psys_modifier = self._get_psys_modifier(ob, psys)
+        if not self._is_psys_visible(psys_modifier):
+            return None
 
         tip_width = psys.settings.tip_radius * psys.settings.radius_scale
         base_width = psys.settings.root_radius * psys.settings.radius_scale
 
         conwidth = (tip_width == base_width)
 
-        if self.rman_scene.is_interactive:
-            steps = 2 ** psys.settings.display_step
-        else:
-            steps = 2 ** psys.settings.render_step        
-        
-        if conwidth:
-            hair_width = base_width
-        else:
-            hair_width = []
-
         num_parents = len(psys.particles)
-        num_children = len(psys.child_particles)
-        total_hair_count = num_parents + num_children
         export_st = psys.settings.renderman.export_scalp_st and psys_modifier and len(
             ob.data.uv_layers) > 0
 
-        curve_sets = []
-
-        points = []
-
-        vertsArray = []
-        scalpST = []
-        nverts = 0
+        P, vertsArray, pindices = self._get_strand_points_(ob, psys)
 
-        ob_inv_mtx = ob.matrix_world.inverted_safe()
-        
-        for pindex in range(total_hair_count):
-            if psys.settings.child_type != 'NONE' and pindex < num_parents:
-                continue
+        # for varying width make the width array
+        if conwidth:
+            hair_width = base_width
+        else:
+            nverts = np.repeat(vertsArray, vertsArray)
+            local_idx = np.arange(len(P)) - np.repeat(np.cumsum(vertsArray) - vertsArray, vertsArray)
+            decr = (base_width - tip_width) / (nverts - 2)
+            hair_width = (base_width - decr * (local_idx - 1)).astype(np.float32)
+            hair_width[local_idx == 0] = base_width
+            hair_width[local_idx == nverts - 1] = tip_width
+
+        # get the scalp ST
+        scalpST = None
+        if export_st:
+            scalpST = np.zeros((len(pindices), 2), dtype=np.float32)
+            for i, pindex in enumerate(pindices.tolist()):
+                if pindex >= num_parents:
+                    particle = psys.particles[
+                        (pindex - num_parents) % num_parents]
+                else:
+                    particle = psys.particles[pindex]
+                st = psys.uv_on_emitter(psys_modifier, particle=particle, particle_no=pindex)
+                scalpST[i] = (st[0], st[1])
 
-            strand_points = []
-            # walk through each strand
-            for step in range(0, steps + 1):           
-                pt = psys.co_hair(ob, particle_no=pindex, step=step)
+        curve_sets = []
+        for (s0, s1, v0, v1) in self._split_strands_(vertsArray):
+            widths = hair_width if conwidth else hair_width[v0:v1]
+            st = scalpST[s0:s1] if scalpST is not None else None
+            curve_sets.append((vertsArray[s0:s1], P[v0:v1], widths, st))
 
-                if pt.length_squared == 0:
-                    # this strand ends prematurely                    
-                    break                
-
-                # put points in object space
-                pt = ob_inv_mtx @ pt
-
-                strand_points.append(pt)
-
-            if len(strand_points) > 1:
-                # double the first and last
-                strand_points = strand_points[:1] + \
-                    strand_points + strand_points[-1:]
-                vertsInStrand = len(strand_points)
-
-                # catmull-rom requires at least 4 vertices
-                if vertsInStrand < 4:
-                    continue
-
-                # for varying width make the width array
-                if not conwidth:
-                    decr = (base_width - tip_width) / (vertsInStrand - 2)
-                    hair_width.extend([base_width] + [(base_width - decr * i)
-                                                    for i in range(vertsInStrand - 2)] +
-                                    [tip_width])
-
-                # add the last point again
-                points.extend(strand_points)
-                vertsArray.append(vertsInStrand)
-                nverts += vertsInStrand
-
-                # get the scalp S
-                if export_st:
-                    if pindex >= num_parents:
-                        particle = psys.particles[
-                            (pindex - num_parents) % num_parents]
-                    else:
-                        particle = psys.particles[pindex]
-                    st = psys.uv_on_emitter(psys_modifier, particle=particle, particle_no=pindex)
-                    scalpST.append([st[0], st[1]])
-
-            # if we get more than 100000 vertices, export ri.Curve and reset.  This
-            # is to avoid a maxint on the array length
-            if nverts > 100000:
-                curve_sets.append(
-                    (vertsArray, points, hair_width, scalpST))
-
-                nverts = 0
-                points = []
-                vertsArray = []
-                if not conwidth:
-                    hair_width = []
-                scalpS = []
-                scalpT = []
-
-        if nverts > 0:
-            curve_sets.append((vertsArray, points,
-                            hair_width, scalpST))
-
-        return curve_sets              
-            
\ No newline at end of file
+        return curve_sets
@@ -105,7 +105,5 @@ class RmanLightFilterTranslator(RmanTranslator):
         rixparams.SetString("coordsys", rman_sg_lightfilter.coord_sys)
             
         # check if this light filter belongs to a light link
-        for ll in self.rman_scene.bl_scene.renderman.light_links:
-            if ll.light_ob == ob:
-                rixparams.SetString("linkingGroups", ob.name)
-                break
\ No newline at end of file
+        if self.rman_scene.group_membership.is_light_linked(self.rman_scene.bl_scene, ob):
+            rixparams.SetString("linkingGroups", ob.name)
\ No newline at end of file
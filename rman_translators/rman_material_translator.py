@@ -95,39 +95,39 @@ class RmanMaterialTranslator(RmanTranslator):
                         if success:
                             return True
 
+                # signatures of the nodes exported so far
+                signatures = dict()
+                is_frame_sensitive = False
+
                 # bxdf
                 socket = out.inputs['Bxdf']
                 if socket.is_linked:
-                    bxdfList = []
-                    for sub_node in shadergraph_utils.gather_nodes(socket.links[0].from_node):
-                        shader_sg_nodes = self.shader_node_sg(material, sub_node, rman_sg_material, mat_name=handle)
-                        for s in shader_sg_nodes:
-                            bxdfList.append(s) 
+                    nodes = shadergraph_utils.gather_nodes(socket.links[0].from_node)
+                    bxdfList, frame_sensitive = self.export_nodes(material, nodes, rman_sg_material, handle, signatures)
+                    is_frame_sensitive = is_frame_sensitive or frame_sensitive
                     if bxdfList:
                         rman_sg_material.sg_node.SetBxdf(bxdfList)         
 
                 # light
                 socket = out.inputs['Light']
                 if socket.is_linked:
-                    lightNodesList = []
-                    for sub_node in shadergraph_utils.gather_nodes(socket.links[0].from_node):
-                        shader_sg_nodes = self.shader_node_sg(material, sub_node, rman_sg_material, mat_name=handle)
-                        for s in shader_sg_nodes:
-                            lightNodesList.append(s) 
+                    nodes = shadergraph_utils.gather_nodes(socket.links[0].from_node)
+                    lightNodesList, frame_sensitive = self.export_nodes(material, nodes, rman_sg_material, handle, signatures)
+                    is_frame_sensitive = is_frame_sensitive or frame_sensitive
                     if lightNodesList:
                         rman_sg_material.sg_node.SetLight(lightNodesList)                                   
 
                 # displacement
                 socket = out.inputs['Displacement']
                 if socket.is_linked:
-                    dispList = []
-                    for sub_node in shadergraph_utils.gather_nodes(socket.links[0].from_node):
-                        shader_sg_nodes = self.shader_node_sg(material, sub_node, rman_sg_material, mat_name=handle)
-                        for s in shader_sg_nodes:
-                            dispList.append(s) 
+                    nodes = shadergraph_utils.gather_nodes(socket.links[0].from_node)
+                    dispList, frame_sensitive = self.export_nodes(material, nodes, rman_sg_material, handle, signatures)
+                    is_frame_sensitive = is_frame_sensitive or frame_sensitive
                     if dispList:
                         rman_sg_material.sg_node.SetDisplace(dispList)  
 
+                rman_sg_material.is_frame_sensitive = is_frame_sensitive
+                self.prune_shader_cache(rman_sg_material, signatures)
                 return True                        
                     
             elif shadergraph_utils.find_node(material, 'ShaderNodeOutputMaterial'):
@@ -136,12 +136,113 @@ class RmanMaterialTranslator(RmanTranslator):
 
         return False
 
+    def get_node_signature(self, node, mat_name, signatures):
+        """Return a hashable summary of a node's parameters and input links, used
+        to tell if the node needs to be emitted again. Linked nodes contribute their 
+        own signatures, so a change upstream also re-emits the nodes downstream of it.
+
+        Args:
+        node (bpy.types.Node) - the node
+        mat_name (str) - the material handle
+        signatures (dict) - signatures of the nodes that have already been visited
+
+        Returns:
+        (tuple) - the signature, or None if the node should always be emitted
+        """
+
+        if type(node) == type(()) or current_group_node:
+            return None
+        node_type = getattr(node, 'renderman_node_type', '')
+        if node_type in ['', 'output', 'light']:
+            # cycles nodes and lights (which also export light filters)
+            # are always emitted
+            return None
+
+        sig = [mat_name, node.bl_label]
+        for prop_name, meta in node.prop_meta.items():
+            if meta.get('renderman_type', '') in ['colorramp', 'floatramp']:
+                # ramps live in a separate node tree
+                return None
+            val = getattr(node, prop_name, None)
+            if hasattr(val, '__len__') and not isinstance(val, str):
+                val = tuple(val)
+            sig.append(val)
+
+        for input in node.inputs:
+            if input.is_linked:
+                link = input.links[0]
+                from_node = link.from_node
+                if from_node.bl_idname in ['ShaderNodeGroup', 'NodeReroute', 'NodeGroupInput']:
+                    return None
+                sig.append((input.name, from_node.name, link.from_socket.name, signatures.get(from_node, None)))
+            else:
+                val = getattr(input, 'default_value', None)
+                if hasattr(val, '__len__') and not isinstance(val, str):
+                    val = tuple(val)
+                sig.append(val)
+
+        sig = tuple(sig)
+        try:
+            hash(sig)
+        except TypeError:
+            return None
+        return sig
+
+    def export_nodes(self, mat, nodes, rman_sg_material, mat_name, signatures):
+        """Return the shaders for a list of nodes, as returned by gather_nodes. Nodes
+        whose signature didn't change since the last export reuse the shaders
+        from the material's shader cache.
+
+        Args:
+        mat (bpy.types.Material) - the material
+        nodes (list) - nodes to export, in order
+        rman_sg_material (RmanSgMaterial) - the material's RmanSgMaterial
+        mat_name (str) - the material handle
+        signatures (dict) - signatures of the nodes that have already been visited. This is 
+                            updated with the signatures of nodes.
+
+        Returns:
+        (list) - list of RixSGShader
+        (bool) - whether any of the emitted shaders use the frame number
+        """
+
+        sg_nodes = []
+        is_frame_sensitive = False
+        shader_cache = rman_sg_material.shader_cache
+        for node in nodes:
+            sig = signatures.get(node, None)
+            if sig is None:
+                sig = self.get_node_signature(node, mat_name, signatures)
+            if sig:
+                signatures[node] = sig
+                cached = shader_cache.get(node.name, None)
+                if cached and cached[0] == sig:
+                    sg_nodes.extend(cached[1])
+                    continue
+
+            rman_sg_material.is_frame_sensitive = False
+            shader_sg_nodes = self.shader_node_sg(mat, node, rman_sg_material, mat_name=mat_name)
+            sg_nodes.extend(shader_sg_nodes)
+            if rman_sg_material.is_frame_sensitive:
+                # these need to be emitted again when the frame changes
+                is_frame_sensitive = True
+                shader_cache.pop(getattr(node, 'name', None), None)
+            elif sig:
+                shader_cache[node.name] = (sig, shader_sg_nodes)
+
+        return sg_nodes, is_frame_sensitive
+
+    def prune_shader_cache(self, rman_sg_material, signatures):
+        # remove nodes that are no longer part of the material
+        node_names = set([node.name for node in signatures])
+        shader_cache = rman_sg_material.shader_cache
+        for node_name in [nm for nm in shader_cache if nm not in node_names]:
+            del shader_cache[node_name]
+
     def export_solo_shader(self, mat, out, solo_node, rman_sg_material, mat_handle=''):
-        bxdfList = []
-        for sub_node in shadergraph_utils.gather_nodes(solo_node):
-            shader_sg_nodes = self.shader_node_sg(mat, sub_node, rman_sg_material, mat_name=mat_handle)
-            for s in shader_sg_nodes:
-                bxdfList.append(s) 
+        nodes = shadergraph_utils.gather_nodes(solo_node)
+        bxdfList, is_frame_sensitive = self.export_nodes(mat, nodes, rman_sg_material, mat_handle, dict())
+        rman_sg_material.is_frame_sensitive = is_frame_sensitive
 
         node_type = getattr(solo_node, 'renderman_node_type', '')
         if bxdfList:
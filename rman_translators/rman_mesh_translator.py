@@ -1,7 +1,6 @@
 from .rman_translator import RmanTranslator
 from ..rman_sg_nodes.rman_sg_mesh import RmanSgMesh
 from ..rfb_utils import object_utils
-from ..rfb_utils import string_utils
 from ..rfb_utils import property_utils
 from ..rfb_utils import scenegraph_utils
 
@@ -10,24 +9,25 @@ import math
 import numpy as np
 
 def _get_mats_faces_(nverts, material_ids):
+    '''Group the faces of a mesh by material index.
 
-    mats = {}
-    for face_id, num_verts in enumerate(nverts):
-        mat_id = material_ids[face_id]
-        if mat_id not in mats:
-            mats[mat_id] = []
-        mats[mat_id].append(face_id)
-    return mats
+    Returns:
+        (dict) - material index to an int32 array of its face indices, in
+                 ascending order
+    '''
+
+    material_ids = np.asarray(material_ids)
+    order = np.argsort(material_ids, kind='stable').astype(np.int32)
+    mat_ids, starts = np.unique(material_ids[order], return_index=True)
+    return dict(zip(mat_ids.tolist(), np.split(order, starts[1:])))
 
-def _is_multi_material_(ob, mesh):
+def _is_multi_material_(ob, mesh, material_ids=None):
     if type(mesh) != bpy.types.Mesh or len(ob.data.materials) < 2 \
             or len(mesh.polygons) == 0:
         return False
-    first_mat = mesh.polygons[0].material_index
-    for p in mesh.polygons:
-        if p.material_index != first_mat:
-            return True
-    return False
+    if material_ids is None:
+        material_ids = _get_material_ids(ob, mesh)
+    return bool(np.any(material_ids != material_ids[0]))
 
 # requires facevertex interpolation
 def _get_mesh_uv_(mesh, name=""):
@@ -43,10 +43,9 @@ def _get_mesh_uv_(mesh, name=""):
         return None
 
     uv_count = len(uv_loop_layer.data)
-    fastuvs = np.zeros(uv_count * 2)
-    uv_loop_layer.data.foreach_get("uv", fastuvs)
-    fastuvs = fastuvs.reshape(uv_count, 2)    
-    uvs = fastuvs.tolist()
+    uvs = np.zeros(uv_count * 2, dtype=np.float32)
+    uv_loop_layer.data.foreach_get("uv", uvs)
+    uvs = uvs.reshape(uv_count, 2)    
 
     return uvs
 
@@ -58,34 +57,64 @@ def _get_mesh_vcol_(mesh, name=""):
         return None
 
     vcol_count = len(vcol_layer.data)
-    fastvcols = np.zeros(vcol_count * 4)
+    fastvcols = np.zeros(vcol_count * 4, dtype=np.float32)
     vcol_layer.data.foreach_get("color", fastvcols)
     fastvcols = np.reshape(fastvcols, (vcol_count, 4))
-    pre_cols = fastvcols.tolist()     
-    
-    cols = [ [c[0], c[1], c[2]] for c in pre_cols ]
+
+    # strip alpha
+    cols = np.ascontiguousarray(fastvcols[:, 0:3])
 
     return cols    
 
-def _get_mesh_vgroup_(ob, mesh, name=""):
-    vgroup = ob.vertex_groups[name] if name != "" else ob.vertex_groups.active
-    weights = []
+def _get_mesh_vgroups_(ob, mesh, names):
+    '''Get the weights for several vertex groups with a single pass
+    over the mesh's vertices.
 
-    if vgroup is None:
-        return None
+    Returns:
+        (dict) - the vertex group name to a float32 array of weights, one per
+                 vertex. Vertices that are not in the group have a weight of 0.
+                 Names that don't match a vertex group are left out.
+    '''
 
-    for v in mesh.vertices:
-        if len(v.groups) == 0:
-            weights.append(0.0)
-        else:
-            weights.extend([g.weight for g in v.groups
-                            if g.group == vgroup.index])
+    group_cols = dict()
+    for name in names:
+        vgroup = ob.vertex_groups.get(name, None) if name != "" else ob.vertex_groups.active
+        if vgroup is not None and vgroup.index not in group_cols:
+            group_cols[vgroup.index] = len(group_cols)
+
+    weights = dict()
+    if not group_cols:
+        return weights
+
+    # dense vertex by group weight matrix
+    nvertices = len(mesh.vertices)
+    W = np.zeros((nvertices, len(group_cols)), dtype=np.float32)
+    elems = [(v.index, g.group, g.weight) for v in mesh.vertices for g in v.groups]
+    if elems:
+        elems = np.array(elems, dtype=np.float64)
+        vert_ids = elems[:, 0].astype(np.int64)
+        group_ids = elems[:, 1].astype(np.int64)
+        cols = np.full(max(group_ids.max(), max(group_cols)) + 1, -1, dtype=np.int64)
+        for group_index, col in group_cols.items():
+            cols[group_index] = col
+        cols = cols[group_ids]
+        mask = cols >= 0
+        W[vert_ids[mask], cols[mask]] = elems[mask, 2]
+
+    for name in names:
+        vgroup = ob.vertex_groups.get(name, None) if name != "" else ob.vertex_groups.active
+        if vgroup is not None:
+            weights[name] = np.ascontiguousarray(W[:, group_cols[vgroup.index]])
 
     return weights
 
+def _get_mesh_vgroup_(ob, mesh, name=""):
+    return _get_mesh_vgroups_(ob, mesh, [name]).get(name, None)
+
 def _get_material_ids(ob, geo):
-        
-    material_ids = string_utils.convert_val([p.material_index for p in geo.polygons])
+    npolygons = len(geo.polygons)
+    material_ids = np.zeros(npolygons, dtype=np.int32)
+    geo.polygons.foreach_get('material_index', material_ids)
     return material_ids
 
 def _export_reference_pose(ob, rm, rixparams, vertex_detail):
@@ -138,7 +167,7 @@ def _export_reference_pose(ob, rm, rixparams, vertex_detail):
         rixparams.SetNormalDetail('__WNref', rman__WNref, 'vertex')
     '''
 
-def _get_primvars_(ob, rman_sg_mesh, geo, rixparams):
+def _get_primvars_(ob, rman_sg_mesh, geo, rixparams, rm_scene):
 
     rm = ob.data.renderman
 
@@ -147,62 +176,46 @@ def _get_primvars_(ob, rman_sg_mesh, geo, rixparams):
 
     if rm.export_default_uv:
         uvs = _get_mesh_uv_(geo)
-        if uvs and len(uvs) > 0:
+        if uvs is not None and len(uvs) > 0:
             detail = "facevarying" if facevarying_detail == len(uvs) else "vertex"
-            rixparams.SetFloatArrayDetail("st", uvs, 2, detail)
+            scenegraph_utils.set_primvar_detail(rixparams, 'SetFloatArrayDetail', "st", uvs, 2, detail)
 
     if rm.export_default_vcol:
         vcols = _get_mesh_vcol_(geo)
-        if vcols and len(vcols) > 0:
+        if vcols is not None and len(vcols) > 0:
             detail = "facevarying" if facevarying_detail == len(vcols) else "vertex"
-            rixparams.SetColorDetail("Cs", vcols, detail)
+            scenegraph_utils.set_primvar_detail(rixparams, 'SetColorDetail', "Cs", vcols, detail)
 
     # reference pose
     _export_reference_pose(ob, rm, rixparams, vertex_detail)
     
     # custom prim vars
 
+    # get all of the vertex group weights at once
+    vgroup_weights = _get_mesh_vgroups_(ob, geo, [p.data_name for p in rm.prim_vars if p.data_source == 'VERTEX_GROUP'])
+
     for p in rm.prim_vars:
         if p.data_source == 'VERTEX_COLOR':
             vcols = _get_mesh_vcol_(geo, p.data_name)
             
-            if vcols and len(vcols) > 0:
+            if vcols is not None and len(vcols) > 0:
                 detail = "facevarying" if facevarying_detail == len(vcols) else "vertex"
-                rixparams.SetColorDetail(p.name, vcols, detail)
+                scenegraph_utils.set_primvar_detail(rixparams, 'SetColorDetail', p.name, vcols, detail)
             
         elif p.data_source == 'UV_TEXTURE':
             uvs = _get_mesh_uv_(geo, p.data_name)
-            if uvs and len(uvs) > 0:
+            if uvs is not None and len(uvs) > 0:
                 detail = "facevarying" if facevarying_detail == len(uvs) else "vertex"
-                rixparams.SetFloatArrayDetail(p.name, uvs, 2, detail)
+                scenegraph_utils.set_primvar_detail(rixparams, 'SetFloatArrayDetail', p.name, uvs, 2, detail)
 
         elif p.data_source == 'VERTEX_GROUP':
-            weights = _get_mesh_vgroup_(ob, geo, p.data_name)
-            if weights and len(weights) > 0:
+            weights = vgroup_weights.get(p.data_name, None)
+            if weights is not None and len(weights) > 0:
                 detail = "facevarying" if facevarying_detail == len(weights) else "vertex"
-                rixparams.SetFloatDetail(p.name, weights, detail)
-
-    for prop_name, meta in rm.prop_meta.items():
-        if 'primvar' not in meta:
-            continue
-
-        val = getattr(rm, prop_name)
-        if not val:
-            continue
-
-        if 'inheritable' in meta:
-            if float(val) == meta['inherit_true_value']:
-                if hasattr(rm_scene, prop_name):
-                    val = getattr(rm_scene, prop_name)
-
-        ri_name = meta['primvar']
-        is_array = False
-        array_len = -1
-        if 'arraySize' in meta:
-            is_array = True
-            array_len = meta['arraySize']
-        param_type = meta['renderman_type']
-        property_utils.set_rix_param(rixparams, param_type, ri_name, val, is_reference=False, is_array=is_array, array_len=array_len, node=rm)
+                scenegraph_utils.set_primvar_detail(rixparams, 'SetFloatDetail', p.name, weights, detail)
+
+    for emit in property_utils.get_rix_param_emitters(rm, 'primvar'):
+        emit(rixparams, rm, rm_scene)
 
 class RmanMeshTranslator(RmanTranslator):
 
@@ -253,12 +266,21 @@ class RmanMeshTranslator(RmanTranslator):
 
         return rman_sg_mesh
 
-    def export_deform_sample(self, rman_sg_mesh, ob, time_sample):
+    def get_deform_sample_points(self, ob):
+        mesh = ob.to_mesh()
+        if not mesh:
+            return None
+        P = object_utils._get_mesh_points_(mesh)
+        ob.to_mesh_clear()
+        return P
+
+    def export_deform_sample(self, rman_sg_mesh, ob, time_sample, P=None):
 
         mesh = None
-        mesh = ob.to_mesh()
+        if P is None:
+            mesh = ob.to_mesh()
+            P = object_utils._get_mesh_points_(mesh)
         primvar = rman_sg_mesh.sg_node.GetPrimVars()
-        P = object_utils._get_mesh_points_(mesh)
         npoints = len(P)
 
         if rman_sg_mesh.npoints != npoints:
@@ -271,19 +293,37 @@ class RmanMeshTranslator(RmanTranslator):
                     pvar = c.GetPrimVars()
                     pvar.SetTimes( [] )                               
                     c.SetPrimVars(pvar)            
+            if mesh:
+                ob.to_mesh_clear()
             return       
 
-        primvar.SetPointDetail(self.rman_scene.rman.Tokens.Rix.k_P, P, "vertex", time_sample)                            
+        scenegraph_utils.set_primvar_detail(primvar, 'SetPointDetail', self.rman_scene.rman.Tokens.Rix.k_P, P, "vertex", time_sample)
 
         rman_sg_mesh.sg_node.SetPrimVars(primvar)
 
         if rman_sg_mesh.is_multi_material:
             for c in rman_sg_mesh.multi_material_children:
                 pvar = c.GetPrimVars()
-                pvar.SetPointDetail(self.rman_scene.rman.Tokens.Rix.k_P, P, "vertex", time_sample)                                  
+                scenegraph_utils.set_primvar_detail(pvar, 'SetPointDetail', self.rman_scene.rman.Tokens.Rix.k_P, P, "vertex", time_sample)
                 c.SetPrimVars(pvar)
 
-        ob.to_mesh_clear()    
+        if mesh:
+            ob.to_mesh_clear()    
+
+    def clear_deform_samples(self, rman_sg_mesh, P):
+        # the mesh turned out not to be deforming. Remove the motion samples
+        # and go back to a single P
+        primvar = rman_sg_mesh.sg_node.GetPrimVars()
+        primvar.SetTimes([])
+        scenegraph_utils.set_primvar_detail(primvar, 'SetPointDetail', self.rman_scene.rman.Tokens.Rix.k_P, P, "vertex")
+        rman_sg_mesh.sg_node.SetPrimVars(primvar)
+        rman_sg_mesh.is_deforming = False
+        if rman_sg_mesh.is_multi_material:
+            for c in rman_sg_mesh.multi_material_children:
+                pvar = c.GetPrimVars()
+                pvar.SetTimes( [] )
+                scenegraph_utils.set_primvar_detail(pvar, 'SetPointDetail', self.rman_scene.rman.Tokens.Rix.k_P, P, "vertex")
+                c.SetPrimVars(pvar)
 
     def update(self, ob, rman_sg_mesh, input_mesh=None):
 
@@ -300,7 +340,7 @@ class RmanMeshTranslator(RmanTranslator):
         (nverts, verts, P, N) = object_utils._get_mesh_(mesh, get_normals=get_normals)
         
         # if this is empty continue:
-        if nverts == []:
+        if len(nverts) == 0:
             if not input_mesh:
                 ob.to_mesh_clear()
             rman_sg_mesh.sg_node = None
@@ -317,7 +357,10 @@ class RmanMeshTranslator(RmanTranslator):
         rman_sg_mesh.nverts = numnverts
 
         rman_sg_mesh.sg_node.Define( npolys, npoints, numnverts )
-        rman_sg_mesh.is_multi_material = _is_multi_material_(ob, mesh)
+        material_ids = None
+        if len(ob.data.materials) > 1:
+            material_ids = _get_material_ids(ob, mesh)
+        rman_sg_mesh.is_multi_material = _is_multi_material_(ob, mesh, material_ids=material_ids)
             
         primvar = rman_sg_mesh.sg_node.GetPrimVars()
         primvar.Clear()
@@ -325,11 +368,11 @@ class RmanMeshTranslator(RmanTranslator):
         if rman_sg_mesh.is_deforming:
             super().set_primvar_times(rman_sg_mesh.motion_steps, primvar)
         
-        primvar.SetPointDetail(self.rman_scene.rman.Tokens.Rix.k_P, P, "vertex")
-        _get_primvars_(ob, rman_sg_mesh, mesh, primvar)   
+        scenegraph_utils.set_primvar_detail(primvar, 'SetPointDetail', self.rman_scene.rman.Tokens.Rix.k_P, P, "vertex")
+        _get_primvars_(ob, rman_sg_mesh, mesh, primvar, self.rman_scene.bl_scene.renderman)   
 
-        primvar.SetIntegerDetail(self.rman_scene.rman.Tokens.Rix.k_Ri_nvertices, nverts, "uniform")
-        primvar.SetIntegerDetail(self.rman_scene.rman.Tokens.Rix.k_Ri_vertices, verts, "facevarying")            
+        scenegraph_utils.set_primvar_detail(primvar, 'SetIntegerDetail', self.rman_scene.rman.Tokens.Rix.k_Ri_nvertices, nverts, "uniform")
+        scenegraph_utils.set_primvar_detail(primvar, 'SetIntegerDetail', self.rman_scene.rman.Tokens.Rix.k_Ri_vertices, verts, "facevarying")            
 
         if rman_sg_mesh.is_subdiv:
             creases = self._get_subd_tags_(ob, mesh, primvar)
@@ -341,19 +384,20 @@ class RmanMeshTranslator(RmanTranslator):
 
         else:
             rman_sg_mesh.sg_node.SetScheme(None)
-            if N:
+            if N is not None and len(N) > 0:
                 if len(N) == numnverts:
-                    primvar.SetNormalDetail(self.rman_scene.rman.Tokens.Rix.k_N, N, "facevarying")         
+                    scenegraph_utils.set_primvar_detail(primvar, 'SetNormalDetail', self.rman_scene.rman.Tokens.Rix.k_N, N, "facevarying")
                 else:
-                    primvar.SetNormalDetail(self.rman_scene.rman.Tokens.Rix.k_N, N, "uniform")         
+                    scenegraph_utils.set_primvar_detail(primvar, 'SetNormalDetail', self.rman_scene.rman.Tokens.Rix.k_N, N, "uniform")
         subdiv_scheme = getattr(ob.data.renderman, 'rman_subdiv_scheme', 'none')
         rman_sg_mesh.subdiv_scheme = subdiv_scheme
 
         if rman_sg_mesh.is_multi_material:
-            material_ids = _get_material_ids(ob, mesh)
             for mat_id, faces in \
                 _get_mats_faces_(nverts, material_ids).items():
 
+                if mat_id >= len(ob.data.materials):
+                    continue
                 mat = ob.data.materials[mat_id]
                 if not mat:
                     continue
@@ -361,8 +405,8 @@ class RmanMeshTranslator(RmanTranslator):
                 sg_material = self.rman_scene.rman_materials.get(mat.original, None)
 
                 if mat_id == 0:
-                    primvar.SetIntegerArray(self.rman_scene.rman.Tokens.Rix.k_shade_faceset, faces, len(faces))
-                    scenegraph_utils.set_material(sg_node, sg_material.sg_node)
+                    scenegraph_utils.set_primvar_detail(primvar, 'SetIntegerArray', self.rman_scene.rman.Tokens.Rix.k_shade_faceset, faces, len(faces))
+                    scenegraph_utils.set_material(rman_sg_mesh.sg_node, sg_material.sg_node)
                 else:                
                     sg_sub_mesh =  self.rman_scene.sg_scene.CreateMesh("")
                     sg_sub_mesh.Define( npolys, npoints, numnverts )                   
@@ -372,7 +416,7 @@ class RmanMeshTranslator(RmanTranslator):
                     if rman_sg_mesh.is_deforming:
                         super().set_primvar_times(rman_sg_mesh.motion_steps, pvars)
                     pvars.Inherit(primvar)
-                    pvars.SetIntegerArray(self.rman_scene.rman.Tokens.Rix.k_shade_faceset, faces, len(faces))
+                    scenegraph_utils.set_primvar_detail(pvars, 'SetIntegerArray', self.rman_scene.rman.Tokens.Rix.k_shade_faceset, faces, len(faces))
                     sg_sub_mesh.SetPrimVars(pvars)
                     scenegraph_utils.set_material(sg_sub_mesh, sg_material.sg_node)
                     rman_sg_mesh.sg_node.AddChild(sg_sub_mesh)
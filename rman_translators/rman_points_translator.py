@@ -2,6 +2,7 @@ from .rman_translator import RmanTranslator
 from ..rman_sg_nodes.rman_sg_points import RmanSgPoints
 from ..rfb_utils import object_utils
 from ..rfb_utils import string_utils
+from ..rfb_utils import scenegraph_utils
 
 import bpy
 import math
@@ -35,7 +36,7 @@ class RmanPointsTranslator(RmanTranslator):
             rman_sg_points.is_deforming = False        
             return         
         
-        primvar.SetPointDetail(self.rman_scene.rman.Tokens.Rix.k_P, P, "vertex", time_sample)
+        scenegraph_utils.set_primvar_detail(primvar, 'SetPointDetail', self.rman_scene.rman.Tokens.Rix.k_P, P, "vertex", time_sample)
 
         rman_sg_points.sg_node.SetPrimVars(primvar) 
 
@@ -50,7 +51,7 @@ class RmanPointsTranslator(RmanTranslator):
         P = object_utils._get_mesh_points_(mesh)
 
         # if this is empty continue:
-        if not P or len(P) < 1:
+        if len(P) < 1:
             if not input_mesh:
                 ob.to_mesh_clear()
             rman_sg_points.sg_node = None
@@ -67,7 +68,7 @@ class RmanPointsTranslator(RmanTranslator):
 
         super().set_primvar_times(rman_sg_points.motion_steps, steps)
 
-        primvar.SetPointDetail(self.rman_scene.rman.Tokens.Rix.k_P, P, "vertex")
+        scenegraph_utils.set_primvar_detail(primvar, 'SetPointDetail', self.rman_scene.rman.Tokens.Rix.k_P, P, "vertex")
         primvar.SetFloatDetail(self.rman_scene.rman.Tokens.Rix.k_constantwidth, rm.primitive_point_width, "constant")
             
         rman_sg_points.sg_node.SetPrimVars(primvar)         
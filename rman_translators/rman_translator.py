@@ -73,27 +73,8 @@ class RmanTranslator(object):
         primvars = rman_sg_node.sg_node.GetPrimVars()
 
         # set any properties marked primvar in the config file
-        for prop_name, meta in rm.prop_meta.items():
-            if 'primvar' not in meta:
-                continue
-
-            val = getattr(rm, prop_name)
-            if not val:
-                continue
-
-            if 'inheritable' in meta:
-                if float(val) == meta['inherit_true_value']:
-                    if hasattr(rm_scene, prop_name):
-                        val = getattr(rm_scene, prop_name)
-
-            ri_name = meta['primvar']
-            is_array = False
-            array_len = -1
-            if 'arraySize' in meta:
-                is_array = True
-                array_len = meta['arraySize']
-            param_type = meta['renderman_type']
-            property_utils.set_rix_param(primvars, param_type, ri_name, val, is_reference=False, is_array=is_array, array_len=array_len)                
+        for emit in property_utils.get_rix_param_emitters(rm, 'primvar'):
+            emit(primvars, rm, rm_scene)
 
         rman_sg_node.sg_node.SetPrimVars(primvars)
 
@@ -128,40 +109,12 @@ class RmanTranslator(object):
         attrs = rman_sg_node.sg_node.GetAttributes()
 
         # set any properties marked riattr in the config file
-        for prop_name, meta in rm.prop_meta.items():
-            if 'riattr' not in meta:
-                continue
-
-            ri_name = meta['riattr']            
-            val = getattr(rm, prop_name)
-            if 'inheritable' in meta:
-                cond = meta['inherit_true_value']
-                if isinstance(cond, str):
-                    node = rm
-                    if exec(cond):
-                        attrs.Remove(ri_name)
-                        continue
-                elif float(val) == cond:
-                    attrs.Remove(ri_name)
-                    continue
-
-            is_array = False
-            array_len = -1
-            if 'arraySize' in meta:
-                is_array = True
-                array_len = meta['arraySize']
-            param_type = meta['renderman_type']
-            property_utils.set_rix_param(attrs, param_type, ri_name, val, is_reference=False, is_array=is_array, array_len=array_len)            
-
-        obj_groups_str = "World"
-        obj_groups_str += "," + name
-        lpe_groups_str = "*"
-        for obj_group in self.rman_scene.bl_scene.renderman.object_groups:
-            for member in obj_group.members:
-                if member.ob_pointer == ob:
-                    obj_groups_str += ',' + obj_group.name
-                    lpe_groups_str += ',' + obj_group.name
-                    break
+        for emit in property_utils.get_rix_param_emitters(rm, 'riattr'):
+            emit(attrs, rm)
+
+        obj_groups = self.rman_scene.group_membership.get_object_groups(self.rman_scene.bl_scene, ob)
+        obj_groups_str = ','.join(["World", name] + obj_groups)
+        lpe_groups_str = ','.join(["*"] + obj_groups)
         attrs.SetString(self.rman_scene.rman.Tokens.Rix.k_grouping_membership, obj_groups_str)
 
         # add to trace sets
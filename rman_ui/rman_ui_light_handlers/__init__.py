@@ -1,5 +1,6 @@
 import bpy
 import gpu
+from bpy.app.handlers import persistent
 from gpu_extras.batch import batch_for_shader
 from ...rfb_utils import transform_utils
 from ...rman_constants import RMAN_AREA_LIGHT_TYPES
@@ -535,100 +536,118 @@ def make_sphere(m):
 
     return v
 
-def draw_rect_light(ob):
-    _SHADER_.bind()
-
-    set_selection_color(ob)
-
-    ob_matrix = Matrix(ob.matrix_world)        
-    m = ob_matrix @ Matrix.Rotation(math.radians(180.0), 4, 'Y')
 
-    box = []
-    for pt in s_rmanLightLogo['box']:
-        box.append( m @ Vector(pt))
+# batches are built once, in the shape's local space, and drawn with
+# the light's matrix pushed onto the gpu matrix stack
+_BATCH_CACHE_ = dict()
+_BATCH_CACHE_MAX_SIZE_ = 512
 
-    box_indices = _get_indices(s_rmanLightLogo['box'])
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": box}, indices=box_indices)    
-    batch.draw(_SHADER_)
+# the lights in the scene. Cleared by the handlers below whenever
+# objects may have been added, removed or reallocated (undo/redo, file 
+# loads and depsgraph updates), and rebuilt on the next redraw
+_SCENE_LIGHTS_ = list()
+_SCENE_LIGHTS_KEY_ = None
 
-    arrow = []
-    for pt in s_rmanLightLogo['arrow']:
-        arrow.append( m @ Vector(pt))  
+def _loop_shape(*loops):
+    """Join one or more closed loops of points into a single shape
 
-    arrow_indices = _get_indices(s_rmanLightLogo['arrow'])
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": arrow}, indices=arrow_indices)    
-    batch.draw(_SHADER_)
-
-    m = ob_matrix
-    R_outside = []
-    for pt in s_rmanLightLogo['R_outside']:
-        R_outside.append( m @ Vector(pt))
-
-    R_outside_indices = _get_indices(s_rmanLightLogo['R_outside'])
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": R_outside}, indices=R_outside_indices)    
-    batch.draw(_SHADER_)
-  
-    R_inside = []
-    for pt in s_rmanLightLogo['R_inside']:
-        R_inside.append( m @ Vector(pt))
+    Returns:
+    (tuple) - list of points and list of line indices
+    """
+    pts = []
+    indices = []
+    for loop in loops:
+        offset = len(pts)
+        pts.extend(loop)
+        indices.extend([(i + offset, j + offset) for i, j in _get_indices(loop)])
+    return pts, indices
+
+def _get_batch(key, make_shape):
+    batch = _BATCH_CACHE_.get(key, None)
+    if batch is None:
+        if len(_BATCH_CACHE_) >= _BATCH_CACHE_MAX_SIZE_:
+            _BATCH_CACHE_.clear()
+        pts, indices = make_shape()
+        batch = batch_for_shader(_SHADER_, 'LINES', {"pos": pts}, indices=indices)
+        _BATCH_CACHE_[key] = batch
+    return batch
+
+def _draw_shape(m, key, make_shape):
+    """Draw a cached shape
+
+    Args:
+    m (mathutils.Matrix) - matrix to draw the shape with
+    key (AnyType) - hashable key for the shape, including any parameters it was built with
+    make_shape (function) - function returning the shape's points and indices, called
+                            when the shape is not in the cache yet
+    """
+    batch = _get_batch(key, make_shape)
+    with gpu.matrix.push_pop():
+        gpu.matrix.multiply_matrix(m)
+        batch.draw(_SHADER_)
 
-    R_inside_indices = _get_indices(s_rmanLightLogo['R_inside'])
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": R_inside}, indices=R_inside_indices)    
-    batch.draw(_SHADER_)    
+def _draw_logo(m):
+    _draw_shape(m, 'R_logo', lambda: _loop_shape(s_rmanLightLogo['R_outside'], s_rmanLightLogo['R_inside']))
+
+def _make_three_disks():
+    m2 = Matrix.Rotation(math.radians(90.0), 4, 'Y')
+    m3 = Matrix.Rotation(math.radians(90.0), 4, 'X')
+    return _loop_shape(s_diskLight,
+                       [m2 @ Vector(pt) for pt in s_diskLight],
+                       [m3 @ Vector(pt) for pt in s_diskLight])
+
+def _get_scene_lights(scene):
+    global _SCENE_LIGHTS_, _SCENE_LIGHTS_KEY_
+    key = scene.as_pointer()
+    if key != _SCENE_LIGHTS_KEY_:
+        _SCENE_LIGHTS_ = [x for x in scene.objects if x.type == 'LIGHT']
+        _SCENE_LIGHTS_KEY_ = key
+    return _SCENE_LIGHTS_
+
+def _clear_scene_lights():
+    global _SCENE_LIGHTS_, _SCENE_LIGHTS_KEY_
+    _SCENE_LIGHTS_ = list()
+    _SCENE_LIGHTS_KEY_ = None
+
+@persistent
+def _clear_scene_lights_cb(*args):
+    _clear_scene_lights()
+
+@persistent
+def _depsgraph_update_cb(scene, depsgraph):
+    if depsgraph.id_type_updated('OBJECT') or depsgraph.id_type_updated('COLLECTION'):
+        _clear_scene_lights()
+
+__LIGHT_LIST_HANDLERS__ = [(bpy.app.handlers.undo_post, _clear_scene_lights_cb),
+                           (bpy.app.handlers.redo_post, _clear_scene_lights_cb),
+                           (bpy.app.handlers.load_post, _clear_scene_lights_cb),
+                           (bpy.app.handlers.depsgraph_update_post, _depsgraph_update_cb)]
 
-def draw_sphere_light(ob):
-    
+def draw_rect_light(ob):
     _SHADER_.bind()
 
     set_selection_color(ob)
 
-    ob_matrix = Matrix(ob.matrix_world)        
+    ob_matrix = Matrix(ob.matrix_world)
     m = ob_matrix @ Matrix.Rotation(math.radians(180.0), 4, 'Y')
 
-    disk = []
-    for pt in s_diskLight:
-        disk.append( m @ Vector(pt) ) 
-
-    disk_indices = _get_indices(s_diskLight)
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": disk}, indices=disk_indices)    
-    batch.draw(_SHADER_)
-
-    m2 = m @ Matrix.Rotation(math.radians(90.0), 4, 'Y')
-    disk = []
-    for pt in s_diskLight:
-        disk.append( m2 @ Vector(pt)) 
+    _draw_shape(m, 'box', lambda: _loop_shape(s_rmanLightLogo['box']))
+    _draw_shape(m, 'arrow', lambda: _loop_shape(s_rmanLightLogo['arrow']))
+    _draw_logo(ob_matrix)
 
-    disk_indices = _get_indices(s_diskLight)
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": disk}, indices=disk_indices)    
-    batch.draw(_SHADER_)
-
-    m3 = m @ Matrix.Rotation(math.radians(90.0), 4, 'X')
-    disk = []
-    for pt in s_diskLight:
-        disk.append( m3 @ Vector(pt))
+def draw_sphere_light(ob):
 
-    disk_indices = _get_indices(s_diskLight)
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": disk}, indices=disk_indices)    
-    batch.draw(_SHADER_)   
+    _SHADER_.bind()
 
-    m = ob_matrix
-    R_outside = []
-    for pt in s_rmanLightLogo['R_outside']:
-        R_outside.append( m @ Vector(pt))
+    set_selection_color(ob)
 
-    R_outside_indices = _get_indices(s_rmanLightLogo['R_outside'])
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": R_outside}, indices=R_outside_indices)    
-    batch.draw(_SHADER_)
-  
-    R_inside = []
-    for pt in s_rmanLightLogo['R_inside']:
-        R_inside.append( m @ Vector(pt))
+    ob_matrix = Matrix(ob.matrix_world)
+    m = ob_matrix @ Matrix.Rotation(math.radians(180.0), 4, 'Y')
 
-    R_inside_indices = _get_indices(s_rmanLightLogo['R_inside'])
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": R_inside}, indices=R_inside_indices)    
-    batch.draw(_SHADER_)    
+    _draw_shape(m, 'three_disks', _make_three_disks)
+    _draw_logo(ob_matrix)
 
-def draw_envday_light(ob): 
+def draw_envday_light(ob):
 
     _SHADER_.bind()
 
@@ -636,272 +655,80 @@ def draw_envday_light(ob):
 
     loc, rot, sca = Matrix(ob.matrix_world).decompose()
     axis,angle = rot.to_axis_angle()
-    scale = max(sca) # take the max axis   
+    scale = max(sca) # take the max axis
     m = Matrix.Translation(loc)
     m = m @ Matrix.Rotation(angle, 4, axis)
     m = m @ Matrix.Scale(scale, 4)
 
     ob_matrix = m
-    
+
     m = Matrix(ob_matrix)
     m = m @ Matrix.Rotation(math.radians(90.0), 4, 'X')
 
-    west_rr_shape = []
-    for pt in s_envday['west_rr_shape']:
-        west_rr_shape.append( m @ Vector(pt))
-
-    west_rr_indices = _get_indices(s_envday['west_rr_shape'])
-
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": west_rr_shape}, indices=west_rr_indices)    
-    batch.draw(_SHADER_)
-
-    east_rr_shape = []
-    for pt in s_envday['east_rr_shape']:
-        east_rr_shape.append( m @ Vector(pt)) 
-
-    east_rr_indices = _get_indices(s_envday['east_rr_shape'])
-
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": east_rr_shape}, indices=east_rr_indices)    
-    batch.draw(_SHADER_)   
-
-    south_rr_shape = []
-    for pt in s_envday['south_rr_shape']:
-        south_rr_shape.append( m @ Vector(pt))
-
-    south_rr_indices = _get_indices(s_envday['south_rr_shape'])
-
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": south_rr_shape}, indices=south_rr_indices)    
-    batch.draw(_SHADER_)  
-
-    north_rr_shape = []
-    for pt in s_envday['north_rr_shape']:
-        north_rr_shape.append( m @ Vector(pt) )
-
-    north_rr_indices = _get_indices(s_envday['north_rr_shape'])
-
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": north_rr_shape}, indices=north_rr_indices)    
-    batch.draw(_SHADER_)             
-
-    inner_circle_rr_shape = []
-    for pt in s_envday['inner_circle_rr_shape']:
-        inner_circle_rr_shape.append( m @ Vector(pt) )
-
-    inner_circle_rr_shape_indices = _get_indices(s_envday['inner_circle_rr_shape'])
-
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": inner_circle_rr_shape}, indices=inner_circle_rr_shape_indices)    
-    batch.draw(_SHADER_)   
-
-    outer_circle_rr_shape = []
-    for pt in s_envday['outer_circle_rr_shape']:
-        outer_circle_rr_shape.append( m @ Vector(pt) )
-
-    outer_circle_rr_shape_indices = _get_indices(s_envday['outer_circle_rr_shape'])
-
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": outer_circle_rr_shape}, indices=outer_circle_rr_shape_indices)    
-    batch.draw(_SHADER_)  
-
-    compass_shape = []
-    for pt in s_envday['compass_shape']:
-        compass_shape.append( m @ Vector(pt))
-
-    compass_shape_indices = _get_indices(s_envday['compass_shape'])
-
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": compass_shape}, indices=compass_shape_indices)    
-    batch.draw(_SHADER_)    
-
-    east_arrow_shape = []
-    for pt in s_envday['east_arrow_shape']:
-        east_arrow_shape.append( m @ Vector(pt))
-
-    east_arrow_shape_indices = _get_indices(s_envday['east_arrow_shape'])
-
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": east_arrow_shape}, indices=east_arrow_shape_indices)    
-    batch.draw(_SHADER_)      
-
-    west_arrow_shape = []
-    for pt in s_envday['west_arrow_shape']:
-        west_arrow_shape.append( m @ Vector(pt) )
-
-    west_arrow_shape_indices = _get_indices(s_envday['west_arrow_shape'])
-
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": west_arrow_shape}, indices=west_arrow_shape_indices)    
-    batch.draw(_SHADER_)         
-
-    north_arrow_shape = []
-    for pt in s_envday['north_arrow_shape']:
-        north_arrow_shape.append( m @ Vector(pt))
-
-    north_arrow_shape_indices = _get_indices(s_envday['north_arrow_shape'])
-
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": north_arrow_shape}, indices=north_arrow_shape_indices)    
-    batch.draw(_SHADER_)         
-
-    south_arrow_shape = []
-    for pt in s_envday['south_arrow_shape']:
-        south_arrow_shape.append( m @ Vector(pt))
-
-    south_arrow_shape_indices = _get_indices(s_envday['south_arrow_shape'])
-
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": south_arrow_shape}, indices=south_arrow_shape_indices)    
-    batch.draw(_SHADER_)     
+    _draw_shape(m, 'envday', lambda: _loop_shape(*[s_envday[nm] for nm in ['west_rr_shape', 'east_rr_shape',
+                                                                          'south_rr_shape', 'north_rr_shape',
+                                                                          'inner_circle_rr_shape', 'outer_circle_rr_shape',
+                                                                          'compass_shape', 'east_arrow_shape',
+                                                                          'west_arrow_shape', 'north_arrow_shape',
+                                                                          'south_arrow_shape']]))
 
+    # the sun direction is a unit line along +Z, rotated and scaled onto 
+    # the actual direction, so that it can be cached like the other shapes
     sunDirection = _get_sun_direction(ob)
-    sunDirection = Matrix(ob_matrix) @ Vector(sunDirection)
-    origin = Matrix(ob_matrix) @ Vector([0,0,0])
-    sunDirection_pts = [ origin, sunDirection]
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": sunDirection_pts}, indices=[(0,1)])    
-    batch.draw(_SHADER_) 
+    length = Vector(sunDirection).length
+    if length > 0.0:
+        m = Vector([0,0,1]).rotation_difference(Vector(sunDirection)).to_matrix().to_4x4()
+        m = ob_matrix @ m @ Matrix.Scale(length, 4)
+        _draw_shape(m, 'sun_direction', lambda: ([Vector([0,0,0]), Vector([0,0,1])], [(0,1)]))
 
     # draw a sphere to represent the sun
-    v = sunDirection - origin
+    v = Matrix(ob_matrix) @ Vector(sunDirection) - Matrix(ob_matrix) @ Vector([0,0,0])
     translate = Matrix.Translation(v)
-    sphere = make_sphere(ob_matrix @ Matrix.Scale(0.25, 4))
-    sphere_indices = []
-    for i in range(0, len(sphere)):
-        if i == len(sphere)-1:
-            sphere_indices.append((i, 0))
-        else:
-            sphere_indices.append((i, i+1))    
+    _draw_shape(translate @ ob_matrix @ Matrix.Scale(0.25, 4), 'sphere', lambda: _loop_shape(make_sphere(Matrix.Identity(4))))
 
-    sphere_shape = []
-    for pt in sphere:
-        sphere_shape.append( translate @ Vector(pt) )
- 
+def draw_disk_light(ob):
 
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": sphere_shape}, indices=sphere_indices)    
-    batch.draw(_SHADER_)  
-
-
-def draw_disk_light(ob): 
-                 
     _SHADER_.bind()
 
     set_selection_color(ob)
 
-    ob_matrix = Matrix(ob.matrix_world)        
+    ob_matrix = Matrix(ob.matrix_world)
     m = ob_matrix @ Matrix.Rotation(math.radians(180.0), 4, 'Y')
 
-    disk = []
-    for pt in s_diskLight:
-        disk.append( m @ Vector(pt))
-
-    disk_indices = _get_indices(s_diskLight)
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": disk}, indices=disk_indices)    
-    batch.draw(_SHADER_)
-
-    arrow = []
-    for pt in s_rmanLightLogo['arrow']:
-        arrow.append( m @ Vector(pt)) 
-
-    arrow_indices = _get_indices(s_rmanLightLogo['arrow'])
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": arrow}, indices=arrow_indices)    
-    batch.draw(_SHADER_)
+    _draw_shape(m, 'disk', lambda: _loop_shape(s_diskLight))
+    _draw_shape(m, 'arrow', lambda: _loop_shape(s_rmanLightLogo['arrow']))
+    _draw_logo(ob_matrix)
 
-    m = ob_matrix
-    R_outside = []
-    for pt in s_rmanLightLogo['R_outside']:
-        R_outside.append( m @ Vector(pt)) 
+def draw_dist_light(ob):
 
-    R_outside_indices = _get_indices(s_rmanLightLogo['R_outside'])
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": R_outside}, indices=R_outside_indices)    
-    batch.draw(_SHADER_)
-  
-    R_inside = []
-    for pt in s_rmanLightLogo['R_inside']:
-        R_inside.append( m @ Vector(pt))
-
-    R_inside_indices = _get_indices(s_rmanLightLogo['R_inside'])
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": R_inside}, indices=R_inside_indices)    
-    batch.draw(_SHADER_)  
-
-def draw_dist_light(ob):      
-    
 
     _SHADER_.bind()
 
     set_selection_color(ob)
 
-    ob_matrix = Matrix(ob.matrix_world)        
-    m = ob_matrix @ Matrix.Rotation(math.radians(180.0), 4, 'Y')  
-
-    arrow1 = []
-    for pt in s_distantLight['arrow1']:
-        arrow1.append( m @ Vector(pt) )
-
-    arrow1_indices = _get_indices(s_distantLight['arrow1'])
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": arrow1}, indices=arrow1_indices)    
-    batch.draw(_SHADER_)    
-
-    arrow2 = []
-    for pt in s_distantLight['arrow2']:
-        arrow2.append( m @ Vector(pt)) 
-
-    arrow2_indices = _get_indices(s_distantLight['arrow2'])
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": arrow2}, indices=arrow2_indices)    
-    batch.draw(_SHADER_) 
-
-    arrow3 = []
-    for pt in s_distantLight['arrow3']:
-        arrow3.append( m @ Vector(pt) )
-
-    arrow3_indices = _get_indices(s_distantLight['arrow3'])
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": arrow3}, indices=arrow3_indices)    
-    batch.draw(_SHADER_)         
-
-    m = ob_matrix
-    R_outside = []
-    for pt in s_rmanLightLogo['R_outside']:
-        R_outside.append( m @ Vector(pt) )
-
-    R_outside_indices = _get_indices(s_rmanLightLogo['R_outside'])
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": R_outside}, indices=R_outside_indices)    
-    batch.draw(_SHADER_)
-  
-    R_inside = []
-    for pt in s_rmanLightLogo['R_inside']:
-        R_inside.append( m @ Vector(pt) ) 
+    ob_matrix = Matrix(ob.matrix_world)
+    m = ob_matrix @ Matrix.Rotation(math.radians(180.0), 4, 'Y')
 
-    R_inside_indices = _get_indices(s_rmanLightLogo['R_inside'])
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": R_inside}, indices=R_inside_indices)    
-    batch.draw(_SHADER_)             
+    _draw_shape(m, 'distant_arrows', lambda: _loop_shape(s_distantLight['arrow1'],
+                                                        s_distantLight['arrow2'],
+                                                        s_distantLight['arrow3']))
+    _draw_logo(ob_matrix)
 
 def draw_portal_light(ob):
     _SHADER_.bind()
 
     set_selection_color(ob)
 
-    ob_matrix = Matrix(ob.matrix_world)        
-    m = ob_matrix
-
-    R_outside = []
-    for pt in s_rmanLightLogo['R_outside']:
-        R_outside.append( m @ Vector(pt) )
-
-    R_outside_indices = _get_indices(s_rmanLightLogo['R_outside'])
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": R_outside}, indices=R_outside_indices)    
-    batch.draw(_SHADER_)
-  
-    R_inside = []
-    for pt in s_rmanLightLogo['R_inside']:
-        R_inside.append( m @ Vector(pt))
-
-    R_inside_indices = _get_indices(s_rmanLightLogo['R_inside'])
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": R_inside}, indices=R_inside_indices)    
-    batch.draw(_SHADER_)                 
+    ob_matrix = Matrix(ob.matrix_world)
+    _draw_logo(ob_matrix)
 
     m = ob_matrix @ Matrix.Rotation(math.radians(90.0), 4, 'X')
     m = m @ Matrix.Scale(0.5, 4)
-    rays = []
-    for pt in s_portalRays:
-        rays.append( m @ Vector(pt) )
-
-    rays_indices = _get_indices(s_portalRays)
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": rays}, indices=rays_indices)    
-    batch.draw(_SHADER_)         
+    _draw_shape(m, 'portal_rays', lambda: _loop_shape(s_portalRays))
 
 def draw_dome_light(ob):
-    
-    
+
+
     _SHADER_.bind()
 
     set_selection_color(ob)
@@ -911,16 +738,7 @@ def draw_dome_light(ob):
     m = Matrix.Rotation(angle, 4, axis)
     m = m @ Matrix.Scale(100, 4)
 
-    sphere = make_sphere(m)
-    sphere_indices = []
-    for i in range(0, len(sphere)):
-        if i == len(sphere)-1:
-            sphere_indices.append((i, 0))
-        else:
-            sphere_indices.append((i, i+1))     
-
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": sphere}, indices=sphere_indices)    
-    batch.draw(_SHADER_)        
+    _draw_shape(m, 'sphere', lambda: _loop_shape(make_sphere(Matrix.Identity(4))))
 
 def draw_cylinder_light(ob):
 
@@ -930,12 +748,7 @@ def draw_cylinder_light(ob):
 
     m = Matrix(ob.matrix_world)
 
-    cylinder = []
-    for pt in s_cylinderLight['vtx']:
-        cylinder.append( m @ Vector(pt)) 
-
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": cylinder}, indices=s_cylinderLight['indices'])    
-    batch.draw(_SHADER_)  
+    _draw_shape(m, 'cylinder', lambda: (s_cylinderLight['vtx'], s_cylinderLight['indices']))
 
 
 def draw_arc(a, b, numSteps, quadrant, xOffset, yOffset, pts):
@@ -949,13 +762,14 @@ def draw_arc(a, b, numSteps, quadrant, xOffset, yOffset, pts):
         pts.append(Vector([x+xOffset, y+yOffset, 0.0]))
         #pts.append(Vector([x+xOffset, 0.0, y+yOffset]))
 
+
 def draw_rounded_rectangles( left, right,
                             top,  bottom,
                             radius,
                             leftEdge,  rightEdge,
                             topEdge,  bottomEdge,
-                            zOffset1,  zOffset2, 
-                            m):
+                            zOffset1,  zOffset2,
+                            m, loops):
 
     pts = []
     a = radius+rightEdge
@@ -967,32 +781,20 @@ def draw_rounded_rectangles( left, right,
     a = radius+leftEdge
     b = radius+bottomEdge
     draw_arc(a, b, 10, 2, -left, -bottom, pts)
-    
+
     a = radius+rightEdge
     b = radius+bottomEdge
     draw_arc(a, b, 10, 3, right, -bottom, pts)
 
+    # the front and back rectangles currently use the same matrix,
+    # so only one loop is added
     translate = m #Matrix.Translation( Vector([0,0, zOffset1])) @ m
-    shape_pts = []
-    for pt in pts:
-        shape_pts.append( translate @ Vector(pt)) 
-    shape_pts_indices = _get_indices(shape_pts)
-
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": shape_pts}, indices=shape_pts_indices)    
-    batch.draw(_SHADER_)  
-
-    shape_pts = []
-    translate = m #Matrix.Translation( Vector([0,0, zOffset2])) @ m
-    for pt in pts:
-        shape_pts.append( translate @ Vector(pt) )
-    shape_pts_indices = _get_indices(shape_pts)
-
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": shape_pts}, indices=shape_pts_indices)    
-    batch.draw(_SHADER_)   
+    loops.append([translate @ Vector(pt) for pt in pts])
 
 def draw_rod(leftEdge, rightEdge, topEdge,  bottomEdge,
-            frontEdge,  backEdge,  scale, width,  radius, 
-            left,  right,  top,  bottom,  front, back, world_mat):
+            frontEdge,  backEdge,  scale, width,  radius,
+            left,  right,  top,  bottom,  front, back):
+    """Return the points and indices of a rod, in the light filter's space"""
 
     leftEdge *= scale
     rightEdge *= scale
@@ -1000,41 +802,44 @@ def draw_rod(leftEdge, rightEdge, topEdge,  bottomEdge,
     backEdge *= scale
     frontEdge *= scale
     bottomEdge *= scale
-    
-    m = world_mat
-    
+
+    loops = []
+    m = Matrix.Identity(4)
+
     # front and back
     draw_rounded_rectangles(left, right, top, bottom, radius,
                           leftEdge, rightEdge,
-                          topEdge, bottomEdge, front, -back, m)
+                          topEdge, bottomEdge, front, -back, m, loops)
+
+
+    m = Matrix.Rotation(math.radians(-90.0), 4, 'X')
+
 
- 
-    m = world_mat @ Matrix.Rotation(math.radians(-90.0), 4, 'X')
- 
-    
     # top and bottom
-    
+
     draw_rounded_rectangles(left, right, back, front, radius,
                           leftEdge, rightEdge,
-                          backEdge, frontEdge, top, -bottom, m)
- 
-    m = world_mat  @ Matrix.Rotation(math.radians(90.0), 4, 'Y')
-    
-    
+                          backEdge, frontEdge, top, -bottom, m, loops)
+
+    m = Matrix.Rotation(math.radians(90.0), 4, 'Y')
+
+
     # left and right
     draw_rounded_rectangles(front, back, top, bottom, radius,
                           frontEdge, backEdge,
-                          topEdge, bottomEdge, -left, right, m)
+                          topEdge, bottomEdge, -left, right, m, loops)
+
+    return _loop_shape(*loops)
 
 def draw_rod_light_filter(ob):
     _SHADER_.bind()
 
     set_selection_color(ob)
 
-    m = Matrix(ob.matrix_world)     
+    m = Matrix(ob.matrix_world)
     m = m @ Matrix.Rotation(math.radians(90.0), 4, 'X')
     m = m @ Matrix.Rotation(math.radians(90.0), 4, 'Y')
-    
+
     #m = m @ Matrix.Rotation(math.radians(180.0), 4, 'Y')
     #m = m @ Matrix.Rotation(math.radians(90.0), 4, 'Z')
 
@@ -1065,8 +870,6 @@ def draw_rod_light_filter(ob):
     scale_height = 1.0
     scale_depth = 1.0
 
-    rod_scale = 0.0
-
     if light.renderman.get_light_node_name() == 'PxrRodLightFilter':
         left_edge *= rm.leftEdge
         right_edge *= rm.rightEdge
@@ -1091,23 +894,21 @@ def draw_rod_light_filter(ob):
     front += scale_depth * depth
     back += scale_depth * depth
 
-    draw_rod(left_edge, right_edge,
-            top_edge, bottom_edge,
-            front_edge, back_edge, rod_scale,
-            width, radius,
-            left, right, top, bottom, front,
-            back, m)
-        
+    rod_params = (left_edge, right_edge,
+                  top_edge, bottom_edge,
+                  front_edge, back_edge)
+    rod_dims = (width, radius,
+                left, right, top, bottom, front,
+                back)
+
+    rod_scale = 0.0
+    _draw_shape(m, ('rod', rod_scale) + rod_params + rod_dims, lambda: draw_rod(*rod_params, rod_scale, *rod_dims))
+
     if edge > 0.0:
-            
+
         # draw outside box
         rod_scale = 1.0
-        draw_rod(left_edge, right_edge,
-            top_edge, bottom_edge,
-            front_edge, back_edge, rod_scale,
-            width, radius,
-            left, right, top, bottom, front,
-            back, m)           
+        _draw_shape(m, ('rod', rod_scale) + rod_params + rod_dims, lambda: draw_rod(*rod_params, rod_scale, *rod_dims))
 
 def draw_ramp_light_filter(ob):
     _SHADER_.bind()
@@ -1119,138 +920,41 @@ def draw_ramp_light_filter(ob):
     rampType = int(rm.rampType)
 
     begin = float(rm.beginDist)
-    end = float(rm.endDist)    
+    end = float(rm.endDist)
+
+    m = Matrix(ob.matrix_world)
+    m = m @ Matrix.Rotation(math.radians(180.0), 4, 'Y')
+    m = m @ Matrix.Rotation(math.radians(90.0), 4, 'Z')
 
     # distToLight
     if rampType in (0,2):
-        _SHADER_.bind()
-
-        set_selection_color(ob)
-
-        m = Matrix(ob.matrix_world)        
-        m = m @ Matrix.Rotation(math.radians(180.0), 4, 'Y')
-        m = m @ Matrix.Rotation(math.radians(90.0), 4, 'Z')
-
-        # begin
-        begin_m = m @ Matrix.Scale(begin, 4)      
-
-        disk = []
-        for pt in s_diskLight:
-            disk.append( begin_m @ Vector(pt) ) 
-
-        disk_indices = _get_indices(s_diskLight)
-        batch = batch_for_shader(_SHADER_, 'LINES', {"pos": disk}, indices=disk_indices)    
-        batch.draw(_SHADER_)
-
-        m2 = begin_m @ Matrix.Rotation(math.radians(90.0), 4, 'Y')
-        disk = []
-        for pt in s_diskLight:
-            disk.append( m2 @ Vector(pt)) 
-
-        disk_indices = _get_indices(s_diskLight)
-        batch = batch_for_shader(_SHADER_, 'LINES', {"pos": disk}, indices=disk_indices)    
-        batch.draw(_SHADER_)
-
-        m3 = begin_m @ Matrix.Rotation(math.radians(90.0), 4, 'X')
-        disk = []
-        for pt in s_diskLight:
-            disk.append( m3 @ Vector(pt))
-
-        disk_indices = _get_indices(s_diskLight)
-        batch = batch_for_shader(_SHADER_, 'LINES', {"pos": disk}, indices=disk_indices)    
-        batch.draw(_SHADER_)   
-
-        # end
-        end_m = m @ Matrix.Scale(end, 4)      
-
-        disk = []
-        for pt in s_diskLight:
-            disk.append( end_m @ Vector(pt)) 
-
-        disk_indices = _get_indices(s_diskLight)
-        batch = batch_for_shader(_SHADER_, 'LINES', {"pos": disk}, indices=disk_indices)    
-        batch.draw(_SHADER_)
-
-        m2 = end_m @ Matrix.Rotation(math.radians(90.0), 4, 'Y')
-        disk = []
-        for pt in s_diskLight:
-            disk.append( m2 @ Vector(pt))
-
-        disk_indices = _get_indices(s_diskLight)
-        batch = batch_for_shader(_SHADER_, 'LINES', {"pos": disk}, indices=disk_indices)    
-        batch.draw(_SHADER_)
-
-        m3 = end_m @ Matrix.Rotation(math.radians(90.0), 4, 'X')
-        disk = []
-        for pt in s_diskLight:
-            disk.append( m3 @ Vector(pt))
-
-        disk_indices = _get_indices(s_diskLight)
-        batch = batch_for_shader(_SHADER_, 'LINES', {"pos": disk}, indices=disk_indices)    
-        batch.draw(_SHADER_)        
-
+        _draw_shape(m @ Matrix.Scale(begin, 4), 'three_disks', _make_three_disks)
+        _draw_shape(m @ Matrix.Scale(end, 4), 'three_disks', _make_three_disks)
 
     # linear
-    elif rampType == 1:        
-
-        m = Matrix(ob.matrix_world)        
-        m = m @ Matrix.Rotation(math.radians(180.0), 4, 'Y')
-        m = m @ Matrix.Rotation(math.radians(90.0), 4, 'Z')
+    elif rampType == 1:
 
+        # the boxes are offset along the world space normal
         box = []
         for pt in s_rmanLightLogo['box']:
-            box.append( m @ Vector(pt)) 
+            box.append( m @ Vector(pt))
         n = mathutils.geometry.normal(box)
         n.normalize()
-        box1 = []
-        for i,pt in enumerate(box):
-            if begin > 0.0:
-                box1.append(pt + (begin * n))
-            else:
-                box1.append(pt)
-
-        box_indices = _get_indices(s_rmanLightLogo['box'])
-        batch = batch_for_shader(_SHADER_, 'LINES', {"pos": box1}, indices=box_indices)    
-        batch.draw(_SHADER_)
-
-        box2 = []
-        for pt in box:
-            box2.append( pt + (end * n) )
 
-        batch = batch_for_shader(_SHADER_, 'LINES', {"pos": box2}, indices=box_indices)    
-        batch.draw(_SHADER_)        
+        make_box = lambda: _loop_shape(s_rmanLightLogo['box'])
+        if begin > 0.0:
+            _draw_shape(Matrix.Translation(begin * n) @ m, 'box', make_box)
+        else:
+            _draw_shape(m, 'box', make_box)
+        _draw_shape(Matrix.Translation(end * n) @ m, 'box', make_box)
 
     # radial
     elif rampType == 3:
-        _SHADER_.bind()
-
-        set_selection_color(ob)
-
-        m = Matrix(ob.matrix_world)        
-        m = m @ Matrix.Rotation(math.radians(180.0), 4, 'Y')
-        m = m @ Matrix.Rotation(math.radians(90.0), 4, 'Z')
-
+        make_disk = lambda: _loop_shape(s_diskLight)
         if begin > 0.0:
-            m1 = m @ Matrix.Scale(begin, 4)      
-
-            disk = []
-            for pt in s_diskLight:
-                disk.append( m1 @ Vector(pt) )
-
-            disk_indices = _get_indices(s_diskLight)
-            batch = batch_for_shader(_SHADER_, 'LINES', {"pos": disk}, indices=disk_indices)    
-            batch.draw(_SHADER_)
-
+            _draw_shape(m @ Matrix.Scale(begin, 4), 'disk', make_disk)
 
-        m2 = m @ Matrix.Scale(end, 4)      
-
-        disk = []
-        for pt in s_diskLight:
-            disk.append( m2 @ Vector(pt)) 
-
-        disk_indices = _get_indices(s_diskLight)
-        batch = batch_for_shader(_SHADER_, 'LINES', {"pos": disk}, indices=disk_indices)    
-        batch.draw(_SHADER_)
+        _draw_shape(m @ Matrix.Scale(end, 4), 'disk', make_disk)
 
     else:
         pass
@@ -1260,7 +964,7 @@ def draw_barn_light_filter(ob):
 
     _SHADER_.bind()
 
-    m = Matrix(ob.matrix_world) 
+    m = Matrix(ob.matrix_world)
     m = m @ Matrix.Rotation(math.radians(180.0), 4, 'Y')
     #m = m @ Matrix.Rotation(math.radians(90.0), 4, 'Z')
 
@@ -1271,25 +975,30 @@ def draw_barn_light_filter(ob):
     _BARN_LIGHT_DRAW_HELPER_.update_input_params(ob)
     vtx_buffer = _BARN_LIGHT_DRAW_HELPER_.vtx_buffer()
 
-    pts = []
-    for pt in vtx_buffer:
-        pts.append( m @ Vector(pt))
-
-    indices = _BARN_LIGHT_DRAW_HELPER_.idx_buffer(len(pt), 0, 0)
+    indices = _BARN_LIGHT_DRAW_HELPER_.idx_buffer(len(vtx_buffer), 0, 0)
     # blender wants a list of lists
     indices = [indices[i:i+2] for i in range(0, len(indices), 2)]
 
-    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": pts}, indices=indices)    
-    batch.draw(_SHADER_)     
+    # the barn shape depends on the lights it is attached to, so it
+    # isn't cached, but it is still drawn in the light filter's space
+    batch = batch_for_shader(_SHADER_, 'LINES', {"pos": vtx_buffer}, indices=indices)
+    with gpu.matrix.push_pop():
+        gpu.matrix.multiply_matrix(m)
+        batch.draw(_SHADER_)
 
 def draw():
 
     if bpy.context.engine != 'PRMAN_RENDER':
         return
-    
+
     scene = bpy.context.scene
-    for ob in [x for x in scene.objects if x.type == 'LIGHT']:
-        if ob.hide_get():
+    for ob in _get_scene_lights(scene):
+        try:
+            if ob.hide_get():
+                continue
+        except ReferenceError:
+            # the light was deleted, rebuild the list on the next redraw
+            _clear_scene_lights()
             continue
         if not ob.data.renderman:
             continue
@@ -1320,22 +1029,22 @@ def draw():
                 ob.data.size = 0.0
             ob.data.type = 'POINT'
 
-        if light_shader_name == 'PxrSphereLight': 
+        if light_shader_name == 'PxrSphereLight':
             draw_sphere_light(ob)
-        elif light_shader_name == 'PxrEnvDayLight': 
+        elif light_shader_name == 'PxrEnvDayLight':
             draw_envday_light(ob)
-        elif light_shader_name == 'PxrDiskLight': 
+        elif light_shader_name == 'PxrDiskLight':
             draw_disk_light(ob)
-        elif light_shader_name == 'PxrDistantLight': 
-            draw_dist_light(ob)       
-        elif light_shader_name == 'PxrPortalLight': 
-            draw_portal_light(ob)      
-        elif light_shader_name == 'PxrDomeLight': 
-            draw_dome_light(ob)        
+        elif light_shader_name == 'PxrDistantLight':
+            draw_dist_light(ob)
+        elif light_shader_name == 'PxrPortalLight':
+            draw_portal_light(ob)
+        elif light_shader_name == 'PxrDomeLight':
+            draw_dome_light(ob)
         elif light_shader_name == 'PxrCylinderLight':
-            draw_cylinder_light(ob)     
+            draw_cylinder_light(ob)
         elif light_shader_name in ['PxrGoboLightFilter', 'PxrCookieLightFilter', 'PxrRectLight']:
-             draw_rect_light(ob)             
+             draw_rect_light(ob)
         elif light_shader_name in ['PxrRodLightFilter', 'PxrBlockerLightFilter']:
             draw_rod_light_filter(ob)
         elif light_shader_name == 'PxrRampLightFilter':
@@ -1343,14 +1052,22 @@ def draw():
         elif light_shader_name == 'PxrBarnLightFilter':
             # get all lights that the barn is attached to
             draw_barn_light_filter(ob)
-        else: 
+        else:
             draw_sphere_light(ob)
 
 def register():
     global _DRAW_HANDLER_
     _DRAW_HANDLER_ = bpy.types.SpaceView3D.draw_handler_add(draw, (), 'WINDOW', 'POST_VIEW')
+    for handlers, cb in __LIGHT_LIST_HANDLERS__:
+        if cb not in handlers:
+            handlers.append(cb)
 
 def unregister():
     global _DRAW_HANDLER_
     if _DRAW_HANDLER_:
         bpy.types.SpaceView3D.draw_handler_remove(_DRAW_HANDLER_, 'WINDOW')
+    for handlers, cb in __LIGHT_LIST_HANDLERS__:
+        if cb in handlers:
+            handlers.remove(cb)
+    _BATCH_CACHE_.clear()
+    _clear_scene_lights()